@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+import logging
+import datetime
+import re
+from Worker import CreditSpecificationWorker
+
+__author__ = "Gary Silverman"
+
+logger = logging.getLogger('Orchestrator')  # The Module Name
+
+
+class TierPlan(object):
+	'''
+	The minimal list of actions for the instances of one tier, as { instanceId : [actions] }, in the order
+	they are carried out.  Instances which are already in the target state have no entry.
+	'''
+
+	def __init__(self, tierName, tierAction):
+		self.tierName = tierName
+		self.tierAction = tierAction
+		self.instanceActions = {}
+		self.exemptIds = []  # Instances the plan leaves alone because of their exemption tag
+
+		# Filled in by the plan-only mode, see Orchestrator.planOrchestration()
+		self.apiCalls = {}  # { service : { operation : count } }
+		self.estimatedSeconds = 0
+		self.maxSeconds = 0
+		self.prefetchSeconds = 0  # Run in the background from the outset, overlapping the tiers depended on
+		self.prefetchMaxSeconds = 0
+
+	def addAction(self, instanceId, action):
+		self.instanceActions.setdefault(instanceId, []).append(action)
+
+	def getInstanceIds(self, action):
+		return (sorted([instanceId for instanceId, actions in self.instanceActions.items() if action in actions]))
+
+	def addExemption(self, instanceId):
+		self.exemptIds.append(instanceId)
+
+	def isNoOp(self):
+		return (not self.instanceActions)
+
+	def countActions(self):
+		# Returns { action : number of instances }
+		actionCounts = {}
+		for actions in self.instanceActions.values():
+			for action in actions:
+				actionCounts[action] = actionCounts.get(action, 0) + 1
+		return (actionCounts)
+
+	def addApiCalls(self, service, operation, count=1):
+		ActionPlanner.countApiCalls(self.apiCalls, service, operation, count)
+
+	def toDict(self):
+		return ({
+			'TierName': self.tierName,
+			'TierAction': self.tierAction,
+			'Instances': dict([(instanceId, list(actions)) for instanceId, actions in sorted(self.instanceActions.items())]),
+			'Exempt': sorted(self.exemptIds),
+			'ActionCounts': self.countActions(),
+			'ApiCalls': self.apiCalls,
+			'EstimatedSeconds': self.estimatedSeconds,
+			'MaxSeconds': self.maxSeconds,
+			'PrefetchSeconds': self.prefetchSeconds,
+			'PrefetchMaxSeconds': self.prefetchMaxSeconds
+		})
+
+
+class ActionPlanner(object):
+	'''
+	Diffs the workload inventory against the tier specifications and scaling profile, and plans only the
+	actions which would change something.  An instance already of the profile's instance type is not resized,
+	an instance already running is not started, and a tier already in the target state plans no actions at all.
+	Instances carrying the exemption tag, when configured, are not stopped.  The tags come with the inventory,
+	so exemption costs no API calls.
+	'''
+
+	ACTION_RESIZE = 'Resize'
+	ACTION_CREDIT_SPECIFICATION = 'CreditSpecification'
+	ACTION_ELB_REREGISTER = 'ELBReregister'
+	ACTION_START = 'Start'
+	ACTION_STOP = 'Stop'
+
+	# Instance families whose CPU credit option is reconciled when resized, per the T2 Unlimited profile suffix
+	CREDIT_SPECIFICATION_FAMILIES = ['t2']
+
+	# Burstable instance families, the only ones which have a CPU credit option to describe
+	BURSTABLE_FAMILIES = ['t2', 't3', 't3a', 't4g']
+	T2_UNLIMITED_SUFFIXES = ['u', 'U']
+
+	EXEMPTION_TAG_VALUE_DEFAULT = 'true'
+
+	# Accepted formats of the exemption expiry tag, ISO-8601 with an optional UTC offset (Z, +hh:mm or +hhmm),
+	# see EXEMPTION_EXPIRY_PATTERN.  Without an offset the time is taken to be UTC.
+	EXEMPTION_EXPIRY_FORMATS = ['%Y-%m-%dT%H:%M:%S.%f', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d %H:%M:%S.%f', '%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M', '%Y-%m-%d %H:%M', '%Y-%m-%d']
+	EXEMPTION_EXPIRY_PATTERN = re.compile(r'^(?P<local>\d{4}-\d{2}-\d{2}(?:[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?)?)(?:(?P<utc>[Zz])|(?P<sign>[+-])(?P<hours>\d{2}):?(?P<minutes>\d{2}))?$')
+
+	def __init__(self, elbIndex=None, targetGroupIndex=None, exemptionTagKey=None, exemptionTagValue=EXEMPTION_TAG_VALUE_DEFAULT, exemptionExpiryTagKey=None):
+		self.elbIndex = elbIndex or {}
+		self.targetGroupIndex = targetGroupIndex or {}
+		self.exemptionTagKey = exemptionTagKey
+		self.exemptionTagValue = exemptionTagValue
+		self.exemptionExpiryTagKey = exemptionExpiryTagKey
+
+	def planStart(self, tierName, tierAction, runningInstances, stoppedInstances, targetInstanceCount, instanceType=None, currentCredits=None):
+		'''
+		Plan the Start of a tier.  The first stopped instances needed to reach targetInstanceCount running are
+		started.  When a scaling profile applies, every stopped instance not yet of its instance type is resized,
+		and every stopped instance whose CPU credit option, per currentCredits { instanceId : cpuCredits }, differs
+		from the profile's has it changed.  An instance missing from currentCredits is assumed to differ.
+		'''
+		tierPlan = TierPlan(tierName, tierAction)
+
+		# Never negative, otherwise the slice below would select from the wrong end of the list
+		toStart = max(0, int(targetInstanceCount) - len(runningInstances))
+		startList = stoppedInstances[:toStart]
+
+		if (instanceType):
+			targetInstanceType = ActionPlanner.getTargetInstanceType(instanceType)
+			cpuCredits = ActionPlanner.getDesiredCpuCredits(instanceType)
+			for currInstance in stoppedInstances:
+				if (currInstance.instance_type != targetInstanceType):
+					tierPlan.addAction(currInstance.id, ActionPlanner.ACTION_RESIZE)
+				if (cpuCredits and (currentCredits or {}).get(currInstance.id) != cpuCredits):
+					tierPlan.addAction(currInstance.id, ActionPlanner.ACTION_CREDIT_SPECIFICATION)
+
+			for currInstance in runningInstances:
+				if (currInstance.instance_type != targetInstanceType):
+					logger.warning('planStart() instance %s of Tier %s is running as %s, it can only be resized to %s while stopped' % (currInstance.id, tierName, currInstance.instance_type, targetInstanceType))
+
+		for currInstance in startList:
+			if (currInstance.id in self.elbIndex or currInstance.id in self.targetGroupIndex):
+				tierPlan.addAction(currInstance.id, ActionPlanner.ACTION_ELB_REREGISTER)
+			tierPlan.addAction(currInstance.id, ActionPlanner.ACTION_START)
+
+		self.logPlan(tierPlan)
+		return (tierPlan)
+
+	def planStop(self, tierName, tierAction, runningInstances):
+		'''
+		Plan the Stop of a tier.  Only the running instances are stopped, unless exempt by tag, and subject to
+		their override check.
+		'''
+		tierPlan = TierPlan(tierName, tierAction)
+		now = datetime.datetime.utcnow()
+		for currInstance in runningInstances:
+			if (self.isExempt(currInstance, now)):
+				tierPlan.addExemption(currInstance.id)
+			else:
+				tierPlan.addAction(currInstance.id, ActionPlanner.ACTION_STOP)
+
+		self.logPlan(tierPlan)
+		return (tierPlan)
+
+	def isExempt(self, instance, now):
+		'''
+		An instance is exempt when it carries the exemption tag with the exemption value (case insensitive), and
+		the expiry tag, when configured and present, is still in the future.  An expiry which cannot be read
+		leaves the instance exempt, in keeping with the risk averse Stop decisions.
+		'''
+		if (not self.exemptionTagKey):
+			return (False)
+
+		tags = dict([(currTag['Key'], currTag['Value']) for currTag in (instance.tags or [])])
+		if (str(tags.get(self.exemptionTagKey, '')).lower() != str(self.exemptionTagValue).lower()):
+			return (False)
+
+		if (self.exemptionExpiryTagKey and self.exemptionExpiryTagKey in tags):
+			expiry = self.parseExpiry(tags[self.exemptionExpiryTagKey])
+			if (expiry is None):
+				logger.warning('isExempt() instance %s exemption expiry %s of %s could not be read, the instance remains exempt' % (instance.id, self.exemptionExpiryTagKey, tags[self.exemptionExpiryTagKey]))
+			elif (expiry <= now):
+				logger.info('isExempt() instance %s exemption expired at %s' % (instance.id, tags[self.exemptionExpiryTagKey]))
+				return (False)
+
+		logger.info('isExempt() instance %s is exempt per its %s tag, it will not be stopped' % (instance.id, self.exemptionTagKey))
+		return (True)
+
+	def parseExpiry(self, expiryValue):
+		'''
+		Returns the expiry as a naive UTC datetime, comparable with utcnow(), or None when it cannot be read
+		'''
+		match = ActionPlanner.EXEMPTION_EXPIRY_PATTERN.match(str(expiryValue).strip())
+		if (not match):
+			return (None)
+
+		# strptime() reads at most microseconds
+		localValue = re.sub(r'(\.\d{6})\d+$', r'\1', match.group('local'))
+		for expiryFormat in ActionPlanner.EXEMPTION_EXPIRY_FORMATS:
+			try:
+				expiry = datetime.datetime.strptime(localValue, expiryFormat)
+			except ValueError:
+				continue
+
+			if (match.group('sign')):
+				offset = datetime.timedelta(hours=int(match.group('hours')), minutes=int(match.group('minutes')))
+				expiry = expiry - offset if match.group('sign') == '+' else expiry + offset
+			return (expiry)
+
+		return (None)
+
+	def logPlan(self, tierPlan):
+		if (tierPlan.isNoOp()):
+			logger.info('Tier %s is already in the target state for %s, no actions planned (%i exempt)' % (tierPlan.tierName, tierPlan.tierAction, len(tierPlan.exemptIds)))
+		else:
+			logger.info('Tier %s %s plan: %i instances, actions %s, %i exempt' % (tierPlan.tierName, tierPlan.tierAction, len(tierPlan.instanceActions), tierPlan.countActions(), len(tierPlan.exemptIds)))
+
+	@staticmethod
+	def countApiCalls(apiCalls, service, operation, count=1):
+		# Accumulate into { service : { operation : count } }, ignoring operations which won't be called
+		if (count > 0):
+			serviceCalls = apiCalls.setdefault(service, {})
+			serviceCalls[operation] = serviceCalls.get(operation, 0) + count
+
+	@staticmethod
+	def getTargetInstanceType(instanceType):
+		# The profile's instance type may carry a suffix, e.g. t2.micro.u for T2 Unlimited
+		return ('.'.join(instanceType.split('.')[:2]))
+
+	@staticmethod
+	def isBurstable(instanceType):
+		return (instanceType.split('.')[0] in ActionPlanner.BURSTABLE_FAMILIES)
+
+	@staticmethod
+	def getDesiredCpuCredits(instanceType):
+		'''
+		Returns the CpuCredits option for the profile's instance type, or None when it is not to be reconciled.
+		A T2 instance type with the .u suffix (e.g. t2.micro.u) is T2 Unlimited, and without a suffix is standard.
+		'''
+		instanceTypeList = instanceType.split('.')
+		if (instanceTypeList[0] not in ActionPlanner.CREDIT_SPECIFICATION_FAMILIES):
+			return (None)
+
+		if (len(instanceTypeList) == 3):
+			if (instanceTypeList[2] in ActionPlanner.T2_UNLIMITED_SUFFIXES):
+				return (CreditSpecificationWorker.CPU_CREDITS_UNLIMITED)
+			return (None)
+
+		return (CreditSpecificationWorker.CPU_CREDITS_STANDARD)
@@ -6,6 +6,8 @@ import yaml
 import boto3
 from boto3.dynamodb.conditions import Key, Attr
 import datetime
+import hashlib
+import json
 
 logger = logging.getLogger('Loader') #The Module Name
 
@@ -21,10 +23,13 @@ class Loader(object):
   TIER_TAG_VALUE = 'TierTagValue'
   TIER_START = 'TierStart'
   TIER_STOP = 'TierStop'
+  TIER_SEQUENCE = 'TierSequence'
+  TIER_DEPENDS_ON = 'TierDependsOn'
   #TIER_ORCHESTRATION_DELAY = 'InterTierOrchestrationDelay'
   FLEET_SUBSET = 'FleetSubset'
   WORKLOADSTATE = 'WorkloadState'
   WORKLOADSPECTYPE = 'Unmanaged'
+  SPEC_VERSION = 'SpecVersion' # Hash of the workload and its tiers, lets the Orchestrator cache the specification
 
   # ----------------------------------------------------------------------------
   def __init__(self, dynamoDBRegion, logLevel):
@@ -158,16 +163,77 @@ class Loader(object):
     
     # Next, did we end at len(startTierIndexList) ?
     if( maxIdx != len(startSet)-1 ):
-      logger.error('Error: Tier Start and Tier Stop TierSequences must be sequential starting at zero and without gaps, nor duplicates. Index List is %s' % startTierIndexList)
+      logger.error('Error: Tier Start and Tier Stop TierSequences must be sequential starting at zero and without gaps. Index List is %s' % startTierIndexList)
       return(False)
 
+    # Tiers sharing a TierSequence have no dependency on each other and will be actioned concurrently
+    if( len(startSet) != len(startTierIndexList) ):
+      logger.info('Tiers sharing a TierSequence will be actioned concurrently. Index List is %s' % startTierIndexList)
+
+    return(True)
+
+  def buildTierDependencies(self, tierAction):
+    # A tier depends on the tiers named in its TierDependsOn list when present, otherwise on every tier
+    # with a lower TierSequence for the given action.
+    tierSequences = {}
+    for aTier in self.tiers:
+      tierSequences[aTier[Loader.TIER_TAG_VALUE]] = int(aTier[tierAction][Loader.TIER_SEQUENCE])
+
+    tierDependencies = {}
+    for aTier in self.tiers:
+      tierName = aTier[Loader.TIER_TAG_VALUE]
+      actionBlock = aTier[tierAction]
+      if( Loader.TIER_DEPENDS_ON in actionBlock ):
+        tierDependencies[tierName] = actionBlock[Loader.TIER_DEPENDS_ON]
+      else:
+        tierDependencies[tierName] = [otherName for otherName, otherSeq in tierSequences.items() if otherSeq < tierSequences[tierName]]
+
+    return(tierDependencies)
+
+  def isAcyclicDependencies(self):
+
+    for tierAction in [Loader.TIER_START, Loader.TIER_STOP]:
+      tierDependencies = self.buildTierDependencies(tierAction)
+      logger.debug('%s tier dependencies are %s' % (tierAction, tierDependencies))
+
+      for tierName, dependsOn in tierDependencies.items():
+        if( not isinstance(dependsOn, list) ):
+          logger.error('Error: %s %s of Tier %s must be a list of tier names ->%s<-' % (tierAction, Loader.TIER_DEPENDS_ON, tierName, dependsOn))
+          return(False)
+
+        for dependencyName in dependsOn:
+          if( dependencyName not in tierDependencies ):
+            logger.error('Error: %s %s of Tier %s names an unknown tier ->%s<-' % (tierAction, Loader.TIER_DEPENDS_ON, tierName, dependencyName))
+            return(False)
+          if( dependencyName == tierName ):
+            logger.error('Error: %s %s of Tier %s names the tier itself' % (tierAction, Loader.TIER_DEPENDS_ON, tierName))
+            return(False)
+
+      # Repeatedly remove the tiers whose dependencies are all satisfied.  If at some point no tier
+      # can be removed, the remaining tiers form a cycle.
+      remaining = {}
+      for tierName, dependsOn in tierDependencies.items():
+        remaining[tierName] = set(dependsOn)
+
+      while( remaining ):
+        readyTiers = [tierName for tierName, dependsOn in remaining.items() if not dependsOn]
+        if( not readyTiers ):
+          logger.error('Error: %s tier dependencies contain a cycle among tiers %s' % (tierAction, sorted(remaining.keys())))
+          return(False)
+
+        for tierName in readyTiers:
+          del remaining[tierName]
+        for dependsOn in remaining.values():
+          dependsOn.difference_update(readyTiers)
+
     return(True)
     
   def isValidSpecification(self):
 
     if( self.isRequiredAttributes() ):
       if( self.isRequiredSequencing() ):
-        return(True)
+        if( self.isAcyclicDependencies() ):
+          return(True)
 
     return(False)
 
@@ -219,13 +285,24 @@ class Loader(object):
       logger.info("Loading Tier {%s, %s}" % (aTier.get(Loader.TIER_PARTITION_KEY), aTier.get(Loader.TIER_SORT_KEY)) )
       tiersTable.put_item(Item=aTier)
 
+  # ----------------------------------------------------------------------------
+  def computeSpecVersion(self):
+    # Any change to the workload or to any of its tiers yields a new version
+    workloadBlock = dict([(k, v) for k, v in self.workloadBlock.items() if k != Loader.SPEC_VERSION])
+    specDoc = json.dumps({ 'workload' : workloadBlock, 'tiers' : self.tiers }, sort_keys=True, default=str)
+    return(hashlib.sha256(specDoc.encode('utf-8')).hexdigest())
+
   # ----------------------------------------------------------------------------
   def loadSpecification(self):
     self.deleteWorkloads()
     self.deleteTiers()
 
-    self.loadWorkload()
+    # The tiers are loaded ahead of the version stamped workload, so the Orchestrator never caches a partial
+    # set of tiers under the new version
+    self.workloadBlock[Loader.SPEC_VERSION] = self.computeSpecVersion()
+    logger.info("Workload: %s spec version %s" % (self.workloadSpecName, self.workloadBlock[Loader.SPEC_VERSION]))
     self.loadTiers()
+    self.loadWorkload()
 
   def workLoadState(self):
 
@@ -1,5 +1,4 @@
 #!/usr/bin/env python3
-import boto3
 import json
 import time
 import datetime
@@ -7,14 +6,22 @@ import argparse
 import Utils
 import logging 
 import re
+import functools
+import concurrent.futures
+import threading
 
 from distutils.util import strtobool
 from botocore.exceptions import ClientError
 from boto3.dynamodb.conditions import Key, Attr
-from Worker import Worker, StopWorker, StartWorker
+from Worker import Worker, StopWorker, StartWorker, BatchWorker, ELBWorker, TargetGroupWorker, CreditSpecificationWorker
 #from Utils import RetryNotifier,SnsNotifier
 from Utils import SnsNotifier
 from Utils import InstanceMetaData
+from Utils import TierExecutor
+from TierWaiter import TierWaiter
+from SSMDelegate import SSMTierDelegate, SSMDecisionCache
+from ActionPlanner import ActionPlanner, TierPlan
+from WorkloadPlan import WorkloadPlan, TierSpec, TierActionSpec, ScalingProfileSpec
 import getpass
 from redo import retriable,retry  # See action function  https://github.com/mozilla-releng/redo
 from sys import exit
@@ -37,6 +44,8 @@ class Orchestrator(object):
 
 	WORKLOAD_SPEC_REGION_KEY='WorkloadRegion'
 
+	WORKLOAD_SPEC_VERSION='SpecVersion'  # Stamped by the Loader, changes whenever the workload or any of its tiers change
+
 	WORKLOAD_ENVIRONMENT_FILTER_TAG_KEY='WorkloadFilterTagName'
 	WORKLOAD_ENVIRONMENT_FILTER_TAG_VALUE='WorkloadFilterTagValue'
 
@@ -45,6 +54,11 @@ class Orchestrator(object):
 	WORKLOAD_SSM_S3_BUCKET_NAME='SSMS3BucketName'
 	WORKLOAD_SSM_S3_KEY_PREFIX_NAME='SSMS3KeyPrefixName'
 
+	WORKLOAD_SSM_POLL_INTERVAL='SSMPollInterval'  # Initial seconds between polls for the SSM override check results
+	WORKLOAD_SSM_MAX_POLL_INTERVAL='SSMMaxPollInterval'  # Cap on the seconds between polls, as they back off
+	WORKLOAD_SSM_POLL_BACKOFF_FACTOR='SSMPollBackoffFactor'  # Multiplier applied to the interval after each poll
+	WORKLOAD_SSM_MAX_WAIT='SSMMaxWait'  # Maximum seconds to wait for the results, after which instances are not stopped
+
 	WORKLOAD_SNS_TOPIC_NAME='SNSTopicName'
 
 	WORKLOAD_KILL_SWITCH="DisableAllSchedulingActions"
@@ -52,6 +66,14 @@ class Orchestrator(object):
 
 	WORKLOAD_SCALE_INSTANCE_DELAY="ScaleInstanceDelay"  #Delay in seconds after modifyAttribute() called ahead of startIntance()
 
+	WORKLOAD_MAX_PARALLELISM="MaxParallelism"  # Maximum number of instances within a tier actioned concurrently
+	MAX_PARALLELISM_DEFAULT = 10
+
+	WORKLOAD_BATCH_INSTANCE_ACTIONS="BatchInstanceActions"  # 'True' to Start/Stop a tier's instances with multi-instance requests
+	WORKLOAD_EXEMPTION_TAG_KEY="ExemptionTagKey"  # Instances tagged with this key (and ExemptionTagValue) are not Stopped
+	WORKLOAD_EXEMPTION_TAG_VALUE="ExemptionTagValue"
+	WORKLOAD_EXEMPTION_EXPIRY_TAG_KEY="ExemptionExpiryTagKey"  # Optional tag holding the UTC time the exemption ends
+
 
 	TIER_SPEC_TABLE_NAME='TierSpecification'
 	TIER_SPEC_PARTITION_KEY='SpecName'
@@ -68,12 +90,31 @@ class Orchestrator(object):
 	TIER_SCALING='TierScaling'
 	TIER_NAME='TierTagValue'
 	TIER_SEQ_NBR='TierSequence'
+	TIER_DEPENDS_ON='TierDependsOn' # Optional list of tier names which must complete before this tier is actioned
 	TIER_SYCHRONIZATION='TierSynchronization'
 	TIER_STOP_OVERRIDE_FILENAME='TierStopOverrideFilename'
 	TIER_STOP_OS_TYPE='TierStopOverrideOperatingSystem' # Valid values are Linux and Windows
 	TIER_IGNORE_STOP = 'IgnoreStop'
+	TIER_STOP_OVERRIDE_CACHE_TTL='TierStopOverrideCacheTTL' # Seconds an override decision is cached for, 0 (the default) disables the cache
 	INTER_TIER_ORCHESTRATION_DELAY='InterTierOrchestrationDelay' # The sleep time between commencing an action on this tier
 	INTER_TIER_ORCHESTRATION_DELAY_DEFAULT = 5
+	TIER_SYNCHRONIZATION_MAX_WAIT = 600 # Seconds a synchronized tier waits for all of its instances to stop
+	TIER_SYNCHRONIZATION_MAX_POLL_INTERVAL = 15
+	SSM_ESTIMATED_POLLS = 2 # Plan-only mode expects the SSM override check to complete by the second poll
+	TIER_READINESS_CONDITION='TierReadinessCondition' # Condition the tier must reach before the next tier is actioned
+	TIER_READINESS_POLL_INTERVAL='TierReadinessPollInterval' # Initial seconds between readiness polls, backs off from there
+	TIER_READINESS_MAX_WAIT='TierReadinessMaxWait' # Maximum seconds to wait for the readiness condition
+	READINESS_INSTANCE_STATE='InstanceState' # All actioned instances are running (Start) or stopped (Stop)
+	READINESS_STATUS_CHECKS='StatusChecks' # As InstanceState, and on Start the status checks have also passed
+	READINESS_TARGETS_HEALTHY='TargetsHealthy' # As InstanceState, and on Start the instances are healthy in their ALB/NLB target groups
+
+	# Verifying a tier's resize, polled with a short interval backing off to the cap
+	SCALE_VERIFICATION_POLL_INTERVAL=2
+	SCALE_VERIFICATION_MAX_POLL_INTERVAL=15
+	SCALE_VERIFICATION_MAX_WAIT=120
+
+	# Instance states captured by the single workload inventory snapshot
+	INVENTORY_INSTANCE_STATES = ['pending', 'running', 'stopping', 'stopped']
 
 	ACTION_STOP='Stop'
 	ACTION_START='Start'
@@ -84,7 +125,7 @@ class Orchestrator(object):
 	LOG_LEVEL_INFO='info'
 	LOG_LEVEL_DEBUG='debug'
 
-	def __init__(self, partitionTargetValue, dynamoDBRegion, scalingProfile, overrideState, dryRun=False):
+	def __init__(self, partitionTargetValue, dynamoDBRegion, scalingProfile, overrideState, dryRun=False, maxParallelism=None):
 
 
 		# default to us-west-2
@@ -96,11 +137,18 @@ class Orchestrator(object):
 	
 		self.partitionTargetValue=partitionTargetValue  # must be set prior to invoking initlogging()
 	
+		# Command line value for the tier parallelism, takes precedence over the WorkloadSpecification
+		self.maxParallelismOverride = maxParallelism
+		self.maxParallelism = Orchestrator.MAX_PARALLELISM_DEFAULT if maxParallelism is None else int(maxParallelism)
+
+		# The DynamoDB client below is shared with the tiers' workers, so the pools are sized before it is created
+		self.sizeClientPools()
+
 		###
 		# DynamoDB Table Related
 		#
 		try:
-			self.dynDBC = boto3.client('dynamodb', region_name=self.dynamoDBRegion)
+			self.dynDBC = Utils.clientRegistry.getClient('dynamodb', self.dynamoDBRegion)
 		except Exception as e:
 			msg = 'Orchestrator::__init__() Exception obtaining botot3 dynamodb client in region %s -->' % self.workloadRegion
 			logger.error(msg + str(e))
@@ -116,14 +164,24 @@ class Orchestrator(object):
 		self.workloadSpecificationValidAttributeList = [
 			Orchestrator.WORKLOAD_SPEC_PARTITION_KEY,
 			Orchestrator.WORKLOAD_SPEC_REGION_KEY,
+			Orchestrator.WORKLOAD_SPEC_VERSION,
 			Orchestrator.WORKLOAD_ENVIRONMENT_FILTER_TAG_KEY,
 			Orchestrator.WORKLOAD_ENVIRONMENT_FILTER_TAG_VALUE,
 			Orchestrator.WORKLOAD_VPC_ID_KEY,
 			Orchestrator.WORKLOAD_SSM_S3_BUCKET_NAME,
 			Orchestrator.WORKLOAD_SSM_S3_KEY_PREFIX_NAME,
+			Orchestrator.WORKLOAD_SSM_POLL_INTERVAL,
+			Orchestrator.WORKLOAD_SSM_MAX_POLL_INTERVAL,
+			Orchestrator.WORKLOAD_SSM_POLL_BACKOFF_FACTOR,
+			Orchestrator.WORKLOAD_SSM_MAX_WAIT,
 			Orchestrator.WORKLOAD_SNS_TOPIC_NAME,
 			Orchestrator.WORKLOAD_KILL_SWITCH,
 			Orchestrator.WORKLOAD_SCALE_INSTANCE_DELAY,
+			Orchestrator.WORKLOAD_MAX_PARALLELISM,
+			Orchestrator.WORKLOAD_BATCH_INSTANCE_ACTIONS,
+			Orchestrator.WORKLOAD_EXEMPTION_TAG_KEY,
+			Orchestrator.WORKLOAD_EXEMPTION_TAG_VALUE,
+			Orchestrator.WORKLOAD_EXEMPTION_EXPIRY_TAG_KEY,
 			Orchestrator.TIER_FILTER_TAG_KEY,
 			Orchestrator.FLEET_SUBSET,
 			Orchestrator.WORKLOAD_CROSS_ACCOUNT_ROLE,
@@ -137,14 +195,10 @@ class Orchestrator(object):
 
 		self.workLoadState=Orchestrator.WORKLOAD_STATE_TABLE_NAME
 
-		# Table requires the DynamoDB.Resource
-		try:
-			self.dynDBR = boto3.resource('dynamodb', region_name=self.dynamoDBRegion)
-			self.tierSpecTable = self.dynDBR.Table(self.tierSpecTableName)
-			self.WorkloadStateTable = self.dynDBR.Table(self.workLoadState)
-		except Exception as e:
-			msg = 'Orchestrator::__init__() Exception obtaining botot3 dynamodb resource in region %s -->' % self.workloadRegion
-			logger.error(msg + str(e))
+		# The DynamoDB.Resource and its Tables are only needed once an action will happen, see initializeActionState()
+		self.dynDBR = None
+		self.tierSpecTable = None
+		self.WorkloadStateTable = None
 
 		# Create a List of valid dynamoDB attributes to address user typos in dynamoDB table
 		self.tierSpecificationValidAttributeList = [
@@ -156,11 +210,16 @@ class Orchestrator(object):
 			Orchestrator.TIER_SCALING,
 			Orchestrator.TIER_NAME,
 			Orchestrator.TIER_SEQ_NBR,
+			Orchestrator.TIER_DEPENDS_ON,
 			Orchestrator.TIER_SYCHRONIZATION,
 			Orchestrator.TIER_STOP_OVERRIDE_FILENAME,
 			Orchestrator.TIER_STOP_OS_TYPE,
 			Orchestrator.INTER_TIER_ORCHESTRATION_DELAY,
-			Orchestrator.TIER_IGNORE_STOP
+			Orchestrator.TIER_READINESS_CONDITION,
+			Orchestrator.TIER_READINESS_POLL_INTERVAL,
+			Orchestrator.TIER_READINESS_MAX_WAIT,
+			Orchestrator.TIER_IGNORE_STOP,
+			Orchestrator.TIER_STOP_OVERRIDE_CACHE_TTL
 		]
 
 		self.scalingProfile = scalingProfile
@@ -175,8 +234,35 @@ class Orchestrator(object):
 
 		self.workloadSpecificationDict={}
 
+		# The WorkloadState item of the workload, None when the workload has never been actioned
+		self.workloadStateItem=None
+
 		self.tierSpecDict={}
 
+		# tierSpecDict compiled into typed attributes, which orchestration reads from.  See compileWorkloadPlan()
+		self.workloadPlan=WorkloadPlan()
+
+		# Set once the STS credentials, clients and tier specifications have been obtained
+		self.actionStateInitialized=False
+
+		# Snapshot of the workload's instances, indexed by Tier tag value then instance state.
+		# Taken once per orchestrate() call, see lookupWorkloadInventory()
+		self.workloadInventory=None
+
+		# { instanceId : [Classic ELB names] }, populated by lookupELBs() prior to a Start
+		self.elbIndex = {}
+
+		# { instanceId : [(targetGroupArn, port)] }, populated by lookupTargetGroups() prior to a Start
+		self.targetGroupIndex = {}
+		self.workloadInventoryLock=threading.Lock()
+
+		# Per-instance outcomes of the tiers actioned by the current orchestrate() call
+		self.actionOutcomes={}
+
+		# { tierName : number of Starts/Stops issued }, and { tierName : seconds of delay skipped } for tiers which issued none
+		self.tierActionCounts={}
+		self.skippedTierDelays={}
+
 		# Dynamically created based on tierSpecDict, based on TierSequence for Action specified
 		self.sequencedTiersList=[]
 
@@ -202,8 +288,9 @@ class Orchestrator(object):
 		# Log the duration of the processing
 		self.startTime = datetime.datetime.now().replace(microsecond=0)
 
-		# Grab general workload information from DynamoDB
-		self.lookupWorkloadSpecification(self.partitionTargetValue)
+		# Grab general workload information, and its state, from DynamoDB.  That is all the kill switch and the
+		# already started check need, everything else is left to initializeActionState()
+		self.lookupWorkload(self.partitionTargetValue)
 
 		# The region where the workload is running.  Note: this may be a different region than the 
 		# DynamodDB configuration
@@ -222,12 +309,73 @@ class Orchestrator(object):
 			except Exception as e:
 				logger.warning('Couldn\'t convert %s to float. Using default of %s.  Exception was %s' % (delayValueStr, str(self.scaleInstanceDelay), str(e)) )
 
-		
+		# The maximum number of instances within a tier which are actioned concurrently.
+		# The command line value wins over the WorkloadSpecification, which wins over the default.
+		if( self.maxParallelismOverride is not None ):
+			self.maxParallelism = int(self.maxParallelismOverride)
+		elif( Orchestrator.WORKLOAD_MAX_PARALLELISM in self.workloadSpecificationDict ):
+			try:
+				parallelismValueStr = self.workloadSpecificationDict[Orchestrator.WORKLOAD_MAX_PARALLELISM]
+				self.maxParallelism = int(parallelismValueStr)
+			except Exception as e:
+				logger.warning('Couldn\'t convert %s to int. Using default of %s.  Exception was %s' % (parallelismValueStr, str(self.maxParallelism), str(e)) )
+		logger.info('Instances within a tier will be actioned with a parallelism of %i' % self.maxParallelism)
+
+		# When set, the instances of a tier cleared for action are Started/Stopped with chunked multi-instance requests
+		self.batchInstanceActions = False
+		if( Orchestrator.WORKLOAD_BATCH_INSTANCE_ACTIONS in self.workloadSpecificationDict ):
+			try:
+				self.batchInstanceActions = bool(strtobool(self.workloadSpecificationDict[Orchestrator.WORKLOAD_BATCH_INSTANCE_ACTIONS]))
+			except Exception as e:
+				logger.warning('Couldn\'t convert %s to boolean. Batch instance actions will not be used.  Exception was %s' % (self.workloadSpecificationDict[Orchestrator.WORKLOAD_BATCH_INSTANCE_ACTIONS], str(e)) )
+
+		# How the results of the SSM override check are polled for, as SSMDelegate.setPolling() keyword arguments
+		self.ssmPolling = self.lookupSSMPolling()
+
+		# Tag based exemption from Stop, evaluated against the tags returned with the inventory
+		self.exemptionTagKey = self.workloadSpecificationDict.get(Orchestrator.WORKLOAD_EXEMPTION_TAG_KEY)
+		self.exemptionTagValue = self.workloadSpecificationDict.get(Orchestrator.WORKLOAD_EXEMPTION_TAG_VALUE, ActionPlanner.EXEMPTION_TAG_VALUE_DEFAULT)
+		self.exemptionExpiryTagKey = self.workloadSpecificationDict.get(Orchestrator.WORKLOAD_EXEMPTION_EXPIRY_TAG_KEY)
+		if( self.exemptionTagKey ):
+			logger.info('Instances tagged %s=%s are exempt from Stop' % (self.exemptionTagKey, self.exemptionTagValue))
+
+
+	def sizeClientPools(self):
+		'''
+		Tiers are actioned concurrently, up to maxParallelism of them, each with up to maxParallelism workers, all
+		sharing the same clients.  The pools are sized accordingly, within ClientRegistry.MAX_POOL_CONNECTIONS_CAP.
+		'''
+		Utils.clientRegistry.setMaxPoolConnections(self.maxParallelism * self.maxParallelism)
+		logger.debug('Client connection pools sized to %i' % Utils.clientRegistry.maxPoolConnections)
+
+	def initializeActionState(self):
+		'''
+		Obtain what is only needed when the workload is actually going to be actioned (or planned): the assumed
+		role credentials, the workload region clients, and the tier specifications.  A run stopped by the kill
+		switch, or a Start of an already started workload, never gets this far.
+		'''
+		if( self.actionStateInitialized ):
+			return
+		self.actionStateInitialized = True
+
+		# The WorkloadSpecification's MaxParallelism is now known, the clients created from here on are sized by it
+		self.sizeClientPools()
+
+		try:
+			self.dynDBR = Utils.clientRegistry.getResource('dynamodb', self.dynamoDBRegion)
+			self.tierSpecTable = self.dynDBR.Table(self.tierSpecTableName)
+			self.WorkloadStateTable = self.dynDBR.Table(self.workLoadState)
+		except Exception as e:
+			msg = 'Orchestrator::initializeActionState() Exception obtaining botot3 dynamodb resource in region %s -->' % self.dynamoDBRegion
+			logger.error(msg + str(e))
+
 		# If CrossAccountRole OR CrossAccountRoleExternalId exist in DynamoDB then assume roles, otherwise use standard EC2/ELB clients:
 
+		# None selects the default credential chain, otherwise the (accessKeyId, secretAccessKey, sessionToken) of the assumed role
+		self.workloadCredentials = None
 		try:
 			if ("CrossAccountRole" in self.workloadSpecificationDict):
-				sts_client = boto3.client('sts')
+				sts_client = Utils.clientRegistry.getClient('sts')
 				stsRoleArn = self.workloadSpecificationDict[Orchestrator.WORKLOAD_CROSS_ACCOUNT_ROLE]
 
 		# As we are not enforcing ExternalID, check if it's specified and if not assign it some string
@@ -237,63 +385,289 @@ class Orchestrator(object):
 					roleExternalId = self.workloadSpecificationDict[Orchestrator.ASSUME_ROLE_EXTERNAL_ID]
 
 				ec2_assume_role = sts_client.assume_role(RoleArn=stsRoleArn,RoleSessionName="sts_assume_role",ExternalId=roleExternalId)
-				sts_aws_access_key_id = ec2_assume_role['Credentials']['AccessKeyId']
-				sts_aws_secret_access_key = ec2_assume_role['Credentials']['SecretAccessKey']
-				sts_aws_session_token = ec2_assume_role['Credentials']['SessionToken']
-
-				self.ec2R = boto3.resource('ec2', region_name=self.workloadRegion,aws_access_key_id=sts_aws_access_key_id,aws_secret_access_key=sts_aws_secret_access_key,aws_session_token=sts_aws_session_token)
-				self.ec2_client = boto3.client('ec2',region_name=self.workloadRegion,aws_access_key_id=sts_aws_access_key_id,aws_secret_access_key=sts_aws_secret_access_key,aws_session_token=sts_aws_session_token)
-				self.elb = boto3.client('elb', region_name=self.workloadRegion,aws_access_key_id=sts_aws_access_key_id,aws_secret_access_key=sts_aws_secret_access_key,aws_session_token=sts_aws_session_token)
+				self.workloadCredentials = (
+					ec2_assume_role['Credentials']['AccessKeyId'],
+					ec2_assume_role['Credentials']['SecretAccessKey'],
+					ec2_assume_role['Credentials']['SessionToken']
+				)
 
-			else:
-				self.ec2R = boto3.resource('ec2', region_name=self.workloadRegion)
-				self.ec2_client = boto3.client('ec2',region_name=self.workloadRegion)
-				self.elb = boto3.client('elb', region_name=self.workloadRegion)
+			self.ec2R = Utils.clientRegistry.getResource('ec2', self.workloadRegion, self.workloadCredentials)
+			self.ec2_client = Utils.clientRegistry.getClient('ec2', self.workloadRegion, self.workloadCredentials)
+			self.elb = Utils.clientRegistry.getClient('elb', self.workloadRegion, self.workloadCredentials)
+			self.elbv2 = Utils.clientRegistry.getClient('elbv2', self.workloadRegion, self.workloadCredentials)
 
 		except Exception as e:
-				msg = 'Orchestrator::__init__() Exception obtaining client in region %s -->' % self.workloadRegion
+				msg = 'Orchestrator::initializeActionState() Exception obtaining client in region %s -->' % self.workloadRegion
 				logger.error(msg + str(e))	
 
 					
-		# Grab tier specific workload information from DynamoDB
-		self.lookupTierSpecs(self.partitionTargetValue)
+		# Grab tier specific workload information, from DynamoDB unless cached at the current spec version
+		self.loadTierSpecs(self.partitionTargetValue)
+
+	def loadTierSpecs(self, partitionTargetValue):
+		'''
+		Serve the compiled WorkloadPlan from the spec cache when it was cached at the SpecVersion of the workload
+		item just read, otherwise query, validate and compile the tier specifications, and cache the plan at that
+		version.  A workload item without a SpecVersion (e.g. not loaded by the Loader) is never cached.
+		'''
+		specVersion = self.workloadSpecificationDict.get(Orchestrator.WORKLOAD_SPEC_VERSION)
+		cacheKey = '%s-%s' % (self.dynamoDBRegion, partitionTargetValue)
+		if( specVersion ):
+			cachedPlan = Utils.specCache.lookup(cacheKey, specVersion)
+			if( cachedPlan ):
+				try:
+					self.workloadPlan = WorkloadPlan.fromDict(cachedPlan)
+					logger.info('loadTierSpecs() Tier specifications of %s served from the cache at version %s' % (partitionTargetValue, specVersion))
+					return
+				except (KeyError, TypeError, ValueError) as e:
+					logger.info('loadTierSpecs() cached plan of %s could not be read, querying the tiers --> %s' % (partitionTargetValue, str(e)))
+
+		# The Loader writes the tiers just before the workload item, so tiers to be cached at its version are read consistently
+		self.lookupTierSpecs(partitionTargetValue, consistentRead=bool(specVersion))
+		self.workloadPlan = self.compileWorkloadPlan(self.tierSpecDict)
+
+		if( specVersion and self.workloadPlan.tiers ):
+			Utils.specCache.store(cacheKey, specVersion, self.workloadPlan.toDict())
+			logger.info('loadTierSpecs() Tier specifications of %s cached at version %s' % (partitionTargetValue, specVersion))
+
+	def compileWorkloadPlan(self, tierSpecDict):
+		'''
+		Compile the validated tier items into a WorkloadPlan, parsing and defaulting every setting once, and
+		warning once about any which can't be used.
+		'''
+		tiers = {}
+		for tierName, tierAttributes in tierSpecDict.items():
+			scalingProfiles = None
+			if( Orchestrator.TIER_SCALING in tierAttributes ):
+				scalingProfiles = self.compileScalingProfiles(tierName, tierAttributes[Orchestrator.TIER_SCALING])
+
+			tiers[tierName] = TierSpec(
+				tierName,
+				self.compileTierActionSpec(tierName, Orchestrator.TIER_START, tierAttributes.get(Orchestrator.TIER_START)),
+				self.compileTierActionSpec(tierName, Orchestrator.TIER_STOP, tierAttributes.get(Orchestrator.TIER_STOP)),
+				scalingProfiles
+			)
+
+		logger.debug('compileWorkloadPlan() compiled %i tiers' % len(tiers))
+		return( WorkloadPlan(tiers) )
+
+	def compileTierActionSpec(self, tierName, tierAction, tierActionAttributes):
+		if( tierActionAttributes is None ):
+			logger.warning('compileTierActionSpec() Tier %s has no %s, it will be actioned first with the defaults' % (tierName, tierAction))
+			tierActionAttributes = {}
+
+		def toNumber(attributeName, default, convert):
+			try:
+				return( convert(tierActionAttributes.get(attributeName, default)) )
+			except (TypeError, ValueError):
+				logger.warning('%s of %s for Tier %s is not a number, using the default of %s' % (attributeName, tierActionAttributes.get(attributeName), tierName, default))
+				return( default )
+
+		dependsOn = None
+		if( Orchestrator.TIER_DEPENDS_ON in tierActionAttributes ):
+			dependsOn = list(tierActionAttributes[Orchestrator.TIER_DEPENDS_ON])
+
+		try:
+			synchronized = bool(strtobool(str(tierActionAttributes.get(Orchestrator.TIER_SYCHRONIZATION, False))))
+		except ValueError:
+			logger.warning('%s of %s for Tier %s is not True or False, the tier will not be synchronized' % (Orchestrator.TIER_SYCHRONIZATION, tierActionAttributes[Orchestrator.TIER_SYCHRONIZATION], tierName))
+			synchronized = False
+
+		return( TierActionSpec(
+			sequence=toNumber(Orchestrator.TIER_SEQ_NBR, 0, int),
+			dependsOn=dependsOn,
+			synchronized=synchronized,
+			delay=toNumber(Orchestrator.INTER_TIER_ORCHESTRATION_DELAY, float(Orchestrator.INTER_TIER_ORCHESTRATION_DELAY_DEFAULT), float),
+			readinessCondition=self.compileReadinessCondition(tierName, tierAction, tierActionAttributes.get(Orchestrator.TIER_READINESS_CONDITION, '')),
+			readinessPollInterval=toNumber(Orchestrator.TIER_READINESS_POLL_INTERVAL, float(TierWaiter.POLL_INTERVAL_DEFAULT), float),
+			readinessMaxWait=toNumber(Orchestrator.TIER_READINESS_MAX_WAIT, float(TierWaiter.MAX_WAIT_DEFAULT), float),
+			ignoreStop=(tierActionAttributes.get(Orchestrator.TIER_IGNORE_STOP) == 'True'),
+			overrideFilename=tierActionAttributes.get(Orchestrator.TIER_STOP_OVERRIDE_FILENAME, ''),
+			osType=tierActionAttributes.get(Orchestrator.TIER_STOP_OS_TYPE, ''),
+			overrideCacheTTL=max(0, toNumber(Orchestrator.TIER_STOP_OVERRIDE_CACHE_TTL, 0, int))
+		) )
+
+	def compileReadinessCondition(self, tierName, tierAction, readiness):
+		# Returns the TierWaiter condition the tier must reach for the given action, or None when not configured
+		if( readiness == Orchestrator.READINESS_INSTANCE_STATE ):
+			if( tierAction == Orchestrator.TIER_STOP ):
+				return( TierWaiter.CONDITION_STOPPED )
+			return( TierWaiter.CONDITION_RUNNING )
+
+		elif( readiness == Orchestrator.READINESS_STATUS_CHECKS ):
+			# Status checks only apply to running instances
+			if( tierAction == Orchestrator.TIER_STOP ):
+				return( TierWaiter.CONDITION_STOPPED )
+			return( TierWaiter.CONDITION_STATUS_CHECKS_OK )
+
+		elif( readiness == Orchestrator.READINESS_TARGETS_HEALTHY ):
+			# Target health only applies to running instances
+			if( tierAction == Orchestrator.TIER_STOP ):
+				return( TierWaiter.CONDITION_STOPPED )
+			return( TierWaiter.CONDITION_TARGETS_HEALTHY )
+
+		elif( readiness and readiness != 'None' ):
+			logger.warning('%s of %s for Tier %s is not one of %s, %s or %s, no readiness check will be made' % (Orchestrator.TIER_READINESS_CONDITION, readiness, tierName, Orchestrator.READINESS_INSTANCE_STATE, Orchestrator.READINESS_STATUS_CHECKS, Orchestrator.READINESS_TARGETS_HEALTHY))
+
+		return( None )
+
+	def compileScalingProfiles(self, tierName, scalingDict):
+		'''
+		Returns { profileName : ScalingProfileSpec }.  A profile is either an instance type, or a dictionary of an
+		optional InstanceType and an optional FleetSubset, the latter a percentage (e.g. "20%") or a count.
+		'''
+		scalingProfiles = {}
+		for profileName, profile in scalingDict.items():
+			profileSpec = ScalingProfileSpec()
+			if( not isinstance(profile, dict) ):
+				# Backward compatibility with the previous DynamoDB scheme, without the profile map
+				profileSpec.instanceType = profile
+				scalingProfiles[profileName] = profileSpec
+				continue
+
+			profileSpec.instanceType = profile.get('InstanceType')
+
+			if( Orchestrator.FLEET_SUBSET in profile ):
+				fleetNumber = str(profile[Orchestrator.FLEET_SUBSET])
+				try:
+					if re.search("%", fleetNumber):
+						percent = int(fleetNumber.split("%")[0])
+						if (percent <= 0) or (percent > 100):
+							logger.info('FleetSubset specified out of range (less than 0%% or more than 100%%) for profile [%s] and Tier [%s], starting all EC2 instances ' % (str(profileName), tierName ) )
+						else:
+							profileSpec.fleetSubsetPercent = percent
+					else:
+						profileSpec.fleetSubsetCount = int(fleetNumber)
+				except ValueError:
+					logger.warning('FleetSubset of %s for profile [%s] and Tier [%s] is not a number or percentage, starting all EC2 instances' % (fleetNumber, str(profileName), tierName))
+
+			scalingProfiles[profileName] = profileSpec
+
+		return( scalingProfiles )
+
+	def lookupSSMPolling(self):
+		ssmPolling = {
+			'pollInterval' : SSMTierDelegate.POLL_INTERVAL_DEFAULT,
+			'maxPollInterval' : SSMTierDelegate.MAX_POLL_INTERVAL_DEFAULT,
+			'backoffFactor' : SSMTierDelegate.BACKOFF_FACTOR_DEFAULT,
+			'maxWait' : SSMTierDelegate.MAX_WAIT_DEFAULT
+		}
+		attributes = [
+			(Orchestrator.WORKLOAD_SSM_POLL_INTERVAL, 'pollInterval'),
+			(Orchestrator.WORKLOAD_SSM_MAX_POLL_INTERVAL, 'maxPollInterval'),
+			(Orchestrator.WORKLOAD_SSM_POLL_BACKOFF_FACTOR, 'backoffFactor'),
+			(Orchestrator.WORKLOAD_SSM_MAX_WAIT, 'maxWait')
+		]
+		for attributeName, settingName in attributes:
+			if( attributeName in self.workloadSpecificationDict ):
+				try:
+					ssmPolling[settingName] = float(self.workloadSpecificationDict[attributeName])
+				except Exception as e:
+					logger.warning('Couldn\'t convert %s of %s to float. Using default of %s.  Exception was %s' % (attributeName, self.workloadSpecificationDict[attributeName], str(ssmPolling[settingName]), str(e)) )
+
+		logger.debug('lookupSSMPolling() SSM results will be polled with %s' % ssmPolling)
+		return( ssmPolling )
 
 	@retriable(attempts=5, sleeptime=0, jitter=0)
 	def lookupELBs(self):
+		'''
+		Index the Classic ELBs of the workload region by attached instance, as { instanceId : [elbNames] }.
+		Every page of describe_load_balancers is swept once, so the Start path never rescans the ELBs.
+		'''
 		try:
-			self.all_elbs = self.elb.describe_load_balancers()
-			msg = 'Orchestrator::__init() Found attached ELBs-->'
+			elbIndex = {}
+			paginator = self.elb.get_paginator('describe_load_balancers')
+			for page in paginator.paginate():
+				for currELB in page.get('LoadBalancerDescriptions', []):
+					for currInstance in currELB.get('Instances', []):
+						elbIndex.setdefault(currInstance['InstanceId'], []).append(currELB['LoadBalancerName'])
+			self.elbIndex = elbIndex
+			logger.info('Orchestrator::lookupELBs() Found %i instances attached to Classic ELBs' % len(elbIndex))
 		except Exception as e:
 			msg = 'Orchestrator:: Exception obtaining all ELBs in region %s --> %s' % (self.workloadRegion,e)
 			subject_prefix = "Scheduler Exception in %s" % self.workloadRegion
 			logger.error(msg + str(e))
 			raise e
 
-	def lookupWorkloadSpecification(self, partitionTargetValue):
+	@retriable(attempts=5, sleeptime=0, jitter=0)
+	def lookupTargetGroups(self):
+		'''
+		Index the instance targets of the ALB/NLB target groups by instance, as { instanceId : [(targetGroupArn, port)] }.
+		One paginated sweep of describe_target_groups, limited to the workload's VPC when VPC_ID is specified,
+		followed by one describe_target_health per target group.
+		'''
 		try:
-			dynamodbItem=self.dynDBC.get_item(
-				TableName=self.workloadSpecificationTableName,
-				Key={
-					self.workloadSpecificationPartitionKey : { "S" : partitionTargetValue }
-				},
-				ConsistentRead=False,
-				ReturnConsumedCapacity="TOTAL",
-			)
+			targetGroupIndex = {}
+			vpcId = self.workloadSpecificationDict.get(Orchestrator.WORKLOAD_VPC_ID_KEY)
+			paginator = self.elbv2.get_paginator('describe_target_groups')
+			for page in paginator.paginate():
+				for currTargetGroup in page.get('TargetGroups', []):
+					if( currTargetGroup.get('TargetType', 'instance') != 'instance' ):
+						continue
+					if( vpcId and currTargetGroup.get('VpcId') != vpcId ):
+						continue
+
+					targetGroupArn = currTargetGroup['TargetGroupArn']
+					response = self.elbv2.describe_target_health(TargetGroupArn=targetGroupArn)
+					for currDescription in response.get('TargetHealthDescriptions', []):
+						currTarget = currDescription['Target']
+						targetGroupIndex.setdefault(currTarget['Id'], []).append((targetGroupArn, currTarget.get('Port', currTargetGroup.get('Port'))))
+			self.targetGroupIndex = targetGroupIndex
+			logger.info('Orchestrator::lookupTargetGroups() Found %i instances registered with target groups' % len(targetGroupIndex))
+		except Exception as e:
+			msg = 'Orchestrator:: Exception obtaining target groups in region %s --> ' % self.workloadRegion
+			logger.error(msg + str(e))
+			raise e
+
+	@retriable(attempts=5, sleeptime=0, jitter=0)
+	def lookupWorkload(self, partitionTargetValue):
+		'''
+		Read the WorkloadSpecification item and the WorkloadState item of the workload with one consistent
+		BatchGetItem, so the state is never older than the specification it is checked against.
+		'''
+		requestItems = {
+			self.workloadSpecificationTableName : {
+				'Keys' : [ { self.workloadSpecificationPartitionKey : { "S" : partitionTargetValue } } ],
+				'ConsistentRead' : True
+			},
+			self.workLoadState : {
+				'Keys' : [ { 'Workload' : { "S" : partitionTargetValue } } ],
+				'ConsistentRead' : True
+			}
+		}
+
+		responses = {}
+		try:
+			# Keys DynamoDB couldn't process in this call are handed back, and asked for again
+			while( requestItems ):
+				dynamodbItems = self.dynDBC.batch_get_item(RequestItems=requestItems, ReturnConsumedCapacity="TOTAL")
+				for tableName, items in dynamodbItems.get('Responses', {}).items():
+					responses.setdefault(tableName, []).extend(items)
+				requestItems = dynamodbItems.get('UnprocessedKeys', {})
 		except ClientError as e:
-			logger.error('lookupWorkloadSpecification()' + e.response['Error']['Message'])
-		else:
-			# Get the dynamoDB Item from the result
-			resultItem=dynamodbItem['Item']
+			logger.error('lookupWorkload()' + e.response['Error']['Message'])
+			raise e
 
-		
-			for attributeName in resultItem:
-				# Validate the attributes entered into DynamoDB are valid.  If not, spit out individual warning messages
-				if( attributeName in self.workloadSpecificationValidAttributeList ):
-					attributeValue=list(resultItem[attributeName].values())[0]
-					logger.info('Workload Attribute [%s maps to %s]' % (attributeName, attributeValue))
-					self.workloadSpecificationDict[attributeName]=attributeValue
-				else:
-					logger.warning('Invalid dynamoDB attribute specified->'+str(attributeName)+'<- will be ignored')
+		specItems = responses.get(self.workloadSpecificationTableName, [])
+		if( specItems ):
+			self.parseWorkloadSpecification(specItems[0])
+		else:
+			logger.error('lookupWorkload() Workload %s not found in %s' % (partitionTargetValue, self.workloadSpecificationTableName))
+
+		stateItems = responses.get(self.workLoadState, [])
+		if( stateItems ):
+			self.workloadStateItem = dict([(attributeName, list(attributeValue.values())[0]) for attributeName, attributeValue in stateItems[0].items()])
+			logger.info('Workload State %s' % self.workloadStateItem)
+
+	def parseWorkloadSpecification(self, resultItem):
+		for attributeName in resultItem:
+			# Validate the attributes entered into DynamoDB are valid.  If not, spit out individual warning messages
+			if( attributeName in self.workloadSpecificationValidAttributeList ):
+				attributeValue=list(resultItem[attributeName].values())[0]
+				logger.info('Workload Attribute [%s maps to %s]' % (attributeName, attributeValue))
+				self.workloadSpecificationDict[attributeName]=attributeValue
+			else:
+				logger.warning('Invalid dynamoDB attribute specified->'+str(attributeName)+'<- will be ignored')
 
 
 	def recursiveFindKeys(self, sourceDict, resList):
@@ -304,7 +678,7 @@ class Orchestrator(object):
 				if( k != Orchestrator.TIER_SCALING ):
 					self.recursiveFindKeys(v, resList)
 
-	def lookupTierSpecs(self, partitionTargetValue):
+	def lookupTierSpecs(self, partitionTargetValue, consistentRead=False):
 		'''
 		Find all rows in table with partitionTargetValue
 		Build a Dictionary (of Dictionaries).  Dictionary Keys are: TIER_START, TIER_STOP, TierScaleUp, TierScaleDown
@@ -313,7 +687,7 @@ class Orchestrator(object):
 		try:
 			dynamodbItem=self.tierSpecTable.query(
 				KeyConditionExpression=Key(self.tierSpecPartitionKey).eq(partitionTargetValue),
-				ConsistentRead=False,
+				ConsistentRead=consistentRead,
 				ReturnConsumedCapacity="TOTAL",
 			)
 		except ClientError as e:
@@ -346,7 +720,7 @@ class Orchestrator(object):
 					self.tierSpecDict[ currTier[Orchestrator.TIER_NAME] ].update( { Orchestrator.TIER_SCALING : currTier[ Orchestrator.TIER_SCALING ] } )
 
 					if (Orchestrator.FLEET_SUBSET in currTier):
-						self.tierSpecDict[ currtier[Orchestrator.TIER_NAME] ].update( { Orchestrator.FLEET_SUBSET : currTier[ Orchestrator.FLEET_SUBSET ] } )
+						self.tierSpecDict[ currTier[Orchestrator.TIER_NAME] ].update( { Orchestrator.FLEET_SUBSET : currTier[ Orchestrator.FLEET_SUBSET ] } )
 
 				#self.logSpecDict('lookupTierSpecs', currTier, Orchestrator.LOG_LEVEL_DEBUG )
 
@@ -355,38 +729,297 @@ class Orchestrator(object):
 
 	def sequenceTiers(self, tierAction):
 		# Using the Tier Spec Dictionary, construct a simple List to order the sequence of Tier Processing
-		# for the given Action.  Sequence is ascending.
+		# for the given Action.  Sequence is ascending.  Tiers may share a sequence number, in which case
+		# they are ordered by name.
 		#
-		# Prefill list for easy insertion
-		self.sequencedTiersList=list(range( len(self.tierSpecDict)))
-
 		# tierAction indicates whether it is a TIER_STOP, or TIER_START, as they may have different sequences
-		for currKey, currAttributes in self.tierSpecDict.items():
-			logger.debug('sequenceTiers() Action=%s, currKey=%s, currAttributes=%s)' % (tierAction, currKey, currAttributes) )
+		self.sequencedTiersList = sorted(
+			self.workloadPlan.getTierNames(),
+			key=lambda tierName: ( self.getTierActionSpec(tierName, tierAction).sequence, tierName )
+		)
+
+		logger.debug('Sequence List for Action %s is %s' % (tierAction, self.sequencedTiersList))
 			
-			# Grab the Tier Name first
-			tierName = currKey
-			#tierName = currAttributes[Orchestrator.TIER_NAME]
+		return( self.sequencedTiersList )
 
-			tierAttributes={}	# do I need to scope this variable as such?
-			logger.debug('In sequenceTiers(), tierAction is %s' % tierAction)
-			if( tierAction == Orchestrator.TIER_STOP):
-				# Locate the TIER_STOP Dictionary
-				tierAttributes = currAttributes[Orchestrator.TIER_STOP]
+	def buildTierDependencies(self, tierAction):
+		'''
+		Returns a dictionary of { tierName : set of tierNames which must complete first } for the given action.
+		A tier's TierDependsOn list is used when present, otherwise the tier depends on every tier with a lower
+		TierSequence.  As such, tiers sharing a sequence number don't depend on each other.
+		'''
+		tierSequences = {}
+		for tierName in self.workloadPlan.getTierNames():
+			tierSequences[tierName] = self.getTierActionSpec(tierName, tierAction).sequence
+
+		tierDependencies = {}
+		for tierName in self.workloadPlan.getTierNames():
+			tierActionSpec = self.getTierActionSpec(tierName, tierAction)
+			if( tierActionSpec.dependsOn is not None ):
+				dependsOn = set()
+				for dependencyName in tierActionSpec.dependsOn:
+					if( dependencyName in self.workloadPlan.tiers ):
+						dependsOn.add(dependencyName)
+					else:
+						logger.warning('buildTierDependencies() %s of Tier %s names unknown tier %s, which will be ignored' % (Orchestrator.TIER_DEPENDS_ON, tierName, dependencyName))
+			else:
+				dependsOn = set([otherName for otherName, otherSeq in tierSequences.items() if otherSeq < tierSequences[tierName]])
 
-			elif( tierAction == Orchestrator.TIER_START ):
-				tierAttributes = currAttributes[Orchestrator.TIER_START]
+			tierDependencies[tierName] = dependsOn
 
-			#logger.info('In sequenceTiers(): tierAttributes is ', tierAttributes )
+		logger.debug('Tier dependencies for Action %s are %s' % (tierAction, tierDependencies))
+		return( tierDependencies )
 
+	def planOrchestration(self, action):
+		'''
+		Plan-only mode.  Discover the workload and plan every tier exactly as orchestrate() would, but take no
+		action at all (not even the SSM override check).  Returns a JSON serializable dictionary of the per-tier
+		plans, the predicted number of API calls by service and operation, and the estimated duration.
+		EstimatedSeconds assumes each wait is satisfied on its first poll (the SSM override check on its second),
+		MaxSeconds that every wait times out.  Both follow the critical path of the tier dependencies, overlapping
+		the prefetched override checks of a Stop, and exclude the latency of the API calls themselves.
+		'''
+		self.workloadInventory = None
+		self.actionOutcomes = {}
+
+		plan = {
+			'Workload': self.partitionTargetValue,
+			'Action': action,
+			'MaxParallelism': self.maxParallelism,
+			'BatchInstanceActions': self.batchInstanceActions,
+			'KillSwitch': bool(self.isKillSwitch()),
+			'Tiers': [],
+			'ApiCalls': {},
+			'EstimatedSeconds': 0,
+			'MaxSeconds': 0
+		}
+		if( plan['KillSwitch'] ):
+			return( plan )
 
-			# Insert into the List 
-			self.sequencedTiersList[ int( tierAttributes[Orchestrator.TIER_SEQ_NBR ] ) ] = tierName
+		# As in orchestrate(), a Start of a workload already started is skipped.  The plan never registers the workload.
+		plan['WorkloadStarted'] = ( action == Orchestrator.ACTION_START ) and self.isWorkloadStarted(registerWorkload=False)
+		if( plan['WorkloadStarted'] ):
+			return( plan )
 
-		logger.debug('Sequence List for Action %s is %s' % (tierAction, self.sequencedTiersList))
-			
-		return( self.sequencedTiersList )
-	
+		self.initializeActionState()
+
+		if( action == Orchestrator.ACTION_START ):
+			tierAction = Orchestrator.TIER_START
+			try:
+				self.lookupELBs()
+				self.lookupTargetGroups()
+			except Exception as e:
+				logger.warning('planOrchestration() load balancer discovery encountered an exception, re-registration will be under-predicted --> ' + str(e))
+			ActionPlanner.countApiCalls(plan['ApiCalls'], 'elb', 'DescribeLoadBalancers')
+			ActionPlanner.countApiCalls(plan['ApiCalls'], 'elbv2', 'DescribeTargetGroups')
+			ActionPlanner.countApiCalls(plan['ApiCalls'], 'elbv2', 'DescribeTargetHealth', len(set([targetGroupArn for targets in self.targetGroupIndex.values() for targetGroupArn, port in targets])))
+		else:
+			tierAction = Orchestrator.TIER_STOP
+
+		self.sequenceTiers(tierAction)
+		tierPlans = {}
+		for tierName in self.sequencedTiersList:
+			if( tierAction == Orchestrator.TIER_START ):
+				tierPlan = self.planStartTier(tierName)[0]
+				self.estimateStartTier(tierPlan)
+			elif( self.isStopIgnored(tierName) ):
+				tierPlan = TierPlan(tierName, tierAction)
+			else:
+				tierPlan = self.planStopTier(tierName)[0]
+				self.estimateStopTier(tierPlan)
+			tierPlans[tierName] = tierPlan
+
+		# The workload inventory is one paginated DescribeInstances pass
+		inventoryCount = sum([len(instances) for tierInventory in self.workloadInventory.values() for instances in tierInventory.values()]) if self.workloadInventory else 0
+		ActionPlanner.countApiCalls(plan['ApiCalls'], 'ec2', 'DescribeInstances', max(1, (inventoryCount + 999) // 1000))
+
+		# Tiers are actioned as soon as the tiers they depend on complete, so the duration is that of the critical path
+		tierDependencies = self.buildTierDependencies(tierAction)
+		estimatedFinish = {}
+		maxFinish = {}
+		def finishTimes(tierName, visiting):
+			if( tierName not in estimatedFinish ):
+				dependsOn = [dependency for dependency in tierDependencies.get(tierName, set()) if dependency in tierPlans and dependency not in visiting]
+				for dependency in dependsOn:
+					finishTimes(dependency, visiting | set([tierName]))
+				# The prefetched part of the tier runs from the outset, overlapping the tiers it depends on
+				estimatedFinish[tierName] = tierPlans[tierName].estimatedSeconds + max([tierPlans[tierName].prefetchSeconds] + [estimatedFinish[dependency] for dependency in dependsOn])
+				maxFinish[tierName] = tierPlans[tierName].maxSeconds + max([tierPlans[tierName].prefetchMaxSeconds] + [maxFinish[dependency] for dependency in dependsOn])
+
+		for tierName in self.sequencedTiersList:
+			finishTimes(tierName, set())
+			tierPlan = tierPlans[tierName]
+			for service, operations in tierPlan.apiCalls.items():
+				for operation, count in operations.items():
+					ActionPlanner.countApiCalls(plan['ApiCalls'], service, operation, count)
+
+			tierDict = tierPlan.toDict()
+			tierDict['DependsOn'] = sorted(tierDependencies.get(tierName, set()))
+			tierDict['EstimatedFinishSeconds'] = estimatedFinish[tierName]
+			tierDict['MaxFinishSeconds'] = maxFinish[tierName]
+			plan['Tiers'].append(tierDict)
+
+		plan['EstimatedSeconds'] = max([0] + list(estimatedFinish.values()))
+		plan['MaxSeconds'] = max([0] + list(maxFinish.values()))
+		return( plan )
+
+	def estimateReadiness(self, tierPlan, actionedIds, targetGroupCount=0):
+		# Returns (estimated, max) seconds of awaitTierReadiness() for the tier, adding its readiness poll to the plan
+		tierName = tierPlan.tierName
+		tierAction = tierPlan.tierAction
+		if( not actionedIds ):
+			# A tier which issues no actions skips its delay, see awaitTierReadiness()
+			return( 0, 0 )
+
+		delay = self.getInterTierOrchestrationDelay(tierName, tierAction)
+		condition = self.getTierReadinessCondition(tierName, tierAction)
+		if( not condition ):
+			return( delay, delay )
+
+		if( condition == TierWaiter.CONDITION_STATUS_CHECKS_OK ):
+			tierPlan.addApiCalls('ec2', 'DescribeInstanceStatus', (len(actionedIds) + TierWaiter.DESCRIBE_STATUS_BATCH_SIZE - 1) // TierWaiter.DESCRIBE_STATUS_BATCH_SIZE)
+		elif( condition == TierWaiter.CONDITION_TARGETS_HEALTHY ):
+			tierPlan.addApiCalls('elbv2', 'DescribeTargetHealth', targetGroupCount)
+		else:
+			tierPlan.addApiCalls('ec2', 'DescribeInstances', (len(actionedIds) + TierWaiter.DESCRIBE_INSTANCES_BATCH_SIZE - 1) // TierWaiter.DESCRIBE_INSTANCES_BATCH_SIZE)
+
+		maxWait = self.getTierActionSpec(tierName, tierAction).readinessMaxWait
+		return( delay, max(delay, maxWait) )
+
+	def estimateStartTier(self, tierPlan):
+		'''
+		Predict the API calls and duration of carrying out the Start plan of a tier, see planOrchestration()
+		'''
+		estimatedSeconds = 0
+		maxSeconds = 0
+		reregisterIds = tierPlan.getInstanceIds(ActionPlanner.ACTION_ELB_REREGISTER)
+		resizeIds = tierPlan.getInstanceIds(ActionPlanner.ACTION_RESIZE)
+		creditIds = tierPlan.getInstanceIds(ActionPlanner.ACTION_CREDIT_SPECIFICATION)
+		startIds = tierPlan.getInstanceIds(ActionPlanner.ACTION_START)
+
+		elbCount = len(ELBWorker(None, self.elbIndex, self.dryRunFlag, self.sns).groupByLoadBalancer(reregisterIds))
+		targetGroupCount = len(TargetGroupWorker(None, self.targetGroupIndex, self.dryRunFlag, self.sns).groupByTargetGroup(reregisterIds))
+		tierPlan.addApiCalls('elb', 'DeregisterInstancesFromLoadBalancer', elbCount)
+		tierPlan.addApiCalls('elb', 'RegisterInstancesWithLoadBalancer', elbCount)
+		tierPlan.addApiCalls('elbv2', 'DeregisterTargets', targetGroupCount)
+		tierPlan.addApiCalls('elbv2', 'RegisterTargets', targetGroupCount)
+
+		if( resizeIds ):
+			tierPlan.addApiCalls('ec2', 'ModifyInstanceAttribute', 2 * len(resizeIds))  # InstanceType and EbsOptimized
+			tierPlan.addApiCalls('ec2', 'DescribeInstances', (len(resizeIds) + TierWaiter.DESCRIBE_INSTANCES_BATCH_SIZE - 1) // TierWaiter.DESCRIBE_INSTANCES_BATCH_SIZE)
+			maxSeconds += Orchestrator.SCALE_VERIFICATION_MAX_WAIT
+		if( creditIds ):
+			# The current credit options were already read while planning, see planStartTier()
+			tierPlan.addApiCalls('ec2', 'ModifyInstanceCreditSpecification', (len(creditIds) + CreditSpecificationWorker.BATCH_SIZE - 1) // CreditSpecificationWorker.BATCH_SIZE)
+		if( resizeIds or creditIds ):
+			estimatedSeconds += self.scaleInstanceDelay
+			maxSeconds += self.scaleInstanceDelay
+
+		if( self.batchInstanceActions ):
+			tierPlan.addApiCalls('ec2', 'StartInstances', (len(startIds) + BatchWorker.BATCH_SIZE - 1) // BatchWorker.BATCH_SIZE)
+		else:
+			tierPlan.addApiCalls('ec2', 'StartInstances', len(startIds))
+
+		# Targets are only registered once running
+		if( targetGroupCount ):
+			tierPlan.addApiCalls('ec2', 'DescribeInstances')
+			estimatedSeconds += TierWaiter.POLL_INTERVAL_DEFAULT
+			maxSeconds += TierWaiter.MAX_WAIT_DEFAULT
+
+		readinessTargetGroupCount = len(TargetGroupWorker(None, self.targetGroupIndex, self.dryRunFlag, self.sns).groupByTargetGroup(startIds))
+		estimatedReadiness, maxReadiness = self.estimateReadiness(tierPlan, startIds, readinessTargetGroupCount)
+		tierPlan.estimatedSeconds = estimatedSeconds + estimatedReadiness
+		tierPlan.maxSeconds = maxSeconds + maxReadiness
+
+	def estimateStopTier(self, tierPlan):
+		'''
+		Predict the API calls and duration of carrying out the Stop plan of a tier, see planOrchestration()
+		'''
+		estimatedSeconds = 0
+		maxSeconds = 0
+		tierName = tierPlan.tierName
+		stopIds = tierPlan.getInstanceIds(ActionPlanner.ACTION_STOP)
+
+		# The override check takes one SSM command per chunk, all sent together and then polled together until each
+		# invocation completes.  It is prefetched in the background from the outset, see prefetchTierStops().
+		if( stopIds and self.getTierStopOverrideFilename(tierName) and self.getTierOperatingSystemType(tierName) ):
+			ssmChunks = (len(stopIds) + SSMTierDelegate.SEND_COMMAND_MAX_TARGETS - 1) // SSMTierDelegate.SEND_COMMAND_MAX_TARGETS
+			if( self.getTierStopOverrideCacheTTL(tierName) ):
+				tierPlan.addApiCalls('dynamodb', 'BatchGetItem', (len(stopIds) + SSMDecisionCache.BATCH_GET_SIZE - 1) // SSMDecisionCache.BATCH_GET_SIZE)
+			tierPlan.addApiCalls('ssm', 'SendCommand', ssmChunks)
+			tierPlan.addApiCalls('ssm', 'ListCommandInvocations', ssmChunks * Orchestrator.SSM_ESTIMATED_POLLS)
+
+			# The first poll is immediate, each following one waits a backed off interval
+			interval = self.ssmPolling['pollInterval']
+			for pollCount in range(1, Orchestrator.SSM_ESTIMATED_POLLS):
+				tierPlan.prefetchSeconds += interval
+				interval = min(interval * self.ssmPolling['backoffFactor'], self.ssmPolling['maxPollInterval'])
+			tierPlan.prefetchMaxSeconds += self.ssmPolling['maxWait']
+
+		if( self.batchInstanceActions ):
+			tierPlan.addApiCalls('ec2', 'StopInstances', (len(stopIds) + BatchWorker.BATCH_SIZE - 1) // BatchWorker.BATCH_SIZE)
+		else:
+			tierPlan.addApiCalls('ec2', 'StopInstances', len(stopIds))
+
+		if( stopIds and self.isTierSynchronized(tierName, Orchestrator.TIER_STOP) ):
+			tierPlan.addApiCalls('ec2', 'DescribeInstances')
+			estimatedSeconds += TierWaiter.POLL_INTERVAL_DEFAULT
+			maxSeconds += Orchestrator.TIER_SYNCHRONIZATION_MAX_WAIT
+
+		estimatedReadiness, maxReadiness = self.estimateReadiness(tierPlan, stopIds)
+		tierPlan.estimatedSeconds = estimatedSeconds + estimatedReadiness
+		tierPlan.maxSeconds = maxSeconds + maxReadiness
+
+	def orchestrateTiers(self, tierAction, tierFunction):
+		'''
+		Apply tierFunction to every tier, honouring the tier dependencies of the given action.  All tiers whose
+		dependencies have completed are actioned concurrently, so the duration of the action is that of the
+		critical path rather than the sum of all the tiers.  A tier whose action fails is not considered
+		completed, and the tiers depending on it are not actioned.
+		'''
+		tierDependencies = self.buildTierDependencies(tierAction)
+
+		pending = dict(tierDependencies)
+		completed = set()
+		failed = set()
+		running = {}
+
+		poolSize = max(1, min(len(pending), self.maxParallelism))
+		with concurrent.futures.ThreadPoolExecutor(max_workers=poolSize) as executor:
+			while( pending or running ):
+				# Submit every tier whose dependencies have all completed, in sequence order for readable logs
+				readyTiers = [tierName for tierName in self.sequencedTiersList if tierName in pending and pending[tierName].issubset(completed)]
+				for tierName in readyTiers:
+					del pending[tierName]
+					running[executor.submit(tierFunction, tierName)] = tierName
+
+				# Tiers which can never run, because a tier they depend on failed
+				blockedTiers = [tierName for tierName, dependsOn in pending.items() if dependsOn & failed]
+				for tierName in blockedTiers:
+					logger.error('orchestrateTiers() Tier %s will not be actioned as a tier it depends on failed' % tierName)
+					del pending[tierName]
+					failed.add(tierName)
+
+				if( not running ):
+					if( pending ):
+						msg = 'orchestrateTiers() Tier dependencies for %s cannot be satisfied (cycle?) for tiers %s, which will not be actioned' % (tierAction, sorted(pending.keys()))
+						logger.error(msg)
+						self.sns.sendSns('Scheduler tier dependency error', msg)
+					break
+
+				done, notDone = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+				for future in done:
+					tierName = running.pop(future)
+					try:
+						future.result()
+						completed.add(tierName)
+					except Exception as e:
+						failed.add(tierName)
+						msg = 'orchestrateTiers() %s of Tier %s encountered an exception --> %s' % (tierAction, tierName, str(e))
+						logger.error(msg)
+						self.sns.sendSns('Orchestrator::orchestrateTiers() has encountered an exception', msg)
+
+		return( completed )
 
 	def logSpecDict(self, label, dict, level):
 		# for key, value in self.workloadSpecificationDict.iteritems():
@@ -397,137 +1030,166 @@ class Orchestrator(object):
 			else:
 				logger.debug('%s (key==%s, value==%s)' % (label, key, value))
 
-	def isTierSynchronized(self, tierName, tierAction):
-		# Get the Tier Named tierName
-		tierAttributes = self.tierSpecDict[tierName]
-
-		# Get the dictionary for the correct Action
-		tierActionAttributes={}
-		if( tierAction == Orchestrator.TIER_STOP):
-			# Locate the TIER_STOP Dictionary
-			tierActionAttributes = tierAttributes[Orchestrator.TIER_STOP]
-
-		elif( tierAction == Orchestrator.TIER_START ):
-			# Locate the TIER_START Dictionary
-			tierActionAttributes = tierAttributes[Orchestrator.TIER_START]
-			#print tierActionAttributes
-
-		# Return the value in the Dict for TierSynchronization
-		if Orchestrator.TIER_SYCHRONIZATION in tierActionAttributes:
-			res = tierActionAttributes[Orchestrator.TIER_SYCHRONIZATION]
-		else:
-			res = False
+	def getTierActionSpec(self, tierName, tierAction):
+		# The compiled TierStart or TierStop settings of the tier
+		tierSpec = self.workloadPlan.getTier(tierName)
+		if( tierAction == Orchestrator.TIER_STOP ):
+			return( tierSpec.stop )
+		return( tierSpec.start )
 
+	def isTierSynchronized(self, tierName, tierAction):
+		res = self.getTierActionSpec(tierName, tierAction).synchronized
 		logger.debug('isTierSynchronized for tierName==%s, tierAction==%s is syncFlag==%s' % (tierName, tierAction, res) )
 		return( res )
 
 	def getTierStopOverrideFilename(self, tierName):
-
-		# Get the Tier Named tierName
-		tierAttributes = self.tierSpecDict[tierName]
-
-		# Get the dictionary for the correct Action
-		tierActionAttribtes={}
-
-		# Locate the TIER_STOP Dictionary method only applies to TIER_STOP
-		tierActionAttributes = tierAttributes[Orchestrator.TIER_STOP]
-		
-		# Return the value in the Dict for TierStopOverrideFilename
-		if Orchestrator.TIER_STOP_OVERRIDE_FILENAME in tierActionAttributes:
-			res = tierActionAttributes[Orchestrator.TIER_STOP_OVERRIDE_FILENAME]
-		else:
-			res = ''
-
-		return( res )
+		# Only applies to TIER_STOP
+		return( self.workloadPlan.getTier(tierName).stop.overrideFilename )
 
 	def getTierOperatingSystemType(self, tierName):
+		return( self.workloadPlan.getTier(tierName).stop.osType )
 
-		# Get the Tier Named tierName
-		tierAttributes = self.tierSpecDict[tierName]
+	def getTierStopOverrideCacheTTL(self, tierName):
+		# Seconds to cache the tier's override decisions for, 0 when not cached
+		return( self.workloadPlan.getTier(tierName).stop.overrideCacheTTL )
 
-		# Get the dictionary for the correct Action
-		tierActionAttribtes={}
-
-		# Locate the TIER_STOP Dictionary
-		tierActionAttributes = tierAttributes[Orchestrator.TIER_STOP]
-		
-		# Return the value in the Dict for TierStopOverrideOperatingSystem
-		if Orchestrator.TIER_STOP_OS_TYPE in tierActionAttributes:
-			res = tierActionAttributes[Orchestrator.TIER_STOP_OS_TYPE]
-		else:
-			res = ''
-
-		return( res )
+	def makeDecisionCache(self, tierName):
+		ttlSeconds = self.getTierStopOverrideCacheTTL(tierName)
+		if( not ttlSeconds ):
+			return( None )
+		return( SSMDecisionCache(self.dynamoDBRegion, ttlSeconds, logger) )
 
 	def getInterTierOrchestrationDelay(self, tierName, tierAction):
+		return( self.getTierActionSpec(tierName, tierAction).delay )
 
-		# Get the Tier Named tierName
-		tierAttributes = self.tierSpecDict[tierName]
+	def getTierReadinessCondition(self, tierName, tierAction):
+		# Returns the TierWaiter condition the tier must reach for the given action, or None when not configured
+		return( self.getTierActionSpec(tierName, tierAction).readinessCondition )
 
-		# Get the dictionary for the correct Action
-		tierActionAttribtes={}
+	def awaitTierReadiness(self, tierName, tierAction):
+		'''
+		Hold off the next tier until this one is ready.  When the tier has a TierReadinessCondition, poll the
+		instances actioned until they reach it or TierReadinessMaxWait passes, whichever comes first.  The
+		InterTierOrchestrationDelay is honoured as the minimum time before returning, unless the tier issued no
+		Starts or Stops at all, in which case there is nothing to wait for and the tier returns at once.
+		'''
+		waitStartTime = time.time()
+		delay = self.getInterTierOrchestrationDelay(tierName, tierAction)
+		condition = self.getTierReadinessCondition(tierName, tierAction)
+
+		actionedIds = [instanceId for instanceId, outcome in self.actionOutcomes.get(tierName, {}).items() if outcome in (Worker.ACTION_RESULT_STARTED, Worker.ACTION_RESULT_STOPPED)]
+		self.tierActionCounts[tierName] = len(actionedIds)
+
+		if( not actionedIds ):
+			logger.info('Tier %s issued no actions for %s, skipping its %.0f second delay and readiness wait' % (tierName, tierAction, delay))
+			self.skippedTierDelays[tierName] = delay
+			return
+
+		if( condition ):
+			tierActionSpec = self.getTierActionSpec(tierName, tierAction)
+			tierWaiter = TierWaiter(
+				self.ec2_client,
+				pollInterval=tierActionSpec.readinessPollInterval,
+				maxWait=tierActionSpec.readinessMaxWait,
+				elbv2_client=self.elbv2,
+				targetGroupIndex=self.targetGroupIndex
+			)
+			logger.info('Tier %s: awaiting %s of %i instances before actioning the next tier' % (tierName, condition, len(actionedIds)))
+			stragglers = tierWaiter.wait(actionedIds, condition)
+			if( stragglers ):
+				msg = 'Tier %s: instances %s did not reach %s after %s, orchestration will continue' % (tierName, str(stragglers), condition, tierAction)
+				logger.warning(msg)
+				self.sns.sendSns('Scheduler Tier readiness not reached', msg)
 
-		# Locate the TIER_STOP Dictionary
-		tierActionAttributes = tierAttributes[tierAction]
-		
-		# Return the value in the Dict for TierStopOverrideOperatingSystem
-		if Orchestrator.INTER_TIER_ORCHESTRATION_DELAY in tierActionAttributes:
-			res = tierActionAttributes[Orchestrator.INTER_TIER_ORCHESTRATION_DELAY]
-		else:
-			res = Orchestrator.INTER_TIER_ORCHESTRATION_DELAY_DEFAULT
+		remainingDelay = delay - (time.time() - waitStartTime)
+		if( remainingDelay > 0 ):
+			time.sleep(remainingDelay)
 
-		return( float(res) )
-	
 	@retriable(attempts=5,sleeptime=0, jitter=0)
-	def lookupInstancesByFilter(self, targetInstanceStateKey, tierName):
-	    # Use the filter() method of the instances collection to retrieve
-	    # all running EC2 instances.
-		logger.debug('lookupInstancesByFilter() seeking instances in tier %s' % tierName)
-		logger.debug('lookupInstancesByFilter() instance state %s' % targetInstanceStateKey)
-		logger.debug('lookupInstancesByFilter() tier tag key %s' % self.workloadSpecificationDict[Orchestrator.TIER_FILTER_TAG_KEY])
-		logger.debug('lookupInstancesByFilter() tier tag value %s' % tierName)
-		logger.debug('lookupInstancesByFilter() Env tag key %s' % self.workloadSpecificationDict[Orchestrator.WORKLOAD_ENVIRONMENT_FILTER_TAG_KEY])
-		logger.debug('lookupInstancesByFilter() Env tag value %s' % self.workloadSpecificationDict[Orchestrator.WORKLOAD_ENVIRONMENT_FILTER_TAG_VALUE])
-
+	def lookupWorkloadInventory(self):
+		'''
+		Take one snapshot of every instance belonging to the workload, in a single paginated DescribeInstances pass
+		across all the instance states of interest.  The result is indexed locally by Tier tag value and then by
+		instance state, so each tier can be served from memory instead of issuing its own filtered lookups.
+		'''
+		logger.debug('lookupWorkloadInventory() Env tag key %s' % self.workloadSpecificationDict[Orchestrator.WORKLOAD_ENVIRONMENT_FILTER_TAG_KEY])
+		logger.debug('lookupWorkloadInventory() Env tag value %s' % self.workloadSpecificationDict[Orchestrator.WORKLOAD_ENVIRONMENT_FILTER_TAG_VALUE])
+		logger.debug('lookupWorkloadInventory() tier tag key %s' % self.workloadSpecificationDict[Orchestrator.TIER_FILTER_TAG_KEY])
 
 		targetFilter = [
 			{
-		        'Name': 'instance-state-name', 
-		        'Values': [targetInstanceStateKey]
-		    },
-		    {
-		        'Name': 'tag:' + self.workloadSpecificationDict[Orchestrator.WORKLOAD_ENVIRONMENT_FILTER_TAG_KEY],
-		        'Values': [self.workloadSpecificationDict[Orchestrator.WORKLOAD_ENVIRONMENT_FILTER_TAG_VALUE]]
-		    },
-		    {
-		        'Name': 'tag:' + self.workloadSpecificationDict[Orchestrator.TIER_FILTER_TAG_KEY],
-		        'Values': [tierName]
-		    }
+				'Name': 'instance-state-name',
+				'Values': Orchestrator.INVENTORY_INSTANCE_STATES
+			},
+			{
+				'Name': 'tag:' + self.workloadSpecificationDict[Orchestrator.WORKLOAD_ENVIRONMENT_FILTER_TAG_KEY],
+				'Values': [self.workloadSpecificationDict[Orchestrator.WORKLOAD_ENVIRONMENT_FILTER_TAG_VALUE]]
+			}
 		]
 
 		# If the Optional VPC ID was provided to further tighten the filter, include it.
 		if( Orchestrator.WORKLOAD_VPC_ID_KEY in self.workloadSpecificationDict ):
-			vpc_filter_dict_element = { 
-				'Name': 'vpc-id', 
-		        'Values': [self.workloadSpecificationDict[Orchestrator.WORKLOAD_VPC_ID_KEY]]
+			vpc_filter_dict_element = {
+				'Name': 'vpc-id',
+				'Values': [self.workloadSpecificationDict[Orchestrator.WORKLOAD_VPC_ID_KEY]]
 			}
 			targetFilter.append(vpc_filter_dict_element)
 			logger.debug('VPC_ID provided, Filter List is %s' % str(targetFilter))
 
-		# Filter the instances
+		tierTagKey = self.workloadSpecificationDict[Orchestrator.TIER_FILTER_TAG_KEY]
+
+		# Index is { tierName : { instanceStateName : [instances] } }
 		# NOTE: Only instances within the specified region are returned
-		targetInstanceColl = {}
+		inventory = {}
+		instanceCount = 0
 		try:
-			targetInstanceColl = sorted(self.ec2R.instances.filter(Filters=targetFilter),key=id)
-			logger.info('lookupInstancesByFilter(): # of instances found for tier %s in state %s is %i' % (tierName, targetInstanceStateKey, len(list(targetInstanceColl))))
-			if(logger.level==Orchestrator.LOG_LEVEL_DEBUG):
-				for curr in targetInstanceColl:
-					logger.debug('lookupInstancesByFilter(): Found the following matching targets %s' % curr)
+			# The collection transparently follows NextToken, so this is one paginated pass over the workload
+			for currInstance in self.ec2R.instances.filter(Filters=targetFilter):
+				tierName = None
+				for currTag in (currInstance.tags or []):
+					if( currTag['Key'] == tierTagKey ):
+						tierName = currTag['Value']
+						break
+
+				if( tierName is None ):
+					logger.debug('lookupWorkloadInventory(): instance %s has no %s tag and is not a member of any tier' % (currInstance.id, tierTagKey))
+					continue
+
+				instanceStateName = currInstance.state['Name']
+				inventory.setdefault(tierName, {}).setdefault(instanceStateName, []).append(currInstance)
+				instanceCount += 1
+
 		except Exception as e:
-			msg = 'Orchestrator::lookupInstancesByFilter() Exception encountered during instance filtering %s -->' % e
+			msg = 'Orchestrator::lookupWorkloadInventory() Exception encountered during instance filtering %s -->' % e
 			logger.error(msg + str(e))
 			raise e
 
+		# Keep a deterministic order within each partition
+		for tierStates in inventory.values():
+			for instancesList in tierStates.values():
+				instancesList.sort(key=lambda inst: inst.id)
+
+		logger.info('lookupWorkloadInventory(): # of workload instances found is %i across %i tiers' % (instanceCount, len(inventory)))
+
+		self.workloadInventory = inventory
+		return( self.workloadInventory )
+
+	def lookupInstancesByFilter(self, targetInstanceStateKey, tierName):
+		# Serve the tier's instances in the requested state from the workload inventory snapshot,
+		# taking the snapshot first if this run hasn't done so yet.
+		logger.debug('lookupInstancesByFilter() seeking instances in tier %s' % tierName)
+		logger.debug('lookupInstancesByFilter() instance state %s' % targetInstanceStateKey)
+
+		# Independent tiers may be processed concurrently, only one of them takes the snapshot
+		with self.workloadInventoryLock:
+			if( self.workloadInventory is None ):
+				self.lookupWorkloadInventory()
+
+		targetInstanceColl = list(self.workloadInventory.get(tierName, {}).get(targetInstanceStateKey, []))
+		logger.info('lookupInstancesByFilter(): # of instances found for tier %s in state %s is %i' % (tierName, targetInstanceStateKey, len(targetInstanceColl)))
+		if( logger.isEnabledFor(logging.DEBUG) ):
+			for curr in targetInstanceColl:
+				logger.debug('lookupInstancesByFilter(): Found the following matching targets %s' % curr)
 
 		return targetInstanceColl
 
@@ -549,35 +1211,46 @@ class Orchestrator(object):
 	def orchestrate(self, action ):
 		'''
 		Given an Action, 
-		1) Iterate through the Tiers based on the sequence and
+		1) Iterate through the Tiers based on the sequence (and dependencies), actioning independent tiers concurrently and
 		2) Apply the directive to each tier, applying the inter-tier delay factor 
 		3) Log
 		'''
 
 
+		# Each orchestration works from a fresh inventory snapshot
+		self.workloadInventory = None
+
+		# { tierName : { instanceId : outcome } } for the actioned tiers
+		self.actionOutcomes = {}
+
+		# { tierName : number of Starts/Stops issued }, and { tierName : seconds of delay skipped } for tiers which issued none
+		self.tierActionCounts = {}
+		self.skippedTierDelays = {}
+
 		killSwitch = self.isKillSwitch()
 
 		if( killSwitch ):
 			bodyMsg = '%s: Kill Switch Enabled.   All scheduling actions on the workload will be bypassed.' % self.workloadSpecificationDict[Orchestrator.WORKLOAD_ENVIRONMENT_FILTER_TAG_VALUE]
 			snsTopicSubjectLine = "Scheduler Kill Switch enabled"
-			self.snsInit.sendSns(snsTopicSubjectLine, bodyMsg)
+			self.sns.sendSns(snsTopicSubjectLine, bodyMsg)
 
 		else:
 
 			if( action == Orchestrator.ACTION_STOP ):
 
+				self.initializeActionState()
+
 				# Sequence the tiers per the STOP order
 				self.sequenceTiers(Orchestrator.TIER_STOP)
 
-				for currTier in self.sequencedTiersList:
-					if Orchestrator.TIER_IGNORE_STOP in self.tierSpecDict[currTier][Orchestrator.TIER_STOP]:
-						logger.debug("IgnoreStopValue for {} tier is {}".format(currTier, self.tierSpecDict[currTier][Orchestrator.TIER_STOP][Orchestrator.TIER_IGNORE_STOP]))
-						if 	self.tierSpecDict[currTier][Orchestrator.TIER_STOP][Orchestrator.TIER_IGNORE_STOP] =='True':
-							logger.info('Orchestrate() IgnoreStop set to True for Tier {} so no stop action was performed'.format(currTier))
-							continue # if condition above is met continue to next tier, do not execute stop on current tier.
-					logger.info('Orchestrate() Stopping Tier: ' + currTier)
-					# Stop the next tier in the sequence
-					self.stopATier(currTier)
+				# Plan and override check every tier in the background, while earlier tiers are being stopped
+				self.prefetchTierStops()
+
+				# Stop every tier once the tiers it depends on are stopped
+				try:
+					self.orchestrateTiers(Orchestrator.TIER_STOP, self.stopATierUnlessIgnored)
+				finally:
+					self.tierPrefetchExecutor.shutdown(wait=True)
 	
 				# Update DDB WorkloadState only if DryRun is False:
 				if (self.dryRunFlag == False):
@@ -585,31 +1258,27 @@ class Orchestrator(object):
 
 			elif( action == Orchestrator.ACTION_START ):
 
-				doStartFlag = True
-				if (self.overrideState):
-					logger.info('Orchestrate() Override -o flag detected, not checking WorkloadState DynamoDB table')
-				else:
-					# Check State TableCheck if Env is already started
-					envStatus = orchMain.readWorkloadStateTable()
-
-					# If started, no reason to try to start it again
-					if (envStatus == Orchestrator.ACTION_START):
-						logger.info(
-							'Orchestrate() Workload marked as Started in DynamoDB, not performing Start action. Please use -o flag to override this if required. Workload: ' + self.partitionTargetValue)
-						doStartFlag = False
+				# If started, no reason to try to start it again
+				doStartFlag = not self.isWorkloadStarted()
 
 				if(doStartFlag):
+					self.initializeActionState()
+
 					# Start the workload
 					try:
-						orchMain.lookupELBs()
+						self.lookupELBs()
 					except Exception as e:
 						self.sns.sendSns("orchMain.lookupELBs() has encountered an exception ", str(e)) # See action function  https://github.com/mozilla-releng/redo
+					try:
+						self.lookupTargetGroups()
+					except Exception as e:
+						self.sns.sendSns("Orchestrator::lookupTargetGroups() has encountered an exception ", str(e))
 					# Sequence the tiers per the START order
 					self.sequenceTiers(Orchestrator.TIER_START)
-					for currTier in self.sequencedTiersList:
-						logger.info('Orchestrate() Starting Tier: ' + currTier)
-						# Start the next tier in the sequence
-						self.startATier(currTier)
+
+					# Start every tier once the tiers it depends on are started
+					self.orchestrateTiers(Orchestrator.TIER_START, self.startATier)
+
 					# Update DDB WorkloadState only if DryRun is False
 					if (self.dryRunFlag == False):
 						self.updateWorkloadStateTable(action)
@@ -627,9 +1296,24 @@ class Orchestrator(object):
 
 		logger.info('++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++')
 		logger.info('++ Completed processing ['+ action +'][' + self.partitionTargetValue + ']<- in ' + str(self.finishTime - self.startTime) + ' seconds')
+		logger.info('++ Actions issued per tier %s' % str(self.tierActionCounts))
+		if( self.skippedTierDelays ):
+			logger.info('++ %i tiers issued no actions, skipping %.0f seconds of inter-tier delay' % (len(self.skippedTierDelays), sum(self.skippedTierDelays.values())))
 		logger.info('++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++')
 	
 
+	def stopATierUnlessIgnored(self, tierName):
+		if self.isStopIgnored(tierName):
+			logger.info('Orchestrate() IgnoreStop set to True for Tier {} so no stop action was performed'.format(tierName))
+			return # if condition above is met, do not execute stop on this tier.  Tiers depending on it may proceed.
+		logger.info('Orchestrate() Stopping Tier: ' + tierName)
+		self.stopATier(tierName)
+
+	def isStopIgnored(self, tierName):
+		res = self.workloadPlan.getTier(tierName).stop.ignoreStop
+		logger.debug("IgnoreStopValue for {} tier is {}".format(tierName, res))
+		return( res )
+
 	def stopATier(self, tierName):
 		'''
 		Given a Tier,
@@ -641,45 +1325,169 @@ class Orchestrator(object):
 		4) Log 
 		'''
 		
-		# Find the running instances of this tier to stop
-		running=self.instanceStateMap[16]
-		try:
-			instancesToStopList = self.lookupInstancesByFilter(running,tierName)
-		except Exception as e:
-			self.sns.sendSns("Orchestrator::lookupInstancesByFilter() has encountered an exception", str(e))
-
-		
+		# Only the actions which change something are carried out, a tier already stopped needs neither SSM nor workers.
+		# The plan and override decisions are usually ready, having been prefetched while earlier tiers were stopped.
+		tierPlan, instancesToStopList, overrideDecisions, decisionCache = self.collectTierStop(tierName)
 
 		# Determine if operations on the Tier should be synchronized or not
 		tierSynchronized=self.isTierSynchronized(tierName, Orchestrator.TIER_STOP)
 
-		# Grab the EC2 region (not DynamodDB region) for the worker to make API calls
-		#region=self.workloadSpecificationDict[self.WORKLOAD_SPEC_REGION_KEY]
+		# The SSM S3 bucket is optional, it is only a fallback for output too large to be returned by SSM itself
+		ssmS3Bucket = self.workloadSpecificationDict.get(Orchestrator.WORKLOAD_SSM_S3_BUCKET_NAME, "")
+		ssmS3KeyPrefixName = self.workloadSpecificationDict.get(Orchestrator.WORKLOAD_SSM_S3_KEY_PREFIX_NAME, "")
 
+		overrideFilename = self.getTierStopOverrideFilename(tierName)
+		osType = self.getTierOperatingSystemType(tierName)
 
+		# The decision cache was already looked up for every instance of the tier, see prepareStopTier()
+		cacheChecked = bool(decisionCache and overrideFilename and osType)
+
+		# Each StopWorker applies its override decision and stops in the tier's worker pool
+		stopTasks = {}
 		for currInstance in instancesToStopList:
-			stopWorker = StopWorker(self.dynamoDBRegion, self.workloadRegion, currInstance, self.dryRunFlag,self.ec2_client, self.sns)
-			stopWorker.setWaitFlag(tierSynchronized)
-			
-			if all (k in self.workloadSpecificationDict for k in (Orchestrator.WORKLOAD_SSM_S3_BUCKET_NAME,Orchestrator.WORKLOAD_SSM_S3_KEY_PREFIX_NAME)):
-				ssmS3Bucket = self.workloadSpecificationDict[Orchestrator.WORKLOAD_SSM_S3_BUCKET_NAME],
-				ssmS3KeyPrefixName = self.workloadSpecificationDict[Orchestrator.WORKLOAD_SSM_S3_KEY_PREFIX_NAME],
-			else:
-				ssmS3Bucket = ""
-				ssmS3KeyPrefixName = ""
+			stopWorker = StopWorker(self.dynamoDBRegion, self.workloadRegion, currInstance, self.dryRunFlag,self.ec2_client, self.sns, self.workloadCredentials)
+			stopWorker.setOverrideDecision(overrideDecisions.get(currInstance.id), cacheChecked)
+			stopWorker.setDecisionCache(decisionCache)
+			stopWorker.setSSMPolling(self.ssmPolling)
 
-			stopWorker.execute(
+			stopTasks[currInstance.id] = functools.partial(
+				stopWorker.execute,
 				ssmS3Bucket,
 				ssmS3KeyPrefixName,
-				self.getTierStopOverrideFilename(tierName),
-				self.getTierOperatingSystemType(tierName)
+				overrideFilename,
+				osType,
+				self.batchInstanceActions
+			)
+
+		# Blocks until every instance in the tier has been actioned.  Exempt instances are bypassed without any API call.
+		tierExecutor = TierExecutor(self.maxParallelism)
+		executorOutcomes = tierExecutor.run(stopTasks)
+		for instanceId in tierPlan.exemptIds:
+			executorOutcomes[instanceId] = (True, Worker.ACTION_RESULT_BYPASSED)
+		tierOutcomes = self.recordTierOutcomes(tierName, Orchestrator.ACTION_STOP, executorOutcomes)
+
+		if( self.batchInstanceActions ):
+			self.batchActionTier(tierName, Orchestrator.ACTION_STOP, tierOutcomes)
+
+		# All of the tier's stops have been issued.  If the tier is synchronized, wait for every one of them
+		# to complete using one shared poll of exactly these instances.
+		stoppedIds = [instanceId for instanceId, outcome in self.actionOutcomes.get(tierName, {}).items() if outcome == Worker.ACTION_RESULT_STOPPED]
+		if( stoppedIds and tierSynchronized ):
+			logger.info('Tier %s: Waiting for Stop of %i instances to complete...' % (tierName, len(stoppedIds)))
+			tierWaiter = TierWaiter(
+				self.ec2_client,
+				maxWait=Orchestrator.TIER_SYNCHRONIZATION_MAX_WAIT,
+				maxPollInterval=Orchestrator.TIER_SYNCHRONIZATION_MAX_POLL_INTERVAL
 			)
+			stragglers = tierWaiter.wait(stoppedIds, TierWaiter.CONDITION_STOPPED)
+			if( stragglers ):
+				msg = 'Tier %s is synchronized but instances %s did not stop within %i seconds' % (tierName, str(stragglers), Orchestrator.TIER_SYNCHRONIZATION_MAX_WAIT)
+				logger.warning(msg)
+				self.sns.sendSns(Worker.SNS_SUBJECT_PREFIX_WARNING + ' Synchronized Tier Stop incomplete', msg)
 
-		# Configured delay to be introduced prior to allowing the next tier to be Actioned.
+		# Configured readiness gate and delay to be introduced prior to allowing the next tier to be Actioned.
 		# It may make sense to allow some amount of time for the instances to Stop, prior to Orchestration continuing.
-		time.sleep(self.getInterTierOrchestrationDelay(tierName, Orchestrator.TIER_STOP))
+		self.awaitTierReadiness(tierName, Orchestrator.TIER_STOP)
+
+	def prefetchTierStops(self):
+		'''
+		Submit the discovery and override checks of every tier to a background pool, in sequence order, so the
+		SSM latency of later tiers overlaps the stops and readiness waits of earlier ones.  Nothing is stopped
+		here, the stops themselves are still issued by orchestrateTiers() in dependency order.
+		'''
+		self.tierStopPrefetches = {}
+		self.tierPrefetchExecutor = concurrent.futures.ThreadPoolExecutor(max_workers=max(1, self.maxParallelism))
+		for tierName in self.sequencedTiersList:
+			if( not self.isStopIgnored(tierName) ):
+				self.tierStopPrefetches[tierName] = self.tierPrefetchExecutor.submit(self.prepareStopTier, tierName)
+		logger.info('prefetchTierStops() prefetching the Stop plans of %i tiers' % len(self.tierStopPrefetches))
+
+	def collectTierStop(self, tierName):
+		# Returns the prefetched result of prepareStopTier(), or prepares the tier now when it wasn't prefetched
+		prefetch = getattr(self, 'tierStopPrefetches', {}).pop(tierName, None)
+		if( prefetch is not None ):
+			try:
+				return( prefetch.result() )
+			except Exception as e:
+				logger.warning('collectTierStop() prefetch of Tier %s encountered an exception, preparing it again --> %s' % (tierName, str(e)))
+
+		return( self.prepareStopTier(tierName) )
+
+	def prepareStopTier(self, tierName):
+		'''
+		Returns the tier's Stop plan, the instances it plans to stop, their override decisions and the decision
+		cache.  Instances missing from the override decisions are probed individually by their StopWorker.
+		'''
+		tierPlan, instancesToStopList = self.planStopTier(tierName)
+
+		ssmS3Bucket = self.workloadSpecificationDict.get(Orchestrator.WORKLOAD_SSM_S3_BUCKET_NAME, "")
+		ssmS3KeyPrefixName = self.workloadSpecificationDict.get(Orchestrator.WORKLOAD_SSM_S3_KEY_PREFIX_NAME, "")
+		overrideFilename = self.getTierStopOverrideFilename(tierName)
+		osType = self.getTierOperatingSystemType(tierName)
+
+		# Check for the override file on all of the tier's instances at once, rather than instance by instance
+		overrideDecisions = {}
+		decisionCache = self.makeDecisionCache(tierName)
+		if( overrideFilename and osType and instancesToStopList ):
+			overrideDecisions = self.probeTierOverrides(tierName, [currInstance.id for currInstance in instancesToStopList], ssmS3Bucket, ssmS3KeyPrefixName, overrideFilename, osType, decisionCache)
+
+		return( tierPlan, instancesToStopList, overrideDecisions, decisionCache )
+
+	def makeActionPlanner(self):
+		return( ActionPlanner(self.elbIndex, self.targetGroupIndex, self.exemptionTagKey, self.exemptionTagValue, self.exemptionExpiryTagKey) )
+
+	def planStopTier(self, tierName):
+		'''
+		Returns the TierPlan for the Stop of the tier, and the list of instances it plans to stop
+		'''
+		# Find the running instances of this tier to stop
+		running=self.instanceStateMap[16]
+		runningInstancesList = []
+		try:
+			runningInstancesList = self.lookupInstancesByFilter(running,tierName)
+		except Exception as e:
+			self.sns.sendSns("Orchestrator::lookupInstancesByFilter() has encountered an exception", str(e))
+
+		actionPlanner = self.makeActionPlanner()
+		tierPlan = actionPlanner.planStop(tierName, Orchestrator.TIER_STOP, runningInstancesList)
+		stopIds = tierPlan.getInstanceIds(ActionPlanner.ACTION_STOP)
+		instancesToStopList = [currInstance for currInstance in runningInstancesList if currInstance.id in stopIds]
+
+		return( tierPlan, instancesToStopList )
+
+	def probeTierOverrides(self, tierName, instanceIds, ssmS3Bucket, ssmS3KeyPrefixName, overrideFilename, osType, decisionCache=None):
+		'''
+		Returns { instanceId : SSMDelegate decision } for the instances of the tier, using one SSM command per
+		chunk of instances.  Instances missing from the result are probed individually by their StopWorker.
+		With a decisionCache, only the instances without an unexpired cached decision are probed.
+		'''
+		overrideDecisions = {}
+		if( decisionCache ):
+			overrideDecisions = decisionCache.lookupDecisions(instanceIds, overrideFilename)
+			instanceIds = [instanceId for instanceId in instanceIds if instanceId not in overrideDecisions]
+			if( not instanceIds ):
+				logger.info('Tier %s: every override decision for %s was cached, no SSM command needed' % (tierName, overrideFilename))
+				return( overrideDecisions )
+
+		logger.info('Tier %s: checking for override file %s on %i instances' % (tierName, overrideFilename, len(instanceIds)))
+		probedDecisions = {}
+		try:
+			ssmTierDelegate = SSMTierDelegate(instanceIds, ssmS3Bucket, ssmS3KeyPrefixName, overrideFilename, osType, self.dynamoDBRegion, logger, self.workloadRegion, self.workloadCredentials)
+			ssmTierDelegate.setPolling(**self.ssmPolling)
+			probedDecisions = ssmTierDelegate.retrieveOverrideDecisions()
+		except Exception as e:
+			logger.warning('Orchestrator::probeTierOverrides() Tier %s encountered an exception, instances will be checked individually --> %s' % (tierName, str(e)))
+
+		if( decisionCache and probedDecisions ):
+			decisionCache.storeDecisions(probedDecisions, overrideFilename)
+
+		overrideDecisions.update(probedDecisions)
+		logger.debug('probeTierOverrides() Tier %s decisions %s' % (tierName, overrideDecisions))
+		return( overrideDecisions )
 
 	def startATier(self, tierName):
+		logger.info('Orchestrate() Starting Tier: ' + tierName)
+
 		'''
 		Given a Tier,
 		0) We may want to create a separate "client" per instance within the tier, if we process in parallel
@@ -690,9 +1498,26 @@ class Orchestrator(object):
 		4) Log 
 		'''
 
+		# Only the actions which change something are carried out
+		tierPlan, totalInstancesList, instanceTypeToLaunch = self.planStartTier(tierName)
+		if( not tierPlan.isNoOp() ):
+			self.startInstances(tierName, tierPlan, totalInstancesList, instanceTypeToLaunch)
+
+		# Readiness gate and delay to be introduced prior to allowing the next tier to be actioned.
+		# It may make sense to allow some amount of time for the instances to Start, prior to Orchestration continuing.
+		self.awaitTierReadiness(tierName, Orchestrator.TIER_START)
+		logger.debug('startATier() completed for tier %s' % tierName)
+
+	def planStartTier(self, tierName):
+		'''
+		Returns the TierPlan for the Start of the tier, the tier's stopped and running instances, and the
+		instance type of the scaling profile (None when not scaling)
+		'''
 		stopped=self.instanceStateMap[80]
 
 		# Find the stopped instances of this tier to start
+		stoppedInstancesList = []
+		runningInstancesList = []
 		try:
 			stoppedInstancesList = self.lookupInstancesByFilter(stopped,tierName)
 		except Exception as e:
@@ -716,44 +1541,204 @@ class Orchestrator(object):
 		# Grab the region the worker should make API calls against
 		#region=self.workloadSpecificationDict[self.WORKLOAD_SPEC_REGION_KEY]
 
-		logger.debug('In startATier() for %s', tierName)
+		logger.debug('In planStartTier() for %s', tierName)
 
 
 		# numberOfInstances is the output of isFleetSubset method
 
 		targetInstanceCount = self.calculateInstanceNumber(tierName, totalInstancesList)
-		self.startInstances(targetInstanceCount, runningInstancesList, stoppedInstancesList, tierName)
-	
 
-	def startInstances(self, targetInstanceCount, runningInstancesList, stoppedInstancesList, tierName):
-		self.targetInstanceCount = targetInstanceCount
-		self.runningInstancesList = runningInstancesList
-		self.stoppedInstancesList = stoppedInstancesList
-		self.allInstances = runningInstancesList + stoppedInstancesList
-		self.tierName = tierName
+		# If instanceTypeToLaunch is present, it means Profile is specified
+		instanceTypeToLaunch = self.isScalingAction(tierName)
+
+		# The current CPU credit options of the stopped instances are read up front, so only those which differ are planned.
+		# Only burstable instances have one, the others are planned to have it set once resized.
+		currentCredits = None
+		creditChunks = 0
+		if( instanceTypeToLaunch and ActionPlanner.getDesiredCpuCredits(instanceTypeToLaunch) and stoppedInstancesList ):
+			currentCredits = {}
+			burstableIds = [currInstance.id for currInstance in stoppedInstancesList if ActionPlanner.isBurstable(currInstance.instance_type)]
+			creditChunks = (len(burstableIds) + CreditSpecificationWorker.BATCH_SIZE - 1) // CreditSpecificationWorker.BATCH_SIZE
+			try:
+				currentCredits = CreditSpecificationWorker(self.ec2_client, self.dryRunFlag, self.sns).lookupCreditSpecifications(burstableIds)
+			except ClientError as e:
+				# Every stopped instance is then planned to have its credit option set, which is harmless
+				if( e.response.get('Error', {}).get('Code') in CreditSpecificationWorker.UNSUPPORTED_ERROR_CODES ):
+					logger.info('planStartTier() Tier %s instances have no credit option to describe --> %s' % (tierName, str(e)))
+				else:
+					logger.warning('planStartTier() describe_instance_credit_specifications encountered an exception of -->' + str(e))
+					self.sns.sendSns("Orchestrator::planStartTier() describe_instance_credit_specifications has encountered an exception",str(e))
+			except Exception as e:
+				logger.warning('planStartTier() describe_instance_credit_specifications encountered an exception of -->' + str(e))
+				self.sns.sendSns("Orchestrator::planStartTier() describe_instance_credit_specifications has encountered an exception",str(e))
+
+		actionPlanner = self.makeActionPlanner()
+		tierPlan = actionPlanner.planStart(tierName, Orchestrator.TIER_START, runningInstancesList, stoppedInstancesList, targetInstanceCount, instanceTypeToLaunch, currentCredits)
+		tierPlan.addApiCalls('ec2', 'DescribeInstanceCreditSpecifications', creditChunks)
+		return( tierPlan, totalInstancesList, instanceTypeToLaunch )
+
+	def startInstances(self, tierName, tierPlan, instances, instanceTypeToLaunch):
+		# Tiers may be processed on different threads, so this method keeps its state local
+		instancesById = dict([(currInstance.id, currInstance) for currInstance in instances])
+
+		# Re-register the instances to be started with their ELBs, one deregister and one register per ELB.
+		# ALB/NLB targets are deregistered now, and registered once started.
+		reregisterIds = tierPlan.getInstanceIds(ActionPlanner.ACTION_ELB_REREGISTER)
+		elbWorker = ELBWorker(self.elb, self.elbIndex, self.dryRunFlag, self.sns)
+		elbWorker.reregisterInstances(reregisterIds)
+		targetGroupWorker = TargetGroupWorker(self.elbv2, self.targetGroupIndex, self.dryRunFlag, self.sns)
+		targetGroupWorker.deregisterInstances(reregisterIds)
+
+		# Scaling phase: the tier is resized before any instance is started
+		resizeIds = tierPlan.getInstanceIds(ActionPlanner.ACTION_RESIZE)
+		creditIds = tierPlan.getInstanceIds(ActionPlanner.ACTION_CREDIT_SPECIFICATION)
+		if( resizeIds or creditIds ):
+			self.scaleATier(tierName, [instancesById[instanceId] for instanceId in resizeIds], creditIds, instanceTypeToLaunch)
+			logger.info('Changed all EC2 instance types to %s in Tier %s' % (instanceTypeToLaunch,tierName))
+
+		# Each instance's start is an independent task, so a slow start on one instance doesn't hold up the rest of the tier.
+		startTasks = {}
+		for instanceId in tierPlan.getInstanceIds(ActionPlanner.ACTION_START):
+			startWorker = StartWorker(self.dynamoDBRegion, self.workloadRegion, instancesById[instanceId], self.scaleInstanceDelay, self.dryRunFlag,self.ec2_client, self.sns)
+			startTasks[instanceId] = functools.partial(
+				startWorker.execute,
+				None,
+				True,
+				self.batchInstanceActions
+			)
 
-		self.alreadyRunning = len(runningInstancesList)
-		self.toStart = int(self.targetInstanceCount) - len(self.runningInstancesList)
-		self.startList = self.stoppedInstancesList[:self.toStart]
+		# Blocks until every instance in the tier has been actioned
+		tierExecutor = TierExecutor(self.maxParallelism)
+		tierOutcomes = self.recordTierOutcomes(tierName, Orchestrator.ACTION_START, tierExecutor.run(startTasks))
 
-		# Start and change required instances 
-		# If instanceTypeToLaunch is present, it means Profile is specified
-		
-		instanceTypeToLaunch = self.isScalingAction(self.tierName)
-		for currInstance in self.allInstances:
-			startWorker = StartWorker(self.dynamoDBRegion, self.workloadRegion, currInstance, self.all_elbs, self.elb,self.scaleInstanceDelay, self.dryRunFlag,self.ec2_client, self.sns)
-			if (instanceTypeToLaunch):
-				startWorker.scaleInstance(instanceTypeToLaunch)
-				logger.info('Changed all EC2 instance types to %s in Tier %s' % (instanceTypeToLaunch,self.tierName))
-			if currInstance in self.startList:
-				logger.debug('Starting instance %s', currInstance)
-				startWorker.start()
-
-		# Delay to be introduced prior to allowing the next tier to be actioned.
-		# It may make sense to allow some amount of time for the instances to Stop, prior to Orchestration continuing.
+		if( self.batchInstanceActions ):
+			self.batchActionTier(tierName, Orchestrator.ACTION_START, tierOutcomes)
+
+		# Target groups only accept running instances, so wait for the started targets to be running first
+		startedIds = [instanceId for instanceId, outcome in tierOutcomes.items() if outcome == Worker.ACTION_RESULT_STARTED]
+		targetedIds = sorted([instanceId for instanceId in startedIds if instanceId in self.targetGroupIndex])
+		if( targetedIds ):
+			TierWaiter(self.ec2_client).wait(targetedIds, TierWaiter.CONDITION_RUNNING)
+			targetGroupWorker.registerInstances(targetedIds)
+
+	def scaleATier(self, tierName, instances, creditIds, instanceType):
+		'''
+		Resize the given stopped instances of the tier concurrently, verify the new instance type of all of them
+		together and reconcile the CPU credit option of creditIds, then sleep ScaleInstanceDelay once for the
+		change to propagate, rather than once per instance.  The resize of the tier is therefore bounded by its
+		slowest instance.  Returns the list of instance ids resized.
+		'''
+		scaleTasks = {}
+		for currInstance in instances:
+			startWorker = StartWorker(self.dynamoDBRegion, self.workloadRegion, currInstance, self.scaleInstanceDelay, self.dryRunFlag,self.ec2_client, self.sns)
+			scaleTasks[currInstance.id] = functools.partial(startWorker.scaleInstance, instanceType)
+
+		# Blocks until every instance has been resized
+		tierExecutor = TierExecutor(self.maxParallelism)
+		scaledIds = sorted([instanceId for instanceId, (succeeded, scaled) in tierExecutor.run(scaleTasks).items() if succeeded and scaled])
+
+		if( scaledIds ):
+			self.verifyTierInstanceType(tierName, scaledIds, instanceType)
+
+		# The plan only holds the instances whose credit option differs, so they are changed without another describe
+		modifiedCreditIds = []
+		cpuCredits = ActionPlanner.getDesiredCpuCredits(instanceType)
+		if( creditIds and cpuCredits ):
+			creditSpecificationWorker = CreditSpecificationWorker(self.ec2_client, self.dryRunFlag, self.sns)
+			modifiedCreditIds = creditSpecificationWorker.modify(creditIds, cpuCredits)
+
+		if( scaledIds or modifiedCreditIds ):
+			logger.info('Tier %s: %i instances resized to %s, waiting %s seconds for the change to propagate' % (tierName, len(scaledIds), instanceType, str(self.scaleInstanceDelay)))
+			time.sleep(self.scaleInstanceDelay)
+
+		return( scaledIds )
+
+	def verifyTierInstanceType(self, tierName, instanceIds, instanceType):
+		'''
+		Poll the instance type of all the resized instances with one DescribeInstances per poll, until each has
+		converged on the profile's instance type.  Returns the instance ids which never converged, which are reported.
+		'''
+		expectedInstanceType = ActionPlanner.getTargetInstanceType(instanceType)
+
+		tierWaiter = TierWaiter(
+			self.ec2_client,
+			pollInterval=Orchestrator.SCALE_VERIFICATION_POLL_INTERVAL,
+			maxWait=Orchestrator.SCALE_VERIFICATION_MAX_WAIT,
+			maxPollInterval=Orchestrator.SCALE_VERIFICATION_MAX_POLL_INTERVAL
+		)
+		unconvergedIds = tierWaiter.waitForInstanceType(instanceIds, expectedInstanceType)
+		if( unconvergedIds ):
+			msg = 'Tier %s: instance type of instances %s did not converge on %s' % (tierName, str(unconvergedIds), expectedInstanceType)
+			logger.warning(msg)
+			self.sns.sendSns('Orchestrator::verifyTierInstanceType() instance type not converged', msg)
+
+		return( unconvergedIds )
+
+	def recordTierOutcomes(self, tierName, action, executorOutcomes):
+		'''
+		Record the per-instance outcomes of actioning a tier, as returned by TierExecutor.run(), and log a summary.
+		Instances whose task raised an exception are recorded as Failed.
+		'''
+		tierOutcomes = {}
+		for instanceId, (succeeded, result) in executorOutcomes.items():
+			if( succeeded ):
+				tierOutcomes[instanceId] = result
+			else:
+				tierOutcomes[instanceId] = Worker.ACTION_RESULT_FAILED
+
+		self.actionOutcomes[tierName] = tierOutcomes
+
+		outcomeCounts = {}
+		for outcome in tierOutcomes.values():
+			outcomeCounts[outcome] = outcomeCounts.get(outcome, 0) + 1
+		logger.info('%s of Tier %s completed for %i instances, outcomes %s' % (action, tierName, len(tierOutcomes), outcomeCounts))
+
+		return( tierOutcomes )
+
+	def batchActionTier(self, tierName, action, tierOutcomes):
+		'''
+		Issue the Start or Stop for every instance of the tier the workers cleared for action, using chunked
+		multi-instance requests.  The recorded outcomes of the tier are updated in place.
+		Returns the list of instance ids successfully actioned.
+		'''
+		clearedIds = sorted([instanceId for instanceId, outcome in tierOutcomes.items() if outcome == Worker.ACTION_RESULT_CLEARED])
+		if( not clearedIds ):
+			logger.info('No instances in Tier %s were cleared for %s' % (tierName, action))
+			return( [] )
+
+		batchWorker = BatchWorker(self.ec2_client, self.dryRunFlag, self.sns)
+		if( action == Orchestrator.ACTION_STOP ):
+			batchOutcomes = batchWorker.stopInstances(clearedIds)
+		else:
+			batchOutcomes = batchWorker.startInstances(clearedIds)
+
+		tierOutcomes.update(batchOutcomes)
+		self.actionOutcomes[tierName] = tierOutcomes
+
+		return( [instanceId for instanceId, outcome in batchOutcomes.items() if outcome in (Worker.ACTION_RESULT_STARTED, Worker.ACTION_RESULT_STOPPED)] )
 
-		time.sleep(self.getInterTierOrchestrationDelay(self.tierName, Orchestrator.TIER_START))
-		logger.debug('startATier() completed for tier %s' % self.tierName)
+	def countFailedOutcomes(self):
+		# Number of instances across all actioned tiers whose action failed
+		failedCount = 0
+		for tierOutcomes in self.actionOutcomes.values():
+			for outcome in tierOutcomes.values():
+				if( outcome == Worker.ACTION_RESULT_FAILED ):
+					failedCount += 1
+
+		return( failedCount )
+
+	def getScalingProfileSpec(self, tierName):
+		# The compiled ScalingProfileSpec of the tier for the requested scaling profile, or None
+		scalingProfiles = self.workloadPlan.getTier(tierName).scalingProfiles
+		if( scalingProfiles is None ):
+			logger.warning('Scaling Profile of [%s] specified but no TierScaling dictionary found in DynamoDB for tier [%s].  No scaling action taken' % (str(self.scalingProfile), tierName) )
+			return( None )
+
+		if( self.scalingProfile not in scalingProfiles ):
+			logger.warning('Scaling Profile of [%s] not in tier [%s] ' % (str(self.scalingProfile), tierName ) )
+			return( None )
+
+		return( scalingProfiles[self.scalingProfile] )
 
 	def calculateInstanceNumber(self, tierName, totalInstancesList):
 
@@ -761,30 +1746,9 @@ class Orchestrator(object):
 		numberOfInstances = len(totalInstancesList)
 		if(self.scalingProfile):
 			logger.debug('scalingProfile requested - FleetSubset calculator')
-			
-			# Unpack the ScalingDictionary
-			tierAttributes = self.tierSpecDict[tierName]
-			if( Orchestrator.TIER_SCALING in tierAttributes):
-
-				scalingDict = tierAttributes[ Orchestrator.TIER_SCALING ]
-				logger.debug('FleetSubset for Tier %s %s ' % (tierName, str(scalingDict) ))
-
-				if ( self.scalingProfile in scalingDict ):
-					if Orchestrator.FLEET_SUBSET in scalingDict[self.scalingProfile]:
-						fleetNumber = scalingDict[self.scalingProfile]['FleetSubset']
-						if re.search("%", fleetNumber):
-							splitNumberOfInstances = fleetNumber.split("%")[0]
-							if (int(splitNumberOfInstances) <= 0) or (int(splitNumberOfInstances) > 100):
-								logger.info('FleetSubset specified out of range (less than 0i%% or more than 100%%) for profile [%s] and Tier [%s], starting all EC2 instances ' % (str(self.scalingProfile), tierName ) )
-							else:
-				                                numberOfInstances = int(round(int(splitNumberOfInstances) * len(list(totalInstancesList)) / 100.0))
-						else:
-							numberOfInstances = fleetNumber
-						
-				else:
-					logger.warning('FleetSubset of [%s] not in tier [%s], will start all EC2 instances within a Tier ' % (str(self.scalingProfile), tierName ) )
-			else:
-				logger.warning('FleetSubset Profile of [%s] specified but no FleetSubset dictionary found in DynamoDB for tier [%s]. Starting all EC2 instancew within a Tier' % (str(self.scalingProfile), tierName) )
+			profileSpec = self.getScalingProfileSpec(tierName)
+			if( profileSpec ):
+				numberOfInstances = profileSpec.countInstances(len(totalInstancesList))
 
 		return numberOfInstances
 	
@@ -793,36 +1757,13 @@ class Orchestrator(object):
 		# First, is the ScalingProfile flag even set ?
 		if(self.scalingProfile):
 			logger.debug('ScalingProfile requested')
-
-			# Unpack the ScalingDictionary
-			tierAttributes = self.tierSpecDict[tierName]
-			if( Orchestrator.TIER_SCALING in tierAttributes):
-
-				scalingDict = tierAttributes[ Orchestrator.TIER_SCALING ]
-				logger.debug('ScalingProfile for Tier %s is %s ' % (tierName, str(scalingDict) ))
-
-				# Ok, so next, does this tier have a Scaling Profile?
-				if( self.scalingProfile in scalingDict ):
-					# Ok, so then what is the EC2 InstanceType to launch with, for the given ScalingProfile specified ?
-					try:
-						instanceType = scalingDict[self.scalingProfile]['InstanceType']
-						return instanceType
-					except:
-					# This is to introduce backward compatibility with previous DynamoDB scheme, without profile map, and also to allow that InstanceType is not specified at all
-						try:
-							instanceType = scalingDict[self.scalingProfile]
-							if type(instanceType) == dict:
-								logger.warning('ScalingProfile InstanceType could not be found, starting all the instances within Tier %s' % tierName)
-							else:	
-								logger.info('instanceType: %s' % instanceType)
-								return instanceType
-						except:
-							logger.warning('Scaling Profile of [%s] not in tier [%s] ' % (str(self.scalingProfile), tierName ) )
-			
-				else:
-					logger.warning('Scaling Profile of [%s] not in tier [%s] ' % (str(self.scalingProfile), tierName ) )
-			else:
-				logger.warning('Scaling Profile of [%s] specified but no TierScaling dictionary found in DynamoDB for tier [%s].  No scaling action taken' % (str(self.scalingProfile), tierName) )
+			profileSpec = self.getScalingProfileSpec(tierName)
+			if( profileSpec ):
+				# Ok, so then what is the EC2 InstanceType to launch with, for the given ScalingProfile specified ?
+				if( profileSpec.instanceType ):
+					logger.info('instanceType: %s' % profileSpec.instanceType)
+					return( profileSpec.instanceType )
+				logger.warning('ScalingProfile InstanceType could not be found, starting all the instances within Tier %s' % tierName)
 
 		return( None )
 
@@ -853,15 +1794,41 @@ class Orchestrator(object):
 		self.sns	= SnsNotifier(sns_topic_name,sns_workload)
 
 	@retriable(attempts=5, sleeptime=0, jitter=0)
+	def isWorkloadStarted(self, registerWorkload=True):
+		'''
+		True when the WorkloadState table records the workload as Started, unless the -o flag overrides the state.
+		With registerWorkload, a workload seen for the first time is registered, see readWorkloadStateTable().
+		'''
+		if (self.overrideState):
+			logger.info('Orchestrate() Override -o flag detected, not checking WorkloadState DynamoDB table')
+			return( False )
+
+		# Check State TableCheck if Env is already started
+		if( registerWorkload ):
+			envStatus = self.readWorkloadStateTable()
+		else:
+			envStatus = (self.workloadStateItem or {}).get('LastActionType', '')
+
+		if (envStatus == Orchestrator.ACTION_START):
+			logger.info(
+				'Orchestrate() Workload marked as Started in DynamoDB, not performing Start action. Please use -o flag to override this if required. Workload: ' + self.partitionTargetValue)
+			return( True )
+		return( False )
+
 	def readWorkloadStateTable(self):
+		# The state was read along with the WorkloadSpecification, see lookupWorkload()
+		if( self.workloadStateItem is not None ):
+			return( self.workloadStateItem.get('LastActionType', '') )
+
+		# First time this workload is seen, register it.  ConditionExpression will make that item is put into DDB only if attribute Workload doesn't exist
 		self.currentTime = str(datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-	# ConditionExpression will make that item is put into DDB only if attribute Workload doesn't exist
 		try:
-				response = self.WorkloadStateTable.put_item(
+				response = self.dynDBC.put_item(
+				TableName=self.workLoadState,
 				Item={
-				'Workload': self.partitionTargetValue,
-				'LastActionTime': str(self.currentTime),
-				'LastActionType': 'Unmanaged',
+				'Workload': { "S" : self.partitionTargetValue },
+				'LastActionTime': { "S" : str(self.currentTime) },
+				'LastActionType': { "S" : 'Unmanaged' },
 				},
 				ConditionExpression = "attribute_not_exists(Workload)")   
 				logger.info("Updated WorkloadState DynamoDB")
@@ -871,34 +1838,31 @@ class Orchestrator(object):
 				logger.error(msg + str(e))
 				raise e
 
-		try:
-			dynamodbWorkloadState = self.WorkloadStateTable.query(
-				KeyConditionExpression=Key('Workload').eq(self.partitionTargetValue),
-				ConsistentRead=False,
-				ReturnConsumedCapacity="TOTAL",
-			)
-		except ClientError as e:
-			logger.error('Exception encountered in readWorkloadStateTable() for query -->' + str(e))
-					
-		return dynamodbWorkloadState['Items'][0]['LastActionType']
+		return( 'Unmanaged' )
 
 	def updateWorkloadStateTable(self,action):
 
 		self.currentTime = str(datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
 
+		failedCount = self.countFailedOutcomes()
+		if( failedCount ):
+			logger.warning('%s of workload %s completed with %i failed instances' % (action, self.partitionTargetValue, failedCount))
+
 		if (action == Orchestrator.ACTION_START) and (self.scalingProfile is not None):
-			UpdateExpressionAttr='SET Profile= :profile, LastActionTime= :currentTime, LastActionType= :actionType'
+			UpdateExpressionAttr='SET Profile= :profile, LastActionTime= :currentTime, LastActionType= :actionType, LastActionFailures= :failures'
 			ExpressionAttributeValuesAttr={
 					':profile': self.scalingProfile,
 					':currentTime': self.currentTime,
-					':actionType': action
+					':actionType': action,
+					':failures': failedCount
     					}
 
 		else:
-			UpdateExpressionAttr='SET LastActionTime= :currentTime, LastActionType= :actionType'
+			UpdateExpressionAttr='SET LastActionTime= :currentTime, LastActionType= :actionType, LastActionFailures= :failures'
 			ExpressionAttributeValuesAttr={
 					':currentTime': self.currentTime,
 					':actionType': action,
+					':failures': failedCount
     					}
 	
 		try:
@@ -925,6 +1889,9 @@ if __name__ == "__main__":
 	parser.add_argument('-p','--scalingProfile', help='Resize instances based on Scaling Profile name', required=False)
 	parser.add_argument('-l','--loglevel', choices=['critical', 'error', 'warning', 'info', 'debug', 'notset'], help='The level to record log messages to the logfile', required=False)
 	parser.add_argument('-o','--overrideState', action='count',help='Override WorkloadState table', required=False)
+	parser.add_argument('-c','--maxParallelism', type=int, help='Maximum number of instances within a tier to action concurrently. Overrides the WorkloadSpecification', required=False)
+	parser.add_argument('-s','--specCacheDir', help='Directory caching the tier specifications between runs, until the Loader changes them. Defaults to %s, none disables it' % Utils.SpecCache.CACHE_DIR_DEFAULT, required=False)
+	parser.add_argument('-n','--planOnly', metavar='PLANFILE', help='Take no Action, write the action plan, predicted API calls and estimated duration as JSON to PLANFILE (- for stdout)', required=False)
 
 # This is happening because in Python3 it can't compare NoneType and Int, so I've changed it to check if it's NoneType	
 	args = parser.parse_args()
@@ -962,7 +1929,10 @@ if __name__ == "__main__":
 	if MetaDataError:
 		logger.error(MetaDataError)
 	auditlogger.info({'UserName': getpass.getuser(), 'Profile': args.scalingProfile or '', 'Workload': args.workloadIdentifier,'Action': args.action, 'Hostname': NameTag,'AccessKey': Creds,'EnvironmentName': LogStreamName,}) #Logs this Dict to Audit stream in CW
-	orchMain = Orchestrator(args.workloadIdentifier, args.dynamoDBRegion, args.scalingProfile, overrideState, dryRun)
+	if( args.specCacheDir is not None ):
+		Utils.specCache.setCacheDir(None if args.specCacheDir.lower() == 'none' else args.specCacheDir)
+
+	orchMain = Orchestrator(args.workloadIdentifier, args.dynamoDBRegion, args.scalingProfile, overrideState, dryRun, args.maxParallelism)
 	# If testcases set, run them, otherwise run the supplied Action only
 	if( args.testcases is not None ):	
 		orchMain.runTestCases()
@@ -974,7 +1944,16 @@ if __name__ == "__main__":
 		else:
 			action = Orchestrator.ACTION_START
 
-		logger.info('\n### Orchestrating %s' % action +' Action ###')
 		orchMain.initializeState()
 		orchMain.snsInit()
-		orchMain.orchestrate(action)
+		if( args.planOnly is not None ):
+			logger.info('\n### Planning %s' % action +' Action ###')
+			planJson = json.dumps(orchMain.planOrchestration(action), indent=2, sort_keys=True)
+			if( args.planOnly == '-' ):
+				print(planJson)
+			else:
+				with open(args.planOnly, 'w') as planFile:
+					planFile.write(planJson + '\n')
+		else:
+			logger.info('\n### Orchestrating %s' % action +' Action ###')
+			orchMain.orchestrate(action)
@@ -1,9 +1,10 @@
 #!/usr/bin/env python3
-import boto3
 import logging
 import json
 import time
 import string
+import Utils
+from botocore.exceptions import ClientError
 from distutils.util import strtobool
 
 __author__ = "Gary Silverman"
@@ -39,6 +40,7 @@ class SSMDelegate(object):
 	DECISION_RETRIES_EXCEEDED='RetriesExceeded'
 	DECISION_S3_RESULTFILE_NOT_LOCATED='s3 file not located'
 	DECISION_NO_ACTION_UNEXPECTED_RESULT='unexpectedResult'
+	DECISION_SEND_FAILED='SendFailed'
 
 	SCRIPT_STOP_INSTANCE='Stop'
 	SCRIPT_NO_ACTION='Bypass'  # Bypass means skip stopping this instance
@@ -52,8 +54,22 @@ class SSMDelegate(object):
 
 	SSM_COMMAND_ID = 'CommandId'
 
+	# Once a command (invocation) reaches one of these, it won't change
+	SSM_TERMINAL_STATUSES = ['Success', 'TimedOut', 'Cancelled', 'Failed', 'Undeliverable', 'Terminated']
 
-	def __init__(self, instanceId, bucketName, keyPrefixName, fileURI, osType, ddbRegion, logger, workloadRegion='us-west-2'):
+	# SSM truncates the output returned with a command invocation and appends this marker.  Anything that long
+	# can only be read in full from the S3 output bucket, when one is configured.
+	SSM_OUTPUT_TRUNCATED_MARKER = '--output truncated--'
+
+	# Polling for the result of the SSM Command.  The check for the override file usually completes within a
+	# second or two, so polling starts quickly and backs off from there, up to a maximum interval.
+	POLL_INTERVAL_DEFAULT = 1
+	MAX_POLL_INTERVAL_DEFAULT = 10
+	BACKOFF_FACTOR_DEFAULT = 2.0
+	MAX_WAIT_DEFAULT = 180
+
+
+	def __init__(self, instanceId, bucketName, keyPrefixName, fileURI, osType, ddbRegion, logger, workloadRegion='us-west-2', credentials=None):
 
 		self.instanceId=instanceId
 
@@ -64,7 +80,8 @@ class SSMDelegate(object):
 		self.logger = logger
 
 		try:
-			self.ssm = boto3.client('ssm', region_name=self.workloadRegion)
+			# SSM targets the workload's instances, so uses the workload's (possibly assumed role) credentials
+			self.ssm = Utils.clientRegistry.getClient('ssm', self.workloadRegion, credentials)
 		except Exception as e:
 			msg = 'SSMDelegate::__init__() Exception obtaining botot3 ssm resource in region %s -->' % workloadRegion
 			self.logger.error(msg + str(e))
@@ -73,11 +90,8 @@ class SSMDelegate(object):
 
 		self.connectionTimeout=180
 
-		# The duration to sleep while awaiting results from the SSM Command executing
-		self.retrieveSSMResultSleepDuration=10
-
-		# Max wait is 5 minutes (10 seconds * 18 = 180 seconds or 3 minutes)
-		self.getResultRetryCount = 18
+		# How the results of the SSM Command are polled for, see setPolling()
+		self.setPolling()
 
 		self.S3BucketName=bucketName
 
@@ -96,12 +110,45 @@ class SSMDelegate(object):
 		self.S3BucketInWorkloadRegion = SSMDelegate.S3_BUCKET_LOCATION_NOT_YET_DETERMINED
 
 		try:
-			self.s3 = boto3.client('s3', region_name=self.workloadRegion)
+			# The command output bucket is read with the same credentials the command was sent with
+			self.s3 = Utils.clientRegistry.getClient('s3', self.workloadRegion, credentials)
 		except Exception as e:
 			msg = 'SSMDelegate::__init__() Exception obtaining botot3 s3 resource in region %s -->' % workloadRegion
 			self.logger.error(msg + str(e))
 
-	def sendSSMCommand(self):
+	def setPolling(self, pollInterval=POLL_INTERVAL_DEFAULT, maxPollInterval=MAX_POLL_INTERVAL_DEFAULT, backoffFactor=BACKOFF_FACTOR_DEFAULT, maxWait=MAX_WAIT_DEFAULT):
+		# The first poll waits pollInterval, each following one backoffFactor longer, up to maxPollInterval
+		self.pollInterval = float(pollInterval)
+		self.maxPollInterval = max(float(maxPollInterval), self.pollInterval)
+		self.backoffFactor = max(float(backoffFactor), 1.0)
+		self.maxWait = float(maxWait)
+
+	def pollUntilComplete(self, pollFunction, description):
+		'''
+		Calls pollFunction() until it returns True, sleeping between calls with exponential backoff.  Returns
+		False when maxWait passed without pollFunction() reporting completion.
+		'''
+		startTime = time.time()
+		interval = self.pollInterval
+		pollCount = 0
+		while( True ):
+			pollCount += 1
+			if( pollFunction() ):
+				self.logger.debug('SSMDelegate::pollUntilComplete() %s complete in %.1f seconds after %i polls' % (description, time.time() - startTime, pollCount))
+				return( True )
+
+			elapsed = time.time() - startTime
+			if( elapsed >= self.maxWait ):
+				return( False )
+
+			self.logger.info('SSMDelegate::pollUntilComplete() Awaiting Completed Status of %s after %.1f seconds. Sleep and retry #%i' % (description, elapsed, pollCount))
+			time.sleep(min(interval, self.maxWait - elapsed))
+			interval = min(interval * self.backoffFactor, self.maxPollInterval)
+
+	def sendSSMCommand(self, instanceIds=None):
+		# Defaults to the delegate's own instance.  A list of up to 50 instances may be targeted instead.
+		if( instanceIds is None ):
+			instanceIds = [self.instanceId]
 
 		#Capture osType so we can lookup SSM results in S3 correctly
 		if( self.osType == SSMDelegate.OS_TYPE_WINDOWS ):
@@ -113,35 +160,40 @@ class SSMDelegate(object):
 			testOverrideFileCommand='if [ -e ' + self.fileURI + ' ]; then echo \"'+ self.SCRIPT_NO_ACTION +'\"; else echo \"'+ self.SCRIPT_STOP_INSTANCE +'\"; fi'
 			defaultDir='/tmp'
 
+		sendCommandKwargs = {
+			'InstanceIds' : instanceIds,
+			'Parameters' : {
+				'commands': [
+					testOverrideFileCommand,
+				],
+				'workingDirectory' : [
+					defaultDir,
+				],
+			},
+			'DocumentName' : self.ssmDocumentName,
+			'TimeoutSeconds' : self.connectionTimeout,
+			'Comment' : 'Send command to test if override file exists on instance'
+		}
+
+		# The result is read from the command invocation itself.  The S3 bucket is optional, and only
+		# used as a fallback for output too large to be returned with the invocation.
+		if( self.S3BucketName ):
+			sendCommandKwargs['OutputS3BucketName'] = self.S3BucketName
+			if( self.S3KeyPrefixName ):
+				sendCommandKwargs['OutputS3KeyPrefix'] = self.S3KeyPrefixName
+
 		try:
 			# the 'commands' is the name of the property within the AWS-RunShellScript
 			# the TimeoutSeconds is the time to reach the instance, not execution time to run
 			#   the commands within the instance once reached.
 			# For more details: Open the AWS-RunShellScript document within the management
 			#   console, where you can inspect the actual document under the 'Content' tab.
-			response = self.ssm.send_command(
-				InstanceIds=[
-					self.instanceId,
-				],
-				Parameters={
-					'commands': [
-						testOverrideFileCommand,
-					],
-					'workingDirectory' : [
-						defaultDir,
-					],
-				},
-				DocumentName=self.ssmDocumentName,
-				TimeoutSeconds=self.connectionTimeout,
-				OutputS3BucketName=self.S3BucketName,
-				OutputS3KeyPrefix=self.S3KeyPrefixName,
-				Comment='Send command to test if override file exists on instance'
-			)
-			# Results are in:
+			response = self.ssm.send_command(**sendCommandKwargs)
+			# When a bucket is configured, results are also in:
 			#   bucket->keyPrefix+region->commandId-->instanceId-->awsrunshellscript-->0.aws.runshellscript-->stdout
 
 			# Output
-			for key, value in response.iteritems():
+			for key, value in response.items():
 				self.logger.debug('ssm send_command response (key==%s, value==%s)' % (key, value))
 
 			self.logger.debug('SSMDelegate send_command() results :')
@@ -161,62 +213,52 @@ and instance is running with Instance Profile (see documentation).  Exception wa
 
 
 	###
-	# Retrieve the result by looking within the S3 bucket
+	# Retrieve the result from the command invocation, falling back to the S3 bucket for large output
 	###
 	def retrieveSSMResults(self, ssmResponse):
 
-		result = SSMDelegate.DECISION_NO_ACTION  # By default, we will not shut down the instance
+		result = SSMDelegate.DECISION_NO_ACTION_UNEXPECTED_RESULT  # Either way, we will not shut down the instance
 
 		self.commandId = self.getAttributeFromSSMSendCommand(ssmResponse, SSMDelegate.SSM_COMMAND_ID)
 
 		# Do we have a commandId from the sendCommand response?
 		if self.commandId:
 
-			try:
+			invocation = {}
 
-				# Let's try to get the response, and wait if it isn't ready
-				done=False
-				counter=0
-				while( (not done) and (counter < self.getResultRetryCount ) ):
-					response = self.ssm.list_commands(
+			def pollInvocation():
+				try:
+					response = self.ssm.get_command_invocation(
 						CommandId=self.commandId,
 						InstanceId=self.instanceId
 					)
+				except ClientError as e:
+					# The invocation may not be registered yet right after the send
+					if( e.response.get('Error', {}).get('Code') != 'InvocationDoesNotExist' ):
+						raise e
+					return( False )
 
-					#
-					self.logger.debug('SSMDelegate list_commands() results :')
-					for key, value in response.iteritems():
-						self.logger.debug('(key==%s, value==%s)' % (key, value))
-
-					# pull out the status
-					res = self.getStatusFromSSMListCommands(response, self.commandId)
-
-					# check to see if status is done
-					#    done mean status in 'Success'|'TimedOut'|'Cancelled'|'Failed'
-					if( res in ['Success', 'TimedOut', 'Cancelled', 'Failed'] ):
-						done=True
+				self.logger.debug('SSMDelegate get_command_invocation() status : %s' % response.get('Status', ''))
+				invocation.update(response)
 
-						# Great, but is there a result to retrieve?
-						if( res == 'Success' ):
+				# Any terminal status ends the polling, whether or not it is a Success
+				return( response.get('Status', '') in SSMDelegate.SSM_TERMINAL_STATUSES )
 
-							# Ok, let's go look it up in S3
-							# Due to cross platform treatment of text files, chomp everything that isn't alphanumeric
-							scriptRes = filter(str.isalnum, self.lookupS3Result())
+			try:
+				# Let's try to get the response, and wait if it isn't ready
+				if( not self.pollUntilComplete(pollInvocation, 'InstanceId ' + self.instanceId) ):
+					self.logger.warning('Max wait exceeded for collecting SSM results, so InstanceId: ' + self.instanceId +' will not be stopped')
+					result=SSMDelegate.DECISION_RETRIES_EXCEEDED
 
-							# If the string says Continue, then it's a go.  Otherwise, we won't stop it.
-							if( scriptRes == SSMDelegate.SCRIPT_STOP_INSTANCE ):
-								result = SSMDelegate.DECISION_STOP_INSTANCE
-							elif( scriptRes == SSMDelegate.DECISION_S3_RESULTFILE_NOT_LOCATED ):
-								result = SSMDelegate.DECISION_S3_RESULTFILE_NOT_LOCATED 
-						else:
-							# Wasn't Success, so let's output what it was
-							self.logger.warning('SSM response completed but not as "Success".  SSM result was ' + str(res) )
+				# Great, but is there a result to retrieve?
+				elif( invocation.get('Status') == 'Success' ):
+					scriptOutput = self.resolveScriptOutput(self.instanceId, invocation.get('StandardOutputContent', ''))
+					result = self.decideFromScriptResult(self.instanceId, self.parseScriptResult(scriptOutput))
 
-					else:
-						# So we aren't doing this forever
-						counter += 1
-						self.logger.info('SSMDelegate::retrieveSSMResults() Awaiting Completed Status. Sleep and retry #' + str(counter))
-						time.sleep(self.retrieveSSMResultSleepDuration)
+				else:
+					# Wasn't Success, so let's output what it was
+					self.logger.warning('SSM response completed but not as "Success".  SSM result was ' + str(invocation.get('Status')) )
+					self.logger.warning('InstanceId: ' + self.instanceId + ' unexpected SSM result, or inaccessible instance.  Instance will NOT be stopped')
 
 			except Exception as e:
 				self.logger.warning('Encountered an exception retrieving SSM Results -->' + str(e))
@@ -225,26 +267,52 @@ and instance is running with Instance Profile (see documentation).  Exception wa
 			self.logger.warning('Could not find CommandId in response for InstanceId: ' + self.instanceId)
 			self.logger.warning('SSMResponse was: %s' % str(ssmResponse))
 
-
-		# Default is DECISION_NO_ACTION
-		if( counter >= self.getResultRetryCount):
-			self.logger.warning('Max retries exceeded for collecting results from S3, so InstanceId: ' + self.instanceId +' will not be stopped')
-			result=SSMDelegate.DECISION_RETRIES_EXCEEDED
-		elif( result == SSMDelegate.DECISION_STOP_INSTANCE ):
-			self.logger.info('InstanceId: ' + self.instanceId + ' will be stopped')
-		elif( result == SSMDelegate.DECISION_S3_RESULTFILE_NOT_LOCATED ):
-			self.logger.info('SSM Command for InstanceId: ' + self.instanceId + ' completed, however, the results file is not locatable in s3.  As a precaution, the instance will NOT be stopped')
-		elif( result == SSMDelegate.DECISION_NO_ACTION ):
-			self.logger.info('InstanceId: ' + self.instanceId + ' has override file and will NOT be stopped')
-		else:
-			result == SSMDelegate.DECISION_NO_ACTION_UNEXPECTED_RESULT
-			self.logger.warning('InstanceId: ' + self.instanceId + ' unexpected SSM result ==>'+ result +'<==, or inaccessible instance.  Instance will NOT be stopped')
-
 		return( result )
 
-	def makeS3Key(self, version=1):
+	def resolveScriptOutput(self, instanceId, invocationOutput):
+		'''
+		Returns the stdout of the script, as returned with the command invocation.  S3 is only read when
+		that output is missing or truncated, and an output bucket in the workload region is configured.
+		'''
+		if( invocationOutput and (SSMDelegate.SSM_OUTPUT_TRUNCATED_MARKER not in invocationOutput) ):
+			return( invocationOutput )
+
+		if( self.S3BucketName and (self.isS3BucketInWorkloadRegion() == SSMDelegate.S3_BUCKET_IN_CORRECT_REGION) ):
+			self.logger.info('SSM output for InstanceId: ' + instanceId + ' is missing or truncated, looking up the result in S3')
+			return( self.lookupS3Result(instanceId) )
+
+		return( invocationOutput )
+
+	def decideFromScriptResult(self, instanceId, scriptRes):
+		# If the string says Stop, then it's a go.  Otherwise, we won't stop it.
+		if( scriptRes == SSMDelegate.SCRIPT_STOP_INSTANCE ):
+			self.logger.info('InstanceId: ' + instanceId + ' will be stopped')
+			return( SSMDelegate.DECISION_STOP_INSTANCE )
+
+		elif( scriptRes == SSMDelegate.SCRIPT_NO_ACTION ):
+			self.logger.info('InstanceId: ' + instanceId + ' has override file and will NOT be stopped')
+			return( SSMDelegate.DECISION_NO_ACTION )
+
+		elif( scriptRes == SSMDelegate.DECISION_S3_RESULTFILE_NOT_LOCATED ):
+			self.logger.info('SSM Command for InstanceId: ' + instanceId + ' completed, however, the results file is not locatable in s3.  As a precaution, the instance will NOT be stopped')
+			return( SSMDelegate.DECISION_S3_RESULTFILE_NOT_LOCATED )
+
+		self.logger.warning('InstanceId: ' + instanceId + ' unexpected SSM result ==>'+ str(scriptRes) +'<==, or inaccessible instance.  Instance will NOT be stopped')
+		return( SSMDelegate.DECISION_NO_ACTION_UNEXPECTED_RESULT )
+
+	def parseScriptResult(self, content):
+		# Due to cross platform treatment of text files, chomp everything that isn't alphanumeric
+		if( isinstance(content, bytes) ):
+			content = content.decode('utf-8', 'ignore')
+		if( content == SSMDelegate.DECISION_S3_RESULTFILE_NOT_LOCATED ):
+			return( content )
+		return( ''.join(filter(str.isalnum, content)) )
+
+	def makeS3Key(self, version=1, instanceId=None):
 		# bucketName/keyPrefixName+region/commandId/instance-id/awsrunShellScript/0.aws:runShellScript
 		delimiter='/'
+		if( instanceId is None ):
+			instanceId = self.instanceId
 
 		if( self.osType == SSMDelegate.OS_TYPE_WINDOWS ):
 			# Note: Do not prefix 'key' with leading slash
@@ -252,7 +320,7 @@ and instance is running with Instance Profile (see documentation).  Exception wa
 				key= \
 					self.S3KeyPrefixName \
 					+delimiter+self.commandId \
-					+delimiter+self.instanceId \
+					+delimiter+instanceId \
 					+delimiter+'awsrunPowerShellScript' \
 					+delimiter +'0.awsrunPowerShellScript' \
 					+delimiter+'stdout'  # Note: for some reason the .txt is dropped in this version as well
@@ -260,7 +328,7 @@ and instance is running with Instance Profile (see documentation).  Exception wa
 				key = \
 					self.S3KeyPrefixName \
 					+ delimiter + self.commandId \
-					+ delimiter + self.instanceId \
+					+ delimiter + instanceId \
 					+ delimiter + 'awsrunPowerShellScript' \
 					+ delimiter + 'stdout.txt'
 
@@ -269,7 +337,7 @@ and instance is running with Instance Profile (see documentation).  Exception wa
 			key= \
 				self.S3KeyPrefixName \
 				+delimiter+self.commandId \
-				+delimiter+self.instanceId \
+				+delimiter+instanceId \
 				+delimiter+'awsrunShellScript' \
 				+delimiter+'0.aws:runShellScript' \
 				+delimiter+'stdout'
@@ -278,6 +346,10 @@ and instance is running with Instance Profile (see documentation).  Exception wa
 
 	def isS3BucketInWorkloadRegion(self):
 
+		# Only ask S3 once per delegate
+		if( self.S3BucketInWorkloadRegion != SSMDelegate.S3_BUCKET_LOCATION_NOT_YET_DETERMINED ):
+			return( self.S3BucketInWorkloadRegion )
+
 		result = SSMDelegate.S3_BUCKET_LOCATION_NOT_YET_DETERMINED
 		if( self.S3BucketInWorkloadRegion == SSMDelegate.S3_BUCKET_LOCATION_NOT_YET_DETERMINED ):
 			# Per SSM, the S3 output bucket must be in the same region as the target instance
@@ -311,21 +383,21 @@ and instance is running with Instance Profile (see documentation).  Exception wa
 
 			except Exception as e:
 				self.logger.error('isS3BucketInWorkloadRegion() '+ str(e) )
-				response = SSMDelegate.S3_BUCKET_IN_WRONG_REGION
+				result = SSMDelegate.S3_BUCKET_IN_WRONG_REGION
 
 		self.S3BucketInWorkloadRegion=result
 		return(result)
 
 
 
-	def lookupS3Result(self):
+	def lookupS3Result(self, instanceId=None):
 		content=''
 		# Return the output result from the script execution
 
 
 		try:
 
-			key = self.makeS3Key()
+			key = self.makeS3Key(instanceId=instanceId)
 			found = False
 
 			if (self.osType == SSMDelegate.OS_TYPE_WINDOWS):  # only need to do this for windows
@@ -339,7 +411,7 @@ and instance is running with Instance Profile (see documentation).  Exception wa
 				if( result['KeyCount'] == 0 ):
 					self.logger.info("Could not locate SSM result file in S3, for key :" + key + ": Will now try new loacation...")
 					version = 2
-					key = self.makeS3Key(version)
+					key = self.makeS3Key(version, instanceId)
 
 					result = self.s3.list_objects_v2(
 						Bucket=self.S3BucketName,
@@ -432,13 +504,186 @@ and instance is running with Instance Profile (see documentation).  Exception wa
 
 	def runTestCases(self):
 		#doc = self.makeSSMRunDocument("/tmp/override")
-		docResult=self.sendSSMCommand('/tmp/override')
+		docResult=self.sendSSMCommand()
 		if docResult:
 			overrideRes=self.retrieveSSMResults(docResult)
 			self.logger.info('SSMDelegate runTestCases() results :' + overrideRes)
 		else:
 			self.logger.info('SSMDelegate runTestCases() instance inaccessible, bypassing')
 
+
+class SSMTierDelegate(SSMDelegate):
+	'''
+	Checks for the override file on all of a tier's instances together.  One SendCommand is issued per chunk of
+	up to 50 instances (the SendCommand target limit).  Every chunk's command is sent first, and the invocations
+	of all of them are then polled together with ListCommandInvocations, which also returns each instance's
+	output.  The result is a { instanceId : decision } map of the SSMDelegate DECISION_* values.
+	SendCommand rejects the whole chunk when any one of its instances can't be targeted (e.g. it is not
+	managed by SSM).  The instances of such a chunk are left out of the result, to be checked individually.
+	'''
+
+	SEND_COMMAND_MAX_TARGETS = 50
+
+	def __init__(self, instanceIds, bucketName, keyPrefixName, fileURI, osType, ddbRegion, logger, workloadRegion='us-west-2', credentials=None):
+		super(SSMTierDelegate, self).__init__('', bucketName, keyPrefixName, fileURI, osType, ddbRegion, logger, workloadRegion, credentials)
+		self.instanceIds = list(instanceIds)
+
+	def retrieveOverrideDecisions(self):
+		decisions = {}
+		if( not self.instanceIds ):
+			return( decisions )
+
+		# { commandId : [instanceIds] }, one command per chunk, all sent before any is polled
+		commands = {}
+		for idx in range(0, len(self.instanceIds), SSMTierDelegate.SEND_COMMAND_MAX_TARGETS):
+			chunk = self.instanceIds[idx:idx + SSMTierDelegate.SEND_COMMAND_MAX_TARGETS]
+			ssmResponse = self.sendSSMCommand(chunk)
+			commandId = self.getAttributeFromSSMSendCommand(ssmResponse, SSMDelegate.SSM_COMMAND_ID)
+			if( commandId ):
+				commands[commandId] = chunk
+			else:
+				self.logger.warning('SSMTierDelegate::retrieveOverrideDecisions() no CommandId, instances %s will be checked individually' % str(chunk))
+
+		if( not commands ):
+			return( decisions )
+
+		# { commandId : { instanceId : (status, output) } }
+		invocations = {}
+
+		def pendingCommandIds():
+			return( [commandId for commandId, instanceIds in commands.items() if [instanceId for instanceId in instanceIds if invocations.get(commandId, {}).get(instanceId, ('', ''))[0] not in SSMDelegate.SSM_TERMINAL_STATUSES]] )
+
+		def pollInvocations():
+			# Only the commands with invocations still in progress are listed again
+			for commandId in pendingCommandIds():
+				try:
+					invocations[commandId] = self.lookupInvocations(commandId)
+				except Exception as e:
+					self.logger.warning('SSMTierDelegate::retrieveOverrideDecisions() Encountered an exception listing command invocations -->' + str(e))
+			return( not pendingCommandIds() )
+
+		self.pollUntilComplete(pollInvocations, '%i instances' % sum([len(instanceIds) for instanceIds in commands.values()]))
+
+		for commandId, instanceIds in commands.items():
+			# The S3 fallback locates the output by the command's id
+			self.commandId = commandId
+			for instanceId in instanceIds:
+				status, output = invocations.get(commandId, {}).get(instanceId, ('', ''))
+				decisions[instanceId] = self.decideFromInvocation(instanceId, status, output)
+
+		return( decisions )
+
+	def lookupInvocations(self, commandId):
+		# Returns { instanceId : (status, output) } for every invocation of the command, following pagination
+		invocations = {}
+		kwargs = { 'CommandId' : commandId, 'Details' : True }
+		while( True ):
+			response = self.ssm.list_command_invocations(**kwargs)
+			for currInvocation in response.get('CommandInvocations', []):
+				output = ''.join([currPlugin.get('Output', '') for currPlugin in currInvocation.get('CommandPlugins', [])])
+				invocations[currInvocation['InstanceId']] = (currInvocation['Status'], output)
+			if( 'NextToken' not in response ):
+				break
+			kwargs['NextToken'] = response['NextToken']
+
+		return( invocations )
+
+	def decideFromInvocation(self, instanceId, status, output):
+		if( status not in SSMDelegate.SSM_TERMINAL_STATUSES ):
+			self.logger.warning('Max retries exceeded for collecting results, so InstanceId: ' + instanceId +' will not be stopped')
+			return( SSMDelegate.DECISION_RETRIES_EXCEEDED )
+
+		if( status != 'Success' ):
+			self.logger.warning('SSM response for InstanceId: %s completed but not as "Success".  SSM result was %s' % (instanceId, status))
+			return( SSMDelegate.DECISION_NO_ACTION_UNEXPECTED_RESULT )
+
+		scriptOutput = self.resolveScriptOutput(instanceId, output)
+		return( self.decideFromScriptResult(instanceId, self.parseScriptResult(scriptOutput)) )
+
+
+class SSMDecisionCache(object):
+	'''
+	Caches the definitive override decisions (Stop or Bypass) in the OverrideDecisionCache DynamoDB table, keyed
+	by instance id and override filename, so a retried or back-to-back Stop need not probe the instance again.
+	Each entry expires ttlSeconds after the decision was made.  Every other decision is never cached, so an
+	instance which couldn't be reached is always probed again.
+	'''
+
+	TABLE_NAME = 'OverrideDecisionCache'
+	PARTITION_KEY = 'InstanceId'
+	SORT_KEY = 'OverrideFilename'
+	ATTR_DECISION = 'Decision'
+	ATTR_DECISION_TIME = 'DecisionTime'
+	ATTR_EXPIRES_AT = 'ExpiresAt'  # Also the DynamoDB TTL attribute, so the table cleans itself up
+
+	CACHEABLE_DECISIONS = [SSMDelegate.DECISION_STOP_INSTANCE, SSMDelegate.DECISION_NO_ACTION]
+
+	# BatchGetItem accepts up to 100 keys, BatchWriteItem up to 25 items
+	BATCH_GET_SIZE = 100
+	BATCH_WRITE_SIZE = 25
+
+	def __init__(self, ddbRegion, ttlSeconds, logger):
+		self.ttlSeconds = int(ttlSeconds)
+		self.logger = logger
+		self.dynamodb = Utils.clientRegistry.getClient('dynamodb', ddbRegion)
+
+	def makeKey(self, instanceId, fileURI):
+		return ({
+			SSMDecisionCache.PARTITION_KEY: {'S': instanceId},
+			SSMDecisionCache.SORT_KEY: {'S': fileURI}
+		})
+
+	def lookupDecisions(self, instanceIds, fileURI):
+		'''
+		Returns { instanceId : decision } for the instances with an unexpired decision for fileURI
+		'''
+		decisions = {}
+		now = int(time.time())
+		for idx in range(0, len(instanceIds), SSMDecisionCache.BATCH_GET_SIZE):
+			requestItems = {
+				SSMDecisionCache.TABLE_NAME: {
+					'Keys': [self.makeKey(instanceId, fileURI) for instanceId in instanceIds[idx:idx + SSMDecisionCache.BATCH_GET_SIZE]],
+					'ConsistentRead': True
+				}
+			}
+			try:
+				# Keys DynamoDB couldn't process in this call are handed back, and asked for again
+				while( requestItems ):
+					response = self.dynamodb.batch_get_item(RequestItems=requestItems)
+					for currItem in response.get('Responses', {}).get(SSMDecisionCache.TABLE_NAME, []):
+						if( int(currItem[SSMDecisionCache.ATTR_EXPIRES_AT]['N']) > now ):
+							decisions[currItem[SSMDecisionCache.PARTITION_KEY]['S']] = currItem[SSMDecisionCache.ATTR_DECISION]['S']
+					requestItems = response.get('UnprocessedKeys', {})
+			except Exception as e:
+				# A cache miss only costs a probe
+				self.logger.warning('SSMDecisionCache::lookupDecisions() encountered an exception, instances will be probed -->' + str(e))
+
+		self.logger.info('SSMDecisionCache::lookupDecisions() %i of %i instances have a cached decision for %s' % (len(decisions), len(instanceIds), fileURI))
+		return( decisions )
+
+	def storeDecisions(self, decisions, fileURI):
+		# decisions is { instanceId : decision }, only the definitive decisions are stored
+		now = int(time.time())
+		putRequests = []
+		for instanceId, decision in sorted(decisions.items()):
+			if( decision not in SSMDecisionCache.CACHEABLE_DECISIONS ):
+				continue
+			currItem = self.makeKey(instanceId, fileURI)
+			currItem[SSMDecisionCache.ATTR_DECISION] = {'S': decision}
+			currItem[SSMDecisionCache.ATTR_DECISION_TIME] = {'N': str(now)}
+			currItem[SSMDecisionCache.ATTR_EXPIRES_AT] = {'N': str(now + self.ttlSeconds)}
+			putRequests.append({'PutRequest': {'Item': currItem}})
+
+		for idx in range(0, len(putRequests), SSMDecisionCache.BATCH_WRITE_SIZE):
+			requestItems = { SSMDecisionCache.TABLE_NAME: putRequests[idx:idx + SSMDecisionCache.BATCH_WRITE_SIZE] }
+			try:
+				while( requestItems ):
+					response = self.dynamodb.batch_write_item(RequestItems=requestItems)
+					requestItems = response.get('UnprocessedItems', {})
+			except Exception as e:
+				self.logger.warning('SSMDecisionCache::storeDecisions() encountered an exception, decisions will not be cached -->' + str(e))
+
+
 if __name__ == "__main__":
 
 	loggerNameStr='SSMDelegate'
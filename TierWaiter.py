@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+import time
+import logging
+
+__author__ = "Gary Silverman"
+
+logger = logging.getLogger('Orchestrator')  # The Module Name
+
+
+class TierWaiter(object):
+	'''
+	Polls a tier's instances until all of them satisfy a target condition, or a maximum wait has passed.
+	Each poll is a single batched request for exactly the instances still being waited on, and the interval
+	between polls backs off from pollInterval up to maxPollInterval.  Instance state conditions are read
+	with DescribeInstances, status checks with DescribeInstanceStatus, and target health with
+	DescribeTargetHealth, one request per target group.  waitForInstanceType() likewise verifies a resize.
+	'''
+
+	# Target conditions
+	CONDITION_STOPPED = 'stopped'
+	CONDITION_RUNNING = 'running'
+	CONDITION_STATUS_CHECKS_OK = 'statusChecksOk'  # running, with both the system and instance status checks passed
+	CONDITION_TARGETS_HEALTHY = 'targetsHealthy'  # healthy in every ALB/NLB target group, or running when in none
+
+	# DescribeInstanceStatus accepts up to 100 instance ids per request, DescribeInstances up to 1000
+	DESCRIBE_STATUS_BATCH_SIZE = 100
+	DESCRIBE_INSTANCES_BATCH_SIZE = 1000
+
+	POLL_INTERVAL_DEFAULT = 5
+	MAX_POLL_INTERVAL_DEFAULT = 30
+	BACKOFF_FACTOR_DEFAULT = 2.0
+	MAX_WAIT_DEFAULT = 300
+
+	def __init__(self, ec2_client, pollInterval=POLL_INTERVAL_DEFAULT, maxWait=MAX_WAIT_DEFAULT, maxPollInterval=MAX_POLL_INTERVAL_DEFAULT, backoffFactor=BACKOFF_FACTOR_DEFAULT, elbv2_client=None, targetGroupIndex=None):
+		self.ec2_client = ec2_client
+		self.elbv2_client = elbv2_client
+		self.targetGroupIndex = targetGroupIndex or {}  # { instanceId : [(targetGroupArn, port)] }, see Orchestrator.lookupTargetGroups()
+		self.pollInterval = float(pollInterval)
+		self.maxWait = float(maxWait)
+		self.maxPollInterval = max(float(maxPollInterval), self.pollInterval)
+		self.backoffFactor = float(backoffFactor)
+
+	def wait(self, instanceIds, condition):
+		'''
+		Returns the list of instance ids which did not reach the condition within maxWait (e.g. the stragglers)
+		'''
+		return (self.waitUntil(instanceIds, condition, lambda pendingIds: self.lookupSatisfiedIds(pendingIds, condition)))
+
+	def waitForInstanceType(self, instanceIds, instanceType):
+		'''
+		Returns the list of instance ids whose instance type has not converged on instanceType within maxWait
+		'''
+		return (self.waitUntil(instanceIds, 'instance type ' + instanceType, lambda pendingIds: self.lookupInstanceTypeIds(pendingIds, instanceType)))
+
+	def waitUntil(self, instanceIds, description, lookupFunction):
+		# lookupFunction returns the subset of the pending ids which now satisfy the condition
+		pendingIds = list(instanceIds)
+		startTime = time.time()
+		interval = self.pollInterval
+		pollCount = 0
+
+		while (pendingIds):
+			pollCount += 1
+			satisfiedIds = lookupFunction(pendingIds)
+			pendingIds = [instanceId for instanceId in pendingIds if instanceId not in satisfiedIds]
+			if (not pendingIds):
+				break
+
+			elapsed = time.time() - startTime
+			if (elapsed >= self.maxWait):
+				break
+
+			logger.debug('TierWaiter::wait() %i instances not yet %s after %.1f seconds' % (len(pendingIds), description, elapsed))
+			time.sleep(min(interval, self.maxWait - elapsed))
+			interval = min(interval * self.backoffFactor, self.maxPollInterval)
+
+		elapsed = time.time() - startTime
+		if (pendingIds):
+			logger.warning('TierWaiter::wait() %i of %i instances did not reach %s within %.0f seconds: %s' % (len(pendingIds), len(instanceIds), description, self.maxWait, str(pendingIds)))
+		else:
+			logger.info('TierWaiter::wait() all %i instances reached %s in %.1f seconds after %i polls' % (len(instanceIds), description, elapsed, pollCount))
+
+		return (pendingIds)
+
+	def lookupSatisfiedIds(self, instanceIds, condition):
+		if (condition == TierWaiter.CONDITION_STATUS_CHECKS_OK):
+			return (self.lookupStatusChecksOkIds(instanceIds))
+
+		if (condition == TierWaiter.CONDITION_TARGETS_HEALTHY):
+			return (self.lookupTargetsHealthyIds(instanceIds))
+
+		return (self.lookupMatchingIds(instanceIds, lambda currInstance: currInstance['State']['Name'] == condition))
+
+	def lookupInstanceTypeIds(self, instanceIds, instanceType):
+		return (self.lookupMatchingIds(instanceIds, lambda currInstance: currInstance['InstanceType'] == instanceType))
+
+	def lookupMatchingIds(self, instanceIds, isMatch):
+		# One DescribeInstances per batch of ids, returning the ids of the instances for which isMatch() holds
+		satisfiedIds = set()
+		for idx in range(0, len(instanceIds), TierWaiter.DESCRIBE_INSTANCES_BATCH_SIZE):
+			chunk = instanceIds[idx:idx + TierWaiter.DESCRIBE_INSTANCES_BATCH_SIZE]
+			try:
+				response = self.ec2_client.describe_instances(InstanceIds=chunk)
+			except Exception as e:
+				# Treat as not yet satisfied, the next poll will try again
+				logger.warning('TierWaiter::lookupMatchingIds() describe_instances encountered an exception of -->' + str(e))
+				continue
+
+			for currReservation in response.get('Reservations', []):
+				for currInstance in currReservation.get('Instances', []):
+					if (isMatch(currInstance)):
+						satisfiedIds.add(currInstance['InstanceId'])
+
+		return (satisfiedIds)
+
+	def lookupStatusChecksOkIds(self, instanceIds):
+		satisfiedIds = set()
+		for idx in range(0, len(instanceIds), TierWaiter.DESCRIBE_STATUS_BATCH_SIZE):
+			chunk = instanceIds[idx:idx + TierWaiter.DESCRIBE_STATUS_BATCH_SIZE]
+			try:
+				response = self.ec2_client.describe_instance_status(InstanceIds=chunk, IncludeAllInstances=True)
+			except Exception as e:
+				# Treat as not yet satisfied, the next poll will try again
+				logger.warning('TierWaiter::lookupStatusChecksOkIds() describe_instance_status encountered an exception of -->' + str(e))
+				continue
+
+			for currStatus in response.get('InstanceStatuses', []):
+				if (
+					currStatus['InstanceState']['Name'] == TierWaiter.CONDITION_RUNNING and
+					currStatus.get('InstanceStatus', {}).get('Status') == 'ok' and
+					currStatus.get('SystemStatus', {}).get('Status') == 'ok'
+				):
+					satisfiedIds.add(currStatus['InstanceId'])
+
+		return (satisfiedIds)
+
+	def lookupTargetsHealthyIds(self, instanceIds):
+		# Instances outside of any target group only need to be running
+		untargetedIds = [instanceId for instanceId in instanceIds if not self.targetGroupIndex.get(instanceId)]
+		satisfiedIds = set(self.lookupSatisfiedIds(untargetedIds, TierWaiter.CONDITION_RUNNING)) if untargetedIds else set()
+
+		targetsByGroup = {}
+		for instanceId in instanceIds:
+			for targetGroupArn, port in self.targetGroupIndex.get(instanceId, []):
+				targetsByGroup.setdefault(targetGroupArn, []).append({'Id': instanceId, 'Port': port})
+
+		# An instance is healthy only once it is healthy in every one of its target groups
+		unhealthyIds = set()
+		for targetGroupArn, targets in targetsByGroup.items():
+			healthyIds = set()
+			try:
+				response = self.elbv2_client.describe_target_health(TargetGroupArn=targetGroupArn, Targets=targets)
+				for currDescription in response.get('TargetHealthDescriptions', []):
+					if (currDescription.get('TargetHealth', {}).get('State') == 'healthy'):
+						healthyIds.add(currDescription['Target']['Id'])
+			except Exception as e:
+				# Treat as not yet satisfied, the next poll will try again
+				logger.warning('TierWaiter::lookupTargetsHealthyIds() describe_target_health encountered an exception of -->' + str(e))
+
+			unhealthyIds.update([currTarget['Id'] for currTarget in targets if currTarget['Id'] not in healthyIds])
+
+		for instanceId in instanceIds:
+			if (self.targetGroupIndex.get(instanceId) and instanceId not in unhealthyIds):
+				satisfiedIds.add(instanceId)
+
+		return (satisfiedIds)
@@ -1,8 +1,15 @@
 #!/usr/bin/env python3
 import boto3
+import botocore.config
 import logging
 import logging.handlers
 import time
+import os
+import json
+import copy
+import decimal
+import concurrent.futures
+import threading
 import watchtower
 import requests
 from botocore.credentials import InstanceMetadataProvider, InstanceMetadataFetcher
@@ -10,9 +17,168 @@ from redo import retriable #https://github.com/mozilla-releng/redo
 
 logger = logging.getLogger('Orchestrator') #The Module Name
 auditlogger = logging.getLogger("audit_logger") #getLogger returns a reference to a logger instance with the specified name if it is provided
+
+# boto3 Sessions are not thread safe.  Hold this lock while creating clients/resources from them
+# on worker threads; the clients themselves are safe to share once created.
+boto3SessionLock = threading.Lock()
+
+
+class ClientRegistry(object):
+	'''
+	Hands out boto3 clients and resources which are shared for the life of the run, rather than built per
+	instance.  Each one is keyed by (service, region, credentials), where credentials is None for the default
+	credential chain, or an (accessKeyId, secretAccessKey, sessionToken) tuple such as from an assumed role.
+	The connection pool of each client is sized by maxPoolConnections, so concurrent workers sharing a client
+	are not starved of connections, up to MAX_POOL_CONNECTIONS_CAP.  Only clients created after
+	setMaxPoolConnections() pick up the new size.
+	'''
+	MAX_POOL_CONNECTIONS_DEFAULT = 10
+	MAX_POOL_CONNECTIONS_CAP = 100
+
+	def __init__(self, maxPoolConnections=MAX_POOL_CONNECTIONS_DEFAULT):
+		self.setMaxPoolConnections(maxPoolConnections)
+		self.sessions = {}
+		self.clients = {}
+		self.resources = {}
+
+	def setMaxPoolConnections(self, maxPoolConnections):
+		self.maxPoolConnections = max(1, min(int(maxPoolConnections), ClientRegistry.MAX_POOL_CONNECTIONS_CAP))
+
+	def getClient(self, service, region=None, credentials=None):
+		key = (service, region, credentials)
+		with boto3SessionLock:
+			if( key not in self.clients ):
+				logger.debug('ClientRegistry::getClient() creating %s client in region %s' % (service, region))
+				self.clients[key] = self.getSession(credentials).client(service, region_name=region, config=self.makeConfig())
+			return( self.clients[key] )
+
+	def getResource(self, service, region=None, credentials=None):
+		key = (service, region, credentials)
+		with boto3SessionLock:
+			if( key not in self.resources ):
+				logger.debug('ClientRegistry::getResource() creating %s resource in region %s' % (service, region))
+				self.resources[key] = self.getSession(credentials).resource(service, region_name=region, config=self.makeConfig())
+			return( self.resources[key] )
+
+	def getSession(self, credentials):
+		# Caller holds boto3SessionLock
+		if( credentials not in self.sessions ):
+			if( credentials is None ):
+				self.sessions[credentials] = boto3.session.Session()
+			else:
+				accessKeyId, secretAccessKey, sessionToken = credentials
+				self.sessions[credentials] = boto3.session.Session(aws_access_key_id=accessKeyId, aws_secret_access_key=secretAccessKey, aws_session_token=sessionToken)
+		return( self.sessions[credentials] )
+
+	def makeConfig(self):
+		return( botocore.config.Config(max_pool_connections=self.maxPoolConnections) )
+
+
+# The registry shared by every module in the process
+clientRegistry = ClientRegistry()
+
+
+class SpecCache(object):
+	'''
+	Keeps the parsed and validated specification of a workload, keyed by workload and tagged with the spec
+	version the Loader stamped on the WorkloadSpecification item.  Entries are held in memory, for processes
+	which orchestrate many times, and in one JSON file per workload under the cache directory, for those which
+	don't.  An entry is only returned while its version matches the version currently in DynamoDB.
+	The cache directory is created private to the user, and is ignored unless it is owned by the user and
+	can't be written to by anyone else, since whoever can write to it decides how the workload is actioned.
+	'''
+	CACHE_DIR_DEFAULT = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'), 'AWS_EC2_Scheduler', 'specCache')
+	CACHE_DIR_MODE = 0o700
+
+	def __init__(self, cacheDir=CACHE_DIR_DEFAULT):
+		self.cacheDir = cacheDir
+		self.entries = {}  # { cacheKey : (version, spec) }
+		self.lock = threading.Lock()
+
+	def setCacheDir(self, cacheDir):
+		# None disables the on-disk cache, leaving only the in memory one
+		self.cacheDir = cacheDir
+
+	def lookup(self, cacheKey, version):
+		'''
+		Returns a copy of the spec cached for cacheKey at this version, or None
+		'''
+		with self.lock:
+			if( cacheKey not in self.entries ):
+				self.entries[cacheKey] = self.readFile(cacheKey)
+
+			cachedVersion, spec = self.entries[cacheKey] or (None, None)
+			if( cachedVersion != version ):
+				return( None )
+			return( copy.deepcopy(spec) )
+
+	def store(self, cacheKey, version, spec):
+		# spec must be made of JSON types, DynamoDB numbers are stored as int or float
+		spec = json.loads(json.dumps(spec, default=SpecCache.toJsonType))
+		with self.lock:
+			self.entries[cacheKey] = (version, spec)
+			self.writeFile(cacheKey, version, spec)
+
+	def makeFileName(self, cacheKey):
+		return( os.path.join(self.cacheDir, ''.join([c if (c.isalnum() or c in '-_.') else '_' for c in cacheKey]) + '.json') )
+
+	def isTrustedCacheDir(self):
+		# Owned by this user and not writable by group or others.  Platforms without uids only get the mode check.
+		cacheDirStat = os.stat(self.cacheDir)
+		if( hasattr(os, 'getuid') and cacheDirStat.st_uid != os.getuid() ):
+			logger.warning('SpecCache::isTrustedCacheDir() %s is not owned by this user, the cache will not be used' % self.cacheDir)
+			return( False )
+		if( cacheDirStat.st_mode & 0o022 ):
+			logger.warning('SpecCache::isTrustedCacheDir() %s is writable by other users, the cache will not be used' % self.cacheDir)
+			return( False )
+		return( True )
+
+	def readFile(self, cacheKey):
+		if( not self.cacheDir ):
+			return( None )
+		try:
+			if( not self.isTrustedCacheDir() ):
+				return( None )
+			with open(self.makeFileName(cacheKey), 'r') as cacheFile:
+				cached = json.load(cacheFile)
+			return( (cached['Version'], cached['Spec']) )
+		except (IOError, OSError, ValueError, KeyError) as e:
+			logger.debug('SpecCache::readFile() no usable cache entry for %s --> %s' % (cacheKey, str(e)))
+			return( None )
+
+	def writeFile(self, cacheKey, version, spec):
+		if( not self.cacheDir ):
+			return
+		try:
+			if( not os.path.isdir(self.cacheDir) ):
+				os.makedirs(self.cacheDir, SpecCache.CACHE_DIR_MODE)
+			if( not self.isTrustedCacheDir() ):
+				return
+
+			# Written aside and renamed into place, so concurrent runs never read a partial file
+			fileName = self.makeFileName(cacheKey)
+			tmpFileName = '%s.%i.tmp' % (fileName, os.getpid())
+			with open(tmpFileName, 'w') as cacheFile:
+				json.dump({ 'Version' : version, 'Spec' : spec }, cacheFile)
+			os.replace(tmpFileName, fileName)
+		except (IOError, OSError) as e:
+			# The cache is only an optimization
+			logger.warning('SpecCache::writeFile() could not write the cache entry for %s --> %s' % (cacheKey, str(e)))
+
+	@staticmethod
+	def toJsonType(value):
+		if( isinstance(value, decimal.Decimal) ):
+			return( int(value) if value == value.to_integral_value() else float(value) )
+		if( isinstance(value, set) ):
+			return( sorted(value) )
+		raise TypeError('%s is not JSON serializable' % type(value).__name__)
+
+specCache = SpecCache()
+
+
 class InstanceMetaData(object):
      def __init__(self):
-            self.ec2 = boto3.client('ec2')
+            self.ec2 = clientRegistry.getClient('ec2')
 
      def getInstanceID(self): #   returns instance tag name from scheduler instance to log to cloudwatch
          response = requests.get('http://169.254.169.254/latest/meta-data/instance-id')
@@ -84,6 +250,38 @@ class SnsNotifier(object):
 		self.workload = workload
 	@retriable(attempts=5, sleeptime=0, jitter=0)
 	def sendSns(self,subject,message):
-		client =boto3.resource('sns')
+		client = clientRegistry.getResource('sns')
 		topic = client.create_topic(Name=self.topic) # This action is idempotent.
 		topic.publish(Subject=subject,Message=str(" Workload : " + self.workload + '\n') + str( " Exception : " + message ))
+
+
+class TierExecutor(object):
+	'''
+	Runs the per-instance work of a tier in a bounded pool of threads.  run() only returns once every task
+	has completed, so the whole tier is finished before Orchestration moves on to the next tier.
+	'''
+	def __init__(self, maxParallelism):
+		self.maxParallelism = max(1, int(maxParallelism))
+
+	def run(self, tasks):
+		'''
+		tasks is a dictionary of { key : callable }, typically keyed by instance id.
+		Returns a dictionary of { key : (succeeded, result or exception) }
+		'''
+		outcomes = {}
+		if( not tasks ):
+			return( outcomes )
+
+		poolSize = min(self.maxParallelism, len(tasks))
+		logger.debug('TierExecutor::run() executing %i tasks with parallelism of %i' % (len(tasks), poolSize))
+		with concurrent.futures.ThreadPoolExecutor(max_workers=poolSize) as executor:
+			futureToKey = { executor.submit(task): key for key, task in tasks.items() }
+			for future in concurrent.futures.as_completed(futureToKey):
+				key = futureToKey[future]
+				try:
+					outcomes[key] = (True, future.result())
+				except Exception as e:
+					logger.error('TierExecutor::run() task for %s encountered an exception --> %s' % (key, str(e)))
+					outcomes[key] = (False, e)
+
+		return( outcomes )
@@ -1,14 +1,11 @@
 #!/usr/bin/env python3
-import boto3
 import time
 from botocore.exceptions import ClientError
 from distutils.util import strtobool
 from SSMDelegate import SSMDelegate
 import botocore
-import Utils
 import logging
-import yaml
-from redo import retriable, retry #https://github.com/mozilla-releng/redo
+from redo import retry #https://github.com/mozilla-releng/redo
 
 
 
@@ -21,6 +18,14 @@ class Worker(object):
 	SNS_SUBJECT_PREFIX_WARNING = "Warning:"
 	SNS_SUBJECT_PREFIX_INFORMATIONAL = "Info:"
 
+	# Per-instance outcomes reported back to the Orchestrator
+	ACTION_RESULT_STARTED = 'Started'
+	ACTION_RESULT_STOPPED = 'Stopped'
+	ACTION_RESULT_BYPASSED = 'Bypassed'
+	ACTION_RESULT_FAILED = 'Failed'
+	ACTION_RESULT_DRYRUN = 'DryRun'
+	ACTION_RESULT_NO_ACTION = 'NoAction'
+	ACTION_RESULT_CLEARED = 'Cleared'  # Cleared for action, which will be issued as part of a tier-wide batch
 
 	def __init__(self, workloadRegion, instance, ec2_client, dryRunFlag, snsInit):
 		self.workloadRegion = workloadRegion
@@ -37,76 +42,46 @@ class Worker(object):
 			"stopped": 80
 		}
 
-		try:
-			self.ec2Resource = boto3.resource('ec2', region_name=self.workloadRegion)
-		except Exception as e:
-			msg = 'Worker::__init__() Exception obtaining botot3 ec2 resource in region %s -->' % workloadRegion
-			logger.error(msg + str(e))
-
 
 class StartWorker(Worker):
 
-	def __init__(self, ddbRegion, workloadRegion, instance, all_elbs, elb, scalingInstanceDelay, dryRunFlag, ec2_client, snsInit):
+	def __init__(self, ddbRegion, workloadRegion, instance, scalingInstanceDelay, dryRunFlag, ec2_client, snsInit):
 		super(StartWorker, self).__init__(workloadRegion, instance, ec2_client, dryRunFlag, snsInit)
 
 		self.ddbRegion = ddbRegion
-		self.all_elbs = all_elbs
-		self.elb = elb
 		self.scalingInstanceDelay = scalingInstanceDelay
 
-	@retriable(attempts=5, sleeptime=0, jitter=0)
-	def addressELBRegistration(self):
-		for i in self.all_elbs['LoadBalancerDescriptions']:
-			for j in i['Instances']:
-				if j['InstanceId'] == self.instance.id:
-					elb_name = i['LoadBalancerName']
-					logger.info("Instance %s is attached to ELB %s, and will be deregistered and re-registered" % (self.instance.id, elb_name))
-					success_deregister_done = 0
-					while (success_deregister_done == 0):
-						try:
-							self.elb.deregister_instances_from_load_balancer(LoadBalancerName=elb_name, Instances=[{'InstanceId': self.instance.id}])
-							logger.debug("Succesfully deregistered instance %s from load balancer %s" % (self.instance.id, elb_name))
-							success_deregister_done=1
-						except Exception as e:
-							logger.warning('Worker::addressELBRegistration()::deregister_instances_from_load_balancer() encountered an exception of -->' + str(e))
-							raise e
-
-					success_register_done=0
-					while (success_register_done == 0):
-						try:
-							self.elb.register_instances_with_load_balancer(LoadBalancerName=elb_name,Instances=[{'InstanceId': self.instance.id}])
-							logger.debug('Succesfully registered instance %s to load balancer %s' % (self.instance.id, elb_name))
-							success_register_done=1
-						except Exception as e:
-							logger.warning('Worker::addressELBRegistration()::register_instances_with_load_balancer() encountered an exception of -->' + str(e))
-							raise e
-
 	def startInstance(self):
 
 			result = 'Instance not started'
+			outcome = Worker.ACTION_RESULT_NO_ACTION
 			if (self.dryRunFlag):
 				logger.warning('DryRun Flag is set - instance will not be started')
+				outcome = Worker.ACTION_RESULT_DRYRUN
 			else:
-				if self.all_elbs != "0":
-					logger.debug('addressELBRegistration() for %s' % self.instance.id)
-					try:
-						self.addressELBRegistration()
-					except Exception as e:
-						self.snsInit.sendSns("Worker::addressELBRegistration() has encountered an exception", str(e))
-
+				# ELB re-registration has already been addressed for the whole tier, see ELBWorker
+				logger.debug('Starting EC2 instance: %s' % self.instance.id)
+				try:
+					result = retry(self.instance.start, attempts = 5, sleeptime=0, jitter=0)
 					logger.debug('Starting EC2 instance: %s' % self.instance.id)
-					try:
-						result = retry(self.instance.start, attempts = 5, sleeptime=0, jitter=0)
-						logger.debug('Starting EC2 instance: %s' % self.instance.id)
-						logger.info('startInstance() for ' + self.instance.id + ' result is %s' % result)
-					except Exception as e:
-						msg = 'Worker::instance.start() Exception encountered during instance start ---> %s' % e
-						logger.error(msg)
-						self.snsInit.sendSns("Exception - EC2 instance start::Worker::instance.start() Exception encountered during instance start",str(e))
+					logger.info('startInstance() for ' + self.instance.id + ' result is %s' % result)
+					outcome = Worker.ACTION_RESULT_STARTED
+				except Exception as e:
+					msg = 'Worker::instance.start() Exception encountered during instance start ---> %s' % e
+					logger.error(msg)
+					self.snsInit.sendSns("Exception - EC2 instance start::Worker::instance.start() Exception encountered during instance start",str(e))
+					outcome = Worker.ACTION_RESULT_FAILED
 
+			return (outcome)
 
-	def scaleInstance(self, modifiedInstanceType):
 
+	def scaleInstance(self, modifiedInstanceType):
+		'''
+		Resize the stopped instance to modifiedInstanceType.  Returns True when the instance was resized.
+		The whole tier is resized together, see Orchestrator.scaleATier(), which addresses the T2 credit
+		specification, verifying the new instance type and the ScaleInstanceDelay sleep once for the tier.
+		'''
+		scaled = False
 		instanceState = self.instance.state
 		if (instanceState['Name'] == 'stopped'):
 
@@ -127,8 +102,6 @@ class StartWorker(Worker):
 				preventEbsOptimizedList = ['t2']
 				if (targetInstanceFamily in preventEbsOptimizedList):
 					ebsOptimizedAttr = False
-					# Check T2 Unlimited
-					self.t2Unlimited(modifiedInstanceTypeList)
 				else:
 					ebsOptimizedAttr = self.instance.ebs_optimized  # May have been set to True or False previously
 
@@ -141,16 +114,6 @@ class StartWorker(Worker):
 					logger.warning(msg)
 					self.snsInit.sendSns("Worker::instance.modify_attribute().modifiedInstanceTypeValue has encountered an exception",str(e))
 
-				try:
-					result = retry(self.compareInstanceTypeValues, attempts = 8, sleeptime=15, jitter=0,args=(modifiedInstanceType,))
-				except Exception as e:
-					msg = 'Worker::compareInstanceTypeValues() Exception for instance %s, error --> currentInstanceTypeValue does not match modifiedInstanceTypeValue' % (self.instance.id)
-					logger.warning(msg)
-					tagsYaml = self.retrieveTags()
-					snsSubject = 'Worker::compareInstanceTypeValues() has encountered an exception for instance %s' % (self.instance.id)
-					snsMessage = '%s\n%s' % (str(e), str(tagsYaml))
-					self.snsInit.sendSns(snsSubject, snsMessage)
-										
 				EbsOptimizeKwargs = {"EbsOptimized":{'Value': ebsOptimizedAttr}}
 				try:
 					result = retry(self.instance.modify_attribute,attempts=5,sleeptime=0,jitter=0,kwargs=EbsOptimizeKwargs)
@@ -159,108 +122,54 @@ class StartWorker(Worker):
 					logger.warning(msg)
 					self.snsInit.sendSns("Worker::instance.modify_attribute().modifiedInstanceTypeValue has encountered an exception",str(e))
 
-				# It appears the start instance reads 'modify_attribute' changes as eventually consistent in AWS (assume DynamoDB),
-				#    this can cause an issue on instance type change, whereby the LaunchPlan generates an exception.
-				#    To mitigate against this, we will introduce a one second sleep delay after modifying an attribute
-				time.sleep(self.scalingInstanceDelay)
-
+				scaled = True
 				logger.info('scaleInstance() for ' + self.instance.id + ' result is %s' % result)
 		else:
 			logMsg = 'scaleInstance() requested to change instance type for non-stopped instance ' + self.instance.id + ' no action taken'
 			logger.warning(logMsg)
 
-
-	def compareInstanceTypeValues(self, modifiedInstanceTypeValue):
-		currentInstanceTypeValue = list(self.ec2_client.describe_instance_attribute(InstanceId=self.instance.id, Attribute='instanceType')['InstanceType'].values())
-		logger.info('compareInstanceTypeValues() - Comparing Instance Type Values of %s' % (self.instance.id))
-		logger.info('compareInstanceTypeValues() -   modifiedInstanceTypeValue : %s ' % (modifiedInstanceTypeValue))
-		logger.info('compareInstanceTypeValues() -    currentInstanceTypeValue : %s ' % (currentInstanceTypeValue))
-		if(currentInstanceTypeValue[0] not in modifiedInstanceTypeValue):
-			raise ValueError("Current instance type value does not match modified instance type value.")
-
-
-	def retrieveTags(self):
-		##Return EC2 Tags of given instance in YAML format.
-		tags = self.ec2_client.describe_instances(InstanceIds=[self.instance.id])['Reservations'][0]['Instances'][0]['Tags']
-		tagsYaml = yaml.safe_dump(tags, explicit_start=True, default_flow_style=False)
-		logger.info('retrieveTags(): Retrieve and return instance EC2 tags in YAML format.')
-		logger.debug('retrieveTags(): EC2 tag details for %s' % self.instance.id)
-		logger.debug('retrieveTags(): %s' % tagsYaml)
-		return tagsYaml
+		return (scaled)
 
 
-	def t2Unlimited(self, modifiedInstanceList):
-
-		if len(modifiedInstanceList) == 3:
-			self.modifiedInstanceFlag = modifiedInstanceList[2]
-			logger.info('t2Unlimited(): Checking if T2 Unlimited flag is specified in DynamoDB')
-			logger.debug('t2Unlimited(): t2_unlimited_flag: %s' % self.modifiedInstanceFlag)
-			if (self.modifiedInstanceFlag == "u") or (self.modifiedInstanceFlag == "U"):
-				logger.debug('t2Unlimited(): Found T2 Flag in DynamoDB: %s' % self.modifiedInstanceFlag)
-				try:
-					self.checkT2Unlimited()
-				except Exception as e:
-					self.snsInit.sendSns("Worker::describe_instance_credit_specifications() has encountered an exception" ,str(e))
-
-
-				if self.current_t2_value == "standard":
-					try:
-						logger.info('t2Unlimited(): Trying to modify EC2 instance credit specification')
-						result = retry(self.ec2_client.modify_instance_credit_specification,attempts=5, sleeptime=0,jitter=0,kwargs= {"InstanceCreditSpecifications":[{'InstanceId': self.instance.id,'CpuCredits': 'unlimited'}]} )
-						logger.info('t2Unlimited(): EC2 instance credit specification modified')
-					except Exception as e:
-						msg = 'Worker::instance.modify_attribute().t2Unlimited Exception for EC2 instance %s, error --> %s' % (self.instance, str(e))
-						logger.warning(msg)
-						self.snsInit.sendSns("Worker::checkT2Unlimited::instance.modify_attribute().t2Unlimited has encountered an exception",str(e))
-
-		else:
-			try:
-				self.checkT2Unlimited()
-			except Exception as e:
-				self.snsInit.sendSns("Worker::checkT2Unlimited::describe_instance_credit_specifications() Exception has encountered an exception",str(e))
-
-			if self.current_t2_value == "unlimited":
-				logger.debug('t2Unlimited(): Current T2 value: %s' % self.current_t2_value)
-
-				try:
-					logger.info('t2Unlimited(): Trying to modify EC2 instance credit specification')
-					result = retry(self.ec2_client.modify_instance_credit_specification, attempts=5, sleeptime=0, jitter=0,
-					kwargs= {"InstanceCreditSpecifications":[{'InstanceId': self.instance.id,'CpuCredits': 'standard'}]} )
-					logger.info('t2Unlimited(): EC2 instance credit specification modified')
-
-				except Exception as e:
-					msg = 'Worker::instance.modify_attribute().t2standard Exception in progress for EC2 instance %s, error --> %s' % (self.instance, str(e))
-					logger.warning(msg)
-					self.snsInit.sendSns("Worker::instance.modify_attribute().t2standard Exception has encountered an exception",str(e))
-
-	@retriable(attempts=5,sleeptime=0, jitter=0)
-	def checkT2Unlimited(self):
-		try:
-			logger.info('check_t2_unlimited(): Checking current T2 value')
-			self.current_t2_value = self.ec2_client.describe_instance_credit_specifications(InstanceIds=[self.instance.id,])['InstanceCreditSpecifications'][0]['CpuCredits']
+	def start(self):
+		return (self.startInstance())
 
-		except Exception as e:
-			msg = 'Worker::describe_instance_credit_specifications() exception for EC2 instance %s, error --> %s' % (self.instance, str(e))
-			logger.warning(msg)
-			raise e
+	def execute(self, modifiedInstanceType, startFlag, deferStart=False):
+		'''
+		The per-instance Start chain: resize the instance when a scaling profile applies, then
+		start it, when it is one of the tier's instances to be started.  ELB re-registration is addressed for
+		the whole tier beforehand, see ELBWorker.  The Orchestrator resizes a whole tier ahead of time, see
+		Orchestrator.scaleATier(), in which case modifiedInstanceType is None.
+		When deferStart is set, the instance is only readied and reported as Cleared; the start itself
+		is left to a tier-wide BatchWorker.
+		'''
+		if (modifiedInstanceType):
+			self.scaleInstance(modifiedInstanceType)
 
-		return self.current_t2_value
+		if (startFlag and deferStart):
+			return (Worker.ACTION_RESULT_CLEARED)
 
+		if (startFlag):
+			logger.debug('Starting instance %s', self.instance.id)
+			return (self.start())
 
-	def start(self):
-		self.startInstance()
+		return (Worker.ACTION_RESULT_NO_ACTION)
 
 
 
 class StopWorker(Worker):
 
-	def __init__(self, ddbRegion, workloadRegion, instance, dryRunFlag, ec2_client, snsInit):
+	def __init__(self, ddbRegion, workloadRegion, instance, dryRunFlag, ec2_client, snsInit, credentials=None):
 		super(StopWorker, self).__init__(workloadRegion, instance, ec2_client, dryRunFlag, snsInit)
 		self.ddbRegion = ddbRegion
+		self.credentials = credentials  # The workload's credentials, passed through to SSM
 
 		# MUST convert string False to boolean False
-		self.waitFlag = strtobool('False')
 		self.overrideFlag = strtobool('False')
+		self.overrideDecision = None
+		self.cacheChecked = False  # The decision cache was already consulted for this instance, see setOverrideDecision()
+		self.decisionCache = None  # Optional SSMDecisionCache, see setDecisionCache()
+		self.ssmPolling = {}  # SSMDelegate.setPolling() keyword arguments, the defaults when empty
 		self.snsInit = snsInit
 
 	def stopInstance(self):
@@ -268,6 +177,7 @@ class StopWorker(Worker):
 		logger.debug('Worker::stopInstance() called')
 
 		result = 'Instance not Stopped'
+		outcome = Worker.ACTION_RESULT_DRYRUN
 
 		if (self.dryRunFlag):
 			logger.warning('DryRun Flag is set - instance will not be stopped')
@@ -276,43 +186,17 @@ class StopWorker(Worker):
 				result = retry(self.instance.stop, attempts=5, sleeptime=0, jitter=0)
 				logger.debug("Succesfully stopped EC2 instance %s" % (self.instance.id))
 				logger.info('stopInstance() for ' + self.instance.id + ' result is %s' % result)
+				outcome = Worker.ACTION_RESULT_STOPPED
 			except Exception as e:
 				msg = 'Worker::instance.stop() Exception occured for EC2 instance %s, error --> %s' % (self.instance,  str(e))
 				logger.warning(msg)
 				self.snsInit.sendSns("Exception instance.stopInstance() Exception encountered during instance stop",str(e))
+				outcome = Worker.ACTION_RESULT_FAILED
 
+		# When the tier is synchronized, the wait for the stop to complete is applied by the Orchestrator
+		# across all of the tier's instances at once, see Orchestrator.stopATier()
 
-		# If configured, wait for the stop to complete prior to returning
-		logger.debug('The bool value of self.waitFlag %s, is %s' % (self.waitFlag, bool(self.waitFlag)))
-
-		# self.waitFlag has been converted from str to boolean via set method
-		if (self.waitFlag):
-			logger.info(self.instance.id + ' :Waiting for Stop to complete...')
-
-			if (self.dryRunFlag):
-				logger.warning('DryRun Flag is set - waiter() will not be employed')
-			else:
-				try:
-					# Need the Client to get the Waiter
-					ec2Client = self.ec2Resource.meta.client
-					waiter = ec2Client.get_waiter('instance_stopped')
-
-					# Waits for 40 15 second increments (e.g. up to 10 minutes)
-					waiter.wait()
-
-				except Exception as e:
-					logger.warning('Worker:: waiter block encountered an exception of -->' + str(e))
-
-		else:
-			logger.info(self.instance.id + ' Wait for Stop to complete was not requested')
-
-	def setWaitFlag(self, flag):
-
-		# MUST convert string False to boolean False
-		self.waitFlag = strtobool(flag)
-
-	def getWaitFlag(self):
-		return (self.waitFlag)
+		return (outcome)
 
 	def isOverrideFlagSet(self, S3BucketName, S3KeyPrefixName, overrideFileName, osType):
 		''' Use SSM to check for existence of the override file in the guest OS.  If exists, don't Stop instance but log.
@@ -325,9 +209,9 @@ class StopWorker(Worker):
 		# remote evaluation script may evaluate to "Bypass" with a null string for the override file.  Keep in
 		# mind, DynamodDB isn't going to enforce an override filename be set in the directive.
 
-		noSSM = ""
+		# The S3 bucket and prefix are optional, SSM returns the result with the command invocation.
 
-		if (S3BucketName == noSSM) or (S3KeyPrefixName == noSSM) or (not overrideFileName):
+		if (not overrideFileName):
 			logger.info(
 				self.instance.id + ' Override Flag not set in specification.  Therefore this instance will be actioned. ')
 			return False
@@ -337,73 +221,341 @@ class StopWorker(Worker):
 				self.instance.id + ' Override Flag set BUT no Operating System attribute in specification. Therefore this instance will be actioned.')
 			return False
 
+		# The decision may already have been made for the whole tier, see SSMTierDelegate
+		if (self.overrideDecision is None and self.decisionCache and not self.cacheChecked):
+			self.overrideDecision = self.decisionCache.lookupDecisions([self.instance.id], overrideFileName).get(self.instance.id)
+
+		if (self.overrideDecision is None):
+			self.overrideDecision = self.probeOverrideFile(S3BucketName, S3KeyPrefixName, overrideFileName, osType)
+			if (self.decisionCache):
+				self.decisionCache.storeDecisions({self.instance.id: self.overrideDecision}, overrideFileName)
+
+		return (self.applyOverrideDecision(self.overrideDecision))
+
+	def probeOverrideFile(self, S3BucketName, S3KeyPrefixName, overrideFileName, osType):
 		# Create the delegate
 		ssmDelegate = SSMDelegate(self.instance.id, S3BucketName, S3KeyPrefixName, overrideFileName, osType,
-								  self.ddbRegion, logger, self.workloadRegion)
-
-		# Very first thing to check is whether SSM is going to write the output to the S3 bucket.
-		#   If the bucket is not in the same region as where the instances are running, then SSM doesn't write
-		#   the result to the bucket and thus the rest of this method is completely meaningless to run.
-
-		if (ssmDelegate.isS3BucketInWorkloadRegion() == SSMDelegate.S3_BUCKET_IN_CORRECT_REGION):
-
-			warningMsg = ''
-			msg = ''
-			# Send request via SSM, and check if send was successful
-			ssmSendResult = ssmDelegate.sendSSMCommand()
-			if (ssmSendResult):
-				# Have delegate advise if override file was set on instance.  If so, the instance is not to be stopped.
-				overrideRes = ssmDelegate.retrieveSSMResults(ssmSendResult)
-				logger.debug('SSMDelegate retrieveSSMResults() results :' + overrideRes)
-
-				if (overrideRes == SSMDelegate.S3_BUCKET_IN_WRONG_REGION):
-					# Per SSM, the bucket must be in the same region as the target instance, otherwise the results will not be writte to S3 and cannot be obtained.
-					self.overrideFlag = True
-					warningMsg = Worker.SNS_SUBJECT_PREFIX_WARNING + ' ' + self.instance.id + ' Instance will be not be stopped because the S3 bucket is not in the same region as the workload'
-					logger.warning(warningMsg)
-
-				elif (overrideRes == SSMDelegate.DECISION_STOP_INSTANCE):
-					# There is a result and it specifies it is ok to Stop
-					self.overrideFlag = False
-					logger.info(self.instance.id + ' Instance will be stopped')
-
-				elif (overrideRes == SSMDelegate.DECISION_NO_ACTION_UNEXPECTED_RESULT):
-					# Unexpected SSM Result, see log file.  Will default to overrideFlag==true out of abundance for caution
-					self.overrideFlag = True
-					warningMsg = Worker.SNS_SUBJECT_PREFIX_WARNING + ' ' + self.instance.id + ' Instance will be not be stopped as there was an unexpected SSM result.'
-					logger.warning(warningMsg)
-
-				elif (overrideRes == SSMDelegate.DECISION_RETRIES_EXCEEDED):
-					self.overrideFlag = True
-					warningMsg = Worker.SNS_SUBJECT_PREFIX_WARNING + ' ' + self.instance.id + ' Instance will be not be stopped # retries to collect SSM result from S3 was exceeded'
-					logger.warning(warningMsg)
+								  self.ddbRegion, logger, self.workloadRegion, self.credentials)
+		ssmDelegate.setPolling(**self.ssmPolling)
 
-				else:
-					# Every other result means the instance will be bypassed (e.g. not stopped)
-					self.overrideFlag = True
-					msg = Worker.SNS_SUBJECT_PREFIX_INFORMATIONAL + ' ' + self.instance.id + ' Instance will be not be stopped because override file was set'
-					logger.info(msg)
+		# Send request via SSM, and check if send was successful
+		ssmSendResult = ssmDelegate.sendSSMCommand()
+		if (not ssmSendResult):
+			return (SSMDelegate.DECISION_SEND_FAILED)
 
-			else:
-				self.overrideFlag = True
-				warningMsg = Worker.SNS_SUBJECT_PREFIX_WARNING + ' ' + self.instance.id + ' Instance will be not be stopped because SSM could not query it'
-				logger.warning(warningMsg)
+		# Have delegate advise if override file was set on instance.  If so, the instance is not to be stopped.
+		overrideRes = ssmDelegate.retrieveSSMResults(ssmSendResult)
+		logger.debug('SSMDelegate retrieveSSMResults() results :' + overrideRes)
+		return (overrideRes)
 
-		else:
+	def setOverrideDecision(self, overrideDecision, cacheChecked=False):
+		# Decision made ahead of time by a tier level SSMTierDelegate.  When None, isOverrideFlagSet() probes this instance itself.
+		# cacheChecked is set when the tier's decision cache lookup already covered this instance, so a miss isn't looked up again.
+		self.overrideDecision = overrideDecision
+		self.cacheChecked = cacheChecked
+
+	def setSSMPolling(self, ssmPolling):
+		self.ssmPolling = dict(ssmPolling)
+
+	def setDecisionCache(self, decisionCache):
+		# When set, a cached decision is used before probing the instance, and a fresh decision is cached
+		self.decisionCache = decisionCache
+
+	def applyOverrideDecision(self, overrideRes):
+
+		warningMsg = ''
+		msg = ''
+
+		if (overrideRes == SSMDelegate.S3_BUCKET_IN_WRONG_REGION):
+			# Per SSM, the bucket must be in the same region as the target instance, otherwise the results will not be writte to S3 and cannot be obtained.
 			self.overrideFlag = True
 			warningMsg = Worker.SNS_SUBJECT_PREFIX_WARNING + ' SSM will not be executed as S3 bucket is not in the same region as the workload. [' + self.instance.id + '] Instance will be not be stopped'
 			logger.warning(warningMsg)
 
+		elif (overrideRes == SSMDelegate.DECISION_SEND_FAILED):
+			self.overrideFlag = True
+			warningMsg = Worker.SNS_SUBJECT_PREFIX_WARNING + ' ' + self.instance.id + ' Instance will be not be stopped because SSM could not query it'
+			logger.warning(warningMsg)
+
+		elif (overrideRes == SSMDelegate.DECISION_STOP_INSTANCE):
+			# There is a result and it specifies it is ok to Stop
+			self.overrideFlag = False
+			logger.info(self.instance.id + ' Instance will be stopped')
+
+		elif (overrideRes == SSMDelegate.DECISION_NO_ACTION_UNEXPECTED_RESULT):
+			# Unexpected SSM Result, see log file.  Will default to overrideFlag==true out of abundance for caution
+			self.overrideFlag = True
+			warningMsg = Worker.SNS_SUBJECT_PREFIX_WARNING + ' ' + self.instance.id + ' Instance will be not be stopped as there was an unexpected SSM result.'
+			logger.warning(warningMsg)
+
+		elif (overrideRes == SSMDelegate.DECISION_RETRIES_EXCEEDED):
+			self.overrideFlag = True
+			warningMsg = Worker.SNS_SUBJECT_PREFIX_WARNING + ' ' + self.instance.id + ' Instance will be not be stopped # retries to collect SSM result from S3 was exceeded'
+			logger.warning(warningMsg)
+
+		else:
+			# Every other result means the instance will be bypassed (e.g. not stopped)
+			self.overrideFlag = True
+			msg = Worker.SNS_SUBJECT_PREFIX_INFORMATIONAL + ' ' + self.instance.id + ' Instance will be not be stopped because override file was set'
+			logger.info(msg)
+
 		if (self.overrideFlag == True):
 			if (warningMsg):
 				self.snsInit.sendSns(Worker.SNS_SUBJECT_PREFIX_WARNING, warningMsg)
 			else:
-				self.snsInit.sendSns(Worker.SNS_SUBJECT_PREFIX_INFORMATIONAL, warningMsg)
+				self.snsInit.sendSns(Worker.SNS_SUBJECT_PREFIX_INFORMATIONAL, msg)
 		return (self.overrideFlag)
 
 	def setOverrideFlagSet(self, overrideFlag):
 		self.overrideFlag = strtobool(overrideFlag)
 
-	def execute(self, S3BucketName, S3KeyPrefixName, overrideFileName, osType):
+	def execute(self, S3BucketName, S3KeyPrefixName, overrideFileName, osType, deferStop=False):
 		if (self.isOverrideFlagSet(S3BucketName, S3KeyPrefixName, overrideFileName, osType) == False):
-			self.stopInstance()
+			if (deferStop):
+				# The stop will be issued as part of a tier-wide BatchWorker request
+				return (Worker.ACTION_RESULT_CLEARED)
+			return (self.stopInstance())
+
+		return (Worker.ACTION_RESULT_BYPASSED)
+
+
+class BatchWorker(object):
+	'''
+	Starts or Stops all of a tier's cleared instances using chunked, multi-instance StartInstances / StopInstances
+	requests rather than one request per instance.  A throttled request is retried with backoff, and a request
+	failed by one of its instances is split, so only that instance fails.
+	'''
+	# Number of instance ids sent in a single StartInstances/StopInstances request
+	BATCH_SIZE = 100
+
+	BATCH_ATTEMPTS = 5
+
+	# Errors where retrying the same request after a pause is the right thing to do.  Any other error
+	# on a multi-instance request is assumed to be caused by one of its instances, see actionChunk()
+	THROTTLING_ERROR_CODES = ['RequestLimitExceeded', 'Throttling', 'ThrottlingException', 'InternalError', 'Unavailable']
+
+	def __init__(self, ec2_client, dryRunFlag, snsInit):
+		self.ec2_client = ec2_client
+		self.dryRunFlag = dryRunFlag
+		self.snsInit = snsInit
+
+	def startInstances(self, instanceIds):
+		return (self.actionInstances(instanceIds, 'start', self.ec2_client.start_instances, 'StartingInstances', Worker.ACTION_RESULT_STARTED))
+
+	def stopInstances(self, instanceIds):
+		return (self.actionInstances(instanceIds, 'stop', self.ec2_client.stop_instances, 'StoppingInstances', Worker.ACTION_RESULT_STOPPED))
+
+	def actionInstances(self, instanceIds, actionName, apiCall, responseKey, successOutcome):
+		'''
+		Returns a dictionary of { instanceId : outcome }
+		'''
+		outcomes = {}
+		if (self.dryRunFlag):
+			logger.warning('DryRun Flag is set - %i instances will not be %sed' % (len(instanceIds), actionName))
+			for instanceId in instanceIds:
+				outcomes[instanceId] = Worker.ACTION_RESULT_DRYRUN
+			return (outcomes)
+
+		for idx in range(0, len(instanceIds), BatchWorker.BATCH_SIZE):
+			self.actionChunk(list(instanceIds[idx:idx + BatchWorker.BATCH_SIZE]), actionName, apiCall, responseKey, successOutcome, outcomes)
+
+		failedIds = [instanceId for instanceId, outcome in outcomes.items() if outcome == Worker.ACTION_RESULT_FAILED]
+		logger.info('BatchWorker::actionInstances() %s of %i instances completed, %i failed' % (actionName, len(instanceIds), len(failedIds)))
+		if (failedIds):
+			self.snsInit.sendSns("Exception BatchWorker::actionInstances() Exception encountered during instance %s" % actionName, 'Instances which could not be %sed: %s' % (actionName, str(failedIds)))
+
+		return (outcomes)
+
+	def actionChunk(self, instanceIds, actionName, apiCall, responseKey, successOutcome, outcomes):
+		pendingIds = list(instanceIds)
+		attempt = 0
+		while (pendingIds and attempt < BatchWorker.BATCH_ATTEMPTS):
+			attempt += 1
+			try:
+				response = apiCall(InstanceIds=pendingIds)
+			except ClientError as e:
+				errorCode = e.response.get('Error', {}).get('Code', '')
+				if (errorCode not in BatchWorker.THROTTLING_ERROR_CODES):
+					if (len(pendingIds) > 1):
+						# EC2 fails the whole request when any one instance can't be actioned.  Split the request so
+						# the healthy instances go through, and only the offending ones end up failing.
+						logger.warning('BatchWorker::actionChunk() %s of %i instances failed with %s, splitting the request' % (actionName, len(pendingIds), errorCode))
+						half = len(pendingIds) // 2
+						self.actionChunk(pendingIds[:half], actionName, apiCall, responseKey, successOutcome, outcomes)
+						self.actionChunk(pendingIds[half:], actionName, apiCall, responseKey, successOutcome, outcomes)
+						return
+					# Retrying won't change the outcome of e.g. an authorization error or the instance's state
+					logger.warning('BatchWorker::actionChunk() %s for %s encountered an exception which will not be retried --> %s' % (actionName, str(pendingIds), str(e)))
+					break
+				logger.warning('BatchWorker::actionChunk() %s attempt %i for %s encountered an exception of --> %s' % (actionName, attempt, str(pendingIds), str(e)))
+				self.backoff(attempt)
+				continue
+			except Exception as e:
+				logger.warning('BatchWorker::actionChunk() %s attempt %i for %s encountered an exception of --> %s' % (actionName, attempt, str(pendingIds), str(e)))
+				self.backoff(attempt)
+				continue
+
+			actionedIds = [curr['InstanceId'] for curr in response.get(responseKey, [])]
+			for instanceId in actionedIds:
+				outcomes[instanceId] = successOutcome
+			logger.info('BatchWorker::actionChunk() %s requested for %s' % (actionName, str(actionedIds)))
+
+			# Anything not acknowledged in the response is retried on its own
+			pendingIds = [instanceId for instanceId in pendingIds if instanceId not in actionedIds]
+
+		for instanceId in pendingIds:
+			logger.error('BatchWorker::actionChunk() could not %s instance %s after %i attempts' % (actionName, instanceId, attempt))
+			outcomes[instanceId] = Worker.ACTION_RESULT_FAILED
+
+	def backoff(self, attempt):
+		# No sleep after the last attempt, there is nothing left to wait for
+		if (attempt < BatchWorker.BATCH_ATTEMPTS):
+			time.sleep(min(2 ** attempt, 30))
+
+
+class ELBWorker(object):
+	'''
+	Re-registers a tier's instances with their Classic ELBs ahead of the Start.  The instances are grouped by
+	load balancer using the Orchestrator's instance id -> ELB names index, so each ELB sees one deregister
+	and one register call carrying all of the tier's instances attached to it.
+	'''
+
+	def __init__(self, elb, elbIndex, dryRunFlag, snsInit):
+		self.elb = elb
+		self.elbIndex = elbIndex
+		self.dryRunFlag = dryRunFlag
+		self.snsInit = snsInit
+
+	def groupByLoadBalancer(self, instanceIds):
+		# Returns { elbName : [instanceIds] } for the instances attached to at least one ELB
+		instancesByELB = {}
+		for instanceId in instanceIds:
+			for elbName in self.elbIndex.get(instanceId, []):
+				instancesByELB.setdefault(elbName, []).append(instanceId)
+		return (instancesByELB)
+
+	def reregisterInstances(self, instanceIds):
+		instancesByELB = self.groupByLoadBalancer(instanceIds)
+		for elbName, elbInstanceIds in sorted(instancesByELB.items()):
+			if (self.dryRunFlag):
+				logger.warning('DryRun Flag is set - instances %s will not be re-registered with ELB %s' % (str(elbInstanceIds), elbName))
+				continue
+
+			logger.info("Instances %s are attached to ELB %s, and will be deregistered and re-registered" % (str(elbInstanceIds), elbName))
+			try:
+				retry(self.reregisterWithELB, attempts=5, sleeptime=0, jitter=0, args=(elbName, elbInstanceIds))
+			except Exception as e:
+				logger.warning('ELBWorker::reregisterInstances() ELB %s encountered an exception of -->' % elbName + str(e))
+				self.snsInit.sendSns("ELBWorker::reregisterInstances() has encountered an exception", str(e))
+
+	def reregisterWithELB(self, elbName, instanceIds):
+		elbInstances = [{'InstanceId': instanceId} for instanceId in instanceIds]
+		self.elb.deregister_instances_from_load_balancer(LoadBalancerName=elbName, Instances=elbInstances)
+		logger.debug("Succesfully deregistered instances %s from load balancer %s" % (str(instanceIds), elbName))
+		self.elb.register_instances_with_load_balancer(LoadBalancerName=elbName, Instances=elbInstances)
+		logger.debug('Succesfully registered instances %s to load balancer %s' % (str(instanceIds), elbName))
+
+
+class TargetGroupWorker(object):
+	'''
+	The ALB/NLB counterpart of ELBWorker.  The instances are grouped by target group using the Orchestrator's
+	instance id -> (target group arn, port) index, and each target group sees one DeregisterTargets call with
+	all of the tier's targets before the Start, and one RegisterTargets call once they are started.  Unlike a
+	Classic ELB, a target group only accepts running instances, hence registration follows the Start.
+	'''
+
+	def __init__(self, elbv2, targetGroupIndex, dryRunFlag, snsInit):
+		self.elbv2 = elbv2
+		self.targetGroupIndex = targetGroupIndex
+		self.dryRunFlag = dryRunFlag
+		self.snsInit = snsInit
+
+	def groupByTargetGroup(self, instanceIds):
+		# Returns { targetGroupArn : [targets] } for the instances which are targets of at least one target group
+		targetsByGroup = {}
+		for instanceId in instanceIds:
+			for targetGroupArn, port in self.targetGroupIndex.get(instanceId, []):
+				targetsByGroup.setdefault(targetGroupArn, []).append({'Id': instanceId, 'Port': port})
+		return (targetsByGroup)
+
+	def deregisterInstances(self, instanceIds):
+		self.actionTargets(instanceIds, 'deregister', self.elbv2.deregister_targets)
+
+	def registerInstances(self, instanceIds):
+		self.actionTargets(instanceIds, 'register', self.elbv2.register_targets)
+
+	def actionTargets(self, instanceIds, actionName, actionFunction):
+		targetsByGroup = self.groupByTargetGroup(instanceIds)
+		for targetGroupArn, targets in sorted(targetsByGroup.items()):
+			targetIds = [currTarget['Id'] for currTarget in targets]
+			if (self.dryRunFlag):
+				logger.warning('DryRun Flag is set - instances %s will not %s with target group %s' % (str(targetIds), actionName, targetGroupArn))
+				continue
+
+			logger.info('Instances %s will %s with target group %s' % (str(targetIds), actionName, targetGroupArn))
+			try:
+				retry(actionFunction, attempts=5, sleeptime=0, jitter=0, kwargs={'TargetGroupArn': targetGroupArn, 'Targets': targets})
+			except Exception as e:
+				logger.warning('TargetGroupWorker::actionTargets() %s with target group %s encountered an exception of -->' % (actionName, targetGroupArn) + str(e))
+				self.snsInit.sendSns("TargetGroupWorker::actionTargets() has encountered an exception", str(e))
+
+
+class CreditSpecificationWorker(object):
+	'''
+	Reconciles the CPU credit option (standard or unlimited) of a tier's burstable instances.  The current
+	options of every instance are read with one DescribeInstanceCreditSpecifications while the tier's Start is
+	planned, and only the instances which differ are changed, with one ModifyInstanceCreditSpecification
+	(per 1000 instances).
+	'''
+
+	CPU_CREDITS_STANDARD = 'standard'
+	CPU_CREDITS_UNLIMITED = 'unlimited'
+
+	# DescribeInstanceCreditSpecifications accepts up to 1000 instance ids per request
+	BATCH_SIZE = 1000
+
+	# Returned when an instance has no credit option, e.g. it is not burstable
+	UNSUPPORTED_ERROR_CODES = ['UnsupportedOperation', 'InvalidInstanceType']
+
+	def __init__(self, ec2_client, dryRunFlag, snsInit):
+		self.ec2_client = ec2_client
+		self.dryRunFlag = dryRunFlag
+		self.snsInit = snsInit
+
+	def modify(self, changeIds, cpuCredits):
+		'''
+		Change the credit option of changeIds, already known to differ, to cpuCredits.  Returns the list of
+		instance ids whose credit option was changed.
+		'''
+		if (not changeIds):
+			return ([])
+
+		if (self.dryRunFlag):
+			logger.warning('DryRun Flag is set - credit specification of instances %s will not be changed' % str(changeIds))
+			return ([])
+
+		modifiedIds = []
+		for idx in range(0, len(changeIds), CreditSpecificationWorker.BATCH_SIZE):
+			chunk = changeIds[idx:idx + CreditSpecificationWorker.BATCH_SIZE]
+			specifications = [{'InstanceId': instanceId, 'CpuCredits': cpuCredits} for instanceId in chunk]
+			try:
+				response = retry(self.ec2_client.modify_instance_credit_specification, attempts=5, sleeptime=0, jitter=0, kwargs={"InstanceCreditSpecifications": specifications})
+				modifiedIds.extend([currSuccess['InstanceId'] for currSuccess in response.get('SuccessfulInstanceCreditSpecifications', [])])
+				for currFailure in response.get('UnsuccessfulInstanceCreditSpecifications', []):
+					logger.warning('CreditSpecificationWorker::modify() instance %s credit specification not modified --> %s' % (currFailure.get('InstanceId'), str(currFailure.get('Error'))))
+			except Exception as e:
+				msg = 'Worker::modify_instance_credit_specification() Exception for EC2 instances %s, error --> %s' % (str(chunk), str(e))
+				logger.warning(msg)
+				self.snsInit.sendSns("Worker::modify_instance_credit_specification() has encountered an exception", str(e))
+
+		return (modifiedIds)
+
+	def lookupCreditSpecifications(self, instanceIds):
+		# Returns { instanceId : cpuCredits }
+		currentCredits = {}
+		for idx in range(0, len(instanceIds), CreditSpecificationWorker.BATCH_SIZE):
+			chunk = instanceIds[idx:idx + CreditSpecificationWorker.BATCH_SIZE]
+			response = retry(self.ec2_client.describe_instance_credit_specifications, attempts=5, sleeptime=0, jitter=0, kwargs={"InstanceIds": chunk})
+			for currSpecification in response.get('InstanceCreditSpecifications', []):
+				currentCredits[currSpecification['InstanceId']] = currSpecification['CpuCredits']
+		return (currentCredits)
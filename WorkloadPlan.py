@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+import logging
+
+__author__ = "Gary Silverman"
+
+logger = logging.getLogger('Orchestrator')  # The Module Name
+
+
+class TierActionSpec(object):
+	'''
+	The settings of one action (TierStart or TierStop) of a tier, parsed and defaulted once when the plan is
+	compiled.  The override and IgnoreStop settings only apply to TierStop.
+	'''
+	__slots__ = [
+		'sequence',
+		'dependsOn',  # None when the tier depends on every tier with a lower sequence
+		'synchronized',
+		'delay',
+		'readinessCondition',  # TierWaiter condition, or None when no readiness check is made
+		'readinessPollInterval',
+		'readinessMaxWait',
+		'ignoreStop',
+		'overrideFilename',
+		'osType',
+		'overrideCacheTTL'
+	]
+
+	def __init__(self, sequence=0, dependsOn=None, synchronized=False, delay=0.0, readinessCondition=None, readinessPollInterval=0.0, readinessMaxWait=0.0, ignoreStop=False, overrideFilename='', osType='', overrideCacheTTL=0):
+		self.sequence = sequence
+		self.dependsOn = dependsOn
+		self.synchronized = synchronized
+		self.delay = delay
+		self.readinessCondition = readinessCondition
+		self.readinessPollInterval = readinessPollInterval
+		self.readinessMaxWait = readinessMaxWait
+		self.ignoreStop = ignoreStop
+		self.overrideFilename = overrideFilename
+		self.osType = osType
+		self.overrideCacheTTL = overrideCacheTTL
+
+	def toDict(self):
+		return (dict([(slotName, getattr(self, slotName)) for slotName in TierActionSpec.__slots__]))
+
+	@staticmethod
+	def fromDict(actionDict):
+		return (TierActionSpec(**dict([(slotName, actionDict[slotName]) for slotName in TierActionSpec.__slots__ if slotName in actionDict])))
+
+
+class ScalingProfileSpec(object):
+	'''
+	One scaling profile of a tier: the instance type to start with (None to start the instances as they are),
+	and the FleetSubset, either as a percentage of the tier's instances or as a number of instances.
+	'''
+	__slots__ = ['instanceType', 'fleetSubsetPercent', 'fleetSubsetCount']
+
+	def __init__(self, instanceType=None, fleetSubsetPercent=None, fleetSubsetCount=None):
+		self.instanceType = instanceType
+		self.fleetSubsetPercent = fleetSubsetPercent
+		self.fleetSubsetCount = fleetSubsetCount
+
+	def countInstances(self, totalInstances):
+		# The number of the tier's totalInstances to run, all of them when no FleetSubset applies
+		if (self.fleetSubsetPercent is not None):
+			return (int(round(self.fleetSubsetPercent * totalInstances / 100.0)))
+		if (self.fleetSubsetCount is not None):
+			return (self.fleetSubsetCount)
+		return (totalInstances)
+
+	def toDict(self):
+		return (dict([(slotName, getattr(self, slotName)) for slotName in ScalingProfileSpec.__slots__]))
+
+	@staticmethod
+	def fromDict(profileDict):
+		return (ScalingProfileSpec(**dict([(slotName, profileDict[slotName]) for slotName in ScalingProfileSpec.__slots__ if slotName in profileDict])))
+
+
+class TierSpec(object):
+	__slots__ = ['tierName', 'start', 'stop', 'scalingProfiles']
+
+	def __init__(self, tierName, start, stop, scalingProfiles=None):
+		self.tierName = tierName
+		self.start = start
+		self.stop = stop
+		self.scalingProfiles = scalingProfiles  # { profileName : ScalingProfileSpec }, None when the tier has no TierScaling
+
+	def toDict(self):
+		return ({
+			'tierName': self.tierName,
+			'start': self.start.toDict(),
+			'stop': self.stop.toDict(),
+			'scalingProfiles': None if self.scalingProfiles is None else dict([(profileName, profile.toDict()) for profileName, profile in self.scalingProfiles.items()])
+		})
+
+	@staticmethod
+	def fromDict(tierDict):
+		scalingProfiles = tierDict.get('scalingProfiles')
+		return (TierSpec(
+			tierDict['tierName'],
+			TierActionSpec.fromDict(tierDict['start']),
+			TierActionSpec.fromDict(tierDict['stop']),
+			None if scalingProfiles is None else dict([(profileName, ScalingProfileSpec.fromDict(profileDict)) for profileName, profileDict in scalingProfiles.items()])
+		))
+
+
+class WorkloadPlan(object):
+	'''
+	The tier specifications of a workload, compiled once from the DynamoDB items (see
+	Orchestrator.compileWorkloadPlan()) so that orchestration reads typed attributes rather than re-walking
+	and re-parsing the items.  toDict() and fromDict() round trip through JSON types, which is how the plan
+	is kept in the spec cache.
+	'''
+	__slots__ = ['tiers']
+
+	# Changes whenever the serialized form of the plan changes, so older cache entries are not read
+	FORMAT_VERSION = '1'
+
+	def __init__(self, tiers=None):
+		self.tiers = tiers or {}  # { tierName : TierSpec }
+
+	def getTier(self, tierName):
+		return (self.tiers[tierName])
+
+	def getTierNames(self):
+		return (list(self.tiers.keys()))
+
+	def toDict(self):
+		return ({'FormatVersion': WorkloadPlan.FORMAT_VERSION, 'Tiers': [tierSpec.toDict() for tierName, tierSpec in sorted(self.tiers.items())]})
+
+	@staticmethod
+	def fromDict(planDict):
+		if (planDict.get('FormatVersion') != WorkloadPlan.FORMAT_VERSION):
+			raise ValueError('WorkloadPlan format %s is not %s' % (planDict.get('FormatVersion'), WorkloadPlan.FORMAT_VERSION))
+		tierSpecs = [TierSpec.fromDict(tierDict) for tierDict in planDict['Tiers']]
+		return (WorkloadPlan(dict([(tierSpec.tierName, tierSpec) for tierSpec in tierSpecs])))
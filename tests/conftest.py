@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The modules are run as scripts from the repository root (and the Loader from its own directory), not installed
+repositoryRoot = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for modulePath in [repositoryRoot, os.path.join(repositoryRoot, 'Loader')]:
+	if modulePath not in sys.path:
+		sys.path.insert(0, modulePath)
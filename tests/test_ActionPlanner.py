@@ -0,0 +1,144 @@
+import datetime
+import unittest
+
+from ActionPlanner import ActionPlanner
+
+
+class StubInstance(object):
+	# Stands in for an ec2.Instance of the workload inventory
+
+	def __init__(self, instanceId, instanceType='t3.medium', tags=None):
+		self.id = instanceId
+		self.instance_type = instanceType
+		self.tags = [{'Key': key, 'Value': value} for key, value in (tags or {}).items()]
+
+
+class TestPlanStart(unittest.TestCase):
+
+	def test_tier_already_running_is_noop(self):
+		running = [StubInstance('i-1'), StubInstance('i-2')]
+		tierPlan = ActionPlanner().planStart('Web', 'TierStart', running, [], 2)
+		self.assertTrue(tierPlan.isNoOp())
+
+	def test_only_the_instances_needed_are_started(self):
+		running = [StubInstance('i-1')]
+		stopped = [StubInstance('i-2'), StubInstance('i-3'), StubInstance('i-4')]
+		tierPlan = ActionPlanner().planStart('Web', 'TierStart', running, stopped, 3)
+		self.assertEqual(tierPlan.getInstanceIds(ActionPlanner.ACTION_START), ['i-2', 'i-3'])
+		self.assertEqual(tierPlan.countActions(), {ActionPlanner.ACTION_START: 2})
+
+	def test_more_running_than_target_starts_nothing(self):
+		running = [StubInstance('i-1'), StubInstance('i-2')]
+		tierPlan = ActionPlanner().planStart('Web', 'TierStart', running, [StubInstance('i-3')], 1)
+		self.assertTrue(tierPlan.isNoOp())
+
+	def test_only_instances_of_another_type_are_resized(self):
+		stopped = [StubInstance('i-1', 'm5.large'), StubInstance('i-2', 't3.medium')]
+		tierPlan = ActionPlanner().planStart('Web', 'TierStart', [], stopped, 2, 't3.medium')
+		self.assertEqual(tierPlan.getInstanceIds(ActionPlanner.ACTION_RESIZE), ['i-1'])
+		self.assertEqual(tierPlan.getInstanceIds(ActionPlanner.ACTION_START), ['i-1', 'i-2'])
+
+	def test_matching_credit_option_is_noop(self):
+		stopped = [StubInstance('i-1', 't2.micro'), StubInstance('i-2', 't2.micro')]
+		currentCredits = {'i-1': 'unlimited', 'i-2': 'unlimited'}
+		tierPlan = ActionPlanner().planStart('Web', 'TierStart', [], stopped, 0, 't2.micro.u', currentCredits)
+		self.assertTrue(tierPlan.isNoOp())
+
+	def test_only_differing_credit_options_are_changed(self):
+		stopped = [StubInstance('i-1', 't2.micro'), StubInstance('i-2', 't2.micro'), StubInstance('i-3', 't2.micro')]
+		currentCredits = {'i-1': 'standard', 'i-2': 'unlimited'}
+		tierPlan = ActionPlanner().planStart('Web', 'TierStart', [], stopped, 0, 't2.micro', currentCredits)
+		# i-3 is missing from currentCredits, so is assumed to differ
+		self.assertEqual(tierPlan.getInstanceIds(ActionPlanner.ACTION_CREDIT_SPECIFICATION), ['i-2', 'i-3'])
+		self.assertEqual(tierPlan.getInstanceIds(ActionPlanner.ACTION_RESIZE), [])
+
+	def test_instance_resized_into_t2_has_its_credit_option_set(self):
+		# An m5 has no credit option to describe, so is missing from currentCredits
+		stopped = [StubInstance('i-1', 'm5.large'), StubInstance('i-2', 't2.micro')]
+		self.assertEqual([ActionPlanner.isBurstable(currInstance.instance_type) for currInstance in stopped], [False, True])
+		tierPlan = ActionPlanner().planStart('Web', 'TierStart', [], stopped, 0, 't2.micro', {'i-2': 'standard'})
+		self.assertEqual(tierPlan.instanceActions, {'i-1': [ActionPlanner.ACTION_RESIZE, ActionPlanner.ACTION_CREDIT_SPECIFICATION]})
+
+	def test_elb_members_are_reregistered(self):
+		stopped = [StubInstance('i-1'), StubInstance('i-2')]
+		planner = ActionPlanner(elbIndex={'i-1': ['web-elb']})
+		tierPlan = planner.planStart('Web', 'TierStart', [], stopped, 2)
+		self.assertEqual(tierPlan.getInstanceIds(ActionPlanner.ACTION_ELB_REREGISTER), ['i-1'])
+		self.assertEqual(tierPlan.instanceActions['i-1'], [ActionPlanner.ACTION_ELB_REREGISTER, ActionPlanner.ACTION_START])
+
+
+class TestPlanStop(unittest.TestCase):
+
+	def test_tier_already_stopped_is_noop(self):
+		self.assertTrue(ActionPlanner().planStop('Web', 'TierStop', []).isNoOp())
+
+	def test_running_instances_are_stopped(self):
+		running = [StubInstance('i-2'), StubInstance('i-1')]
+		tierPlan = ActionPlanner().planStop('Web', 'TierStop', running)
+		self.assertEqual(tierPlan.getInstanceIds(ActionPlanner.ACTION_STOP), ['i-1', 'i-2'])
+
+	def test_exempt_instances_are_not_stopped(self):
+		running = [StubInstance('i-1', tags={'SchedulerExempt': 'TRUE'}), StubInstance('i-2')]
+		tierPlan = ActionPlanner(exemptionTagKey='SchedulerExempt').planStop('Web', 'TierStop', running)
+		self.assertEqual(tierPlan.getInstanceIds(ActionPlanner.ACTION_STOP), ['i-2'])
+		self.assertEqual(tierPlan.exemptIds, ['i-1'])
+
+
+class TestIsExempt(unittest.TestCase):
+
+	NOW = datetime.datetime(2026, 10, 18, 12, 0, 0)
+
+	def makePlanner(self):
+		return ActionPlanner(exemptionTagKey='SchedulerExempt', exemptionExpiryTagKey='SchedulerExemptUntil')
+
+	def test_no_exemption_tag_key(self):
+		instance = StubInstance('i-1', tags={'SchedulerExempt': 'true'})
+		self.assertFalse(ActionPlanner().isExempt(instance, self.NOW))
+
+	def test_other_tag_value(self):
+		instance = StubInstance('i-1', tags={'SchedulerExempt': 'false'})
+		self.assertFalse(self.makePlanner().isExempt(instance, self.NOW))
+
+	def test_without_expiry(self):
+		instance = StubInstance('i-1', tags={'SchedulerExempt': 'true'})
+		self.assertTrue(self.makePlanner().isExempt(instance, self.NOW))
+
+	def test_future_expiry(self):
+		instance = StubInstance('i-1', tags={'SchedulerExempt': 'true', 'SchedulerExemptUntil': '2026-10-18T12:30:00Z'})
+		self.assertTrue(self.makePlanner().isExempt(instance, self.NOW))
+
+	def test_past_expiry(self):
+		instance = StubInstance('i-1', tags={'SchedulerExempt': 'true', 'SchedulerExemptUntil': '2026-10-18'})
+		self.assertFalse(self.makePlanner().isExempt(instance, self.NOW))
+
+	def test_expiry_offset_is_converted_to_utc(self):
+		# 13:00 at +02:00 is 11:00 UTC, already past
+		instance = StubInstance('i-1', tags={'SchedulerExempt': 'true', 'SchedulerExemptUntil': '2026-10-18T13:00:00+02:00'})
+		self.assertFalse(self.makePlanner().isExempt(instance, self.NOW))
+
+		# 08:30 at -04:00 is 12:30 UTC, still to come
+		instance = StubInstance('i-2', tags={'SchedulerExempt': 'true', 'SchedulerExemptUntil': '2026-10-18T08:30:00.250-04:00'})
+		self.assertTrue(self.makePlanner().isExempt(instance, self.NOW))
+
+	def test_unreadable_expiry_remains_exempt(self):
+		instance = StubInstance('i-1', tags={'SchedulerExempt': 'true', 'SchedulerExemptUntil': 'next tuesday'})
+		self.assertTrue(self.makePlanner().isExempt(instance, self.NOW))
+
+
+class TestParseExpiry(unittest.TestCase):
+
+	def test_formats(self):
+		planner = ActionPlanner()
+		expected = datetime.datetime(2026, 10, 18, 12, 0, 0)
+		for expiryValue in ['2026-10-18T12:00:00Z', '2026-10-18T12:00:00', '2026-10-18 12:00:00', '2026-10-18T12:00', '2026-10-18T12:00:00+00:00', '2026-10-18T14:00:00+0200', '2026-10-18T07:00-05:00']:
+			self.assertEqual(planner.parseExpiry(expiryValue), expected, expiryValue)
+
+	def test_fractional_seconds(self):
+		planner = ActionPlanner()
+		self.assertEqual(planner.parseExpiry('2026-10-18T12:00:00.5Z'), datetime.datetime(2026, 10, 18, 12, 0, 0, 500000))
+		self.assertEqual(planner.parseExpiry('2026-10-18T12:00:00.123456789+00:00'), datetime.datetime(2026, 10, 18, 12, 0, 0, 123456))
+
+	def test_unreadable(self):
+		planner = ActionPlanner()
+		for expiryValue in ['', 'tomorrow', '18/10/2026', '2026-10-18T12:00:00+2']:
+			self.assertIsNone(planner.parseExpiry(expiryValue), expiryValue)
@@ -0,0 +1,88 @@
+import unittest
+
+from Loader import Loader
+
+
+def makeTier(tierName, startSequence, stopSequence, startDependsOn=None, stopDependsOn=None):
+	tierStart = {Loader.TIER_SEQUENCE: startSequence}
+	tierStop = {Loader.TIER_SEQUENCE: stopSequence}
+	if startDependsOn is not None:
+		tierStart[Loader.TIER_DEPENDS_ON] = startDependsOn
+	if stopDependsOn is not None:
+		tierStop[Loader.TIER_DEPENDS_ON] = stopDependsOn
+	return {Loader.TIER_TAG_VALUE: tierName, Loader.TIER_START: tierStart, Loader.TIER_STOP: tierStop}
+
+
+def makeLoader(tiers):
+	# Bypass __init__(), which connects to DynamoDB
+	loader = Loader.__new__(Loader)
+	loader.tiers = tiers
+	return loader
+
+
+class TestBuildTierDependencies(unittest.TestCase):
+
+	def test_sequence_implies_dependencies(self):
+		loader = makeLoader([makeTier('Web', 2, 0), makeTier('App', 1, 1), makeTier('DB', 0, 2)])
+		startDependencies = loader.buildTierDependencies(Loader.TIER_START)
+		self.assertEqual(sorted(startDependencies['Web']), ['App', 'DB'])
+		self.assertEqual(startDependencies['App'], ['DB'])
+		self.assertEqual(startDependencies['DB'], [])
+
+		stopDependencies = loader.buildTierDependencies(Loader.TIER_STOP)
+		self.assertEqual(stopDependencies['Web'], [])
+		self.assertEqual(sorted(stopDependencies['DB']), ['App', 'Web'])
+
+	def test_shared_sequence_has_no_dependency(self):
+		loader = makeLoader([makeTier('Web', 1, 0), makeTier('Batch', 1, 0), makeTier('DB', 0, 1)])
+		startDependencies = loader.buildTierDependencies(Loader.TIER_START)
+		self.assertEqual(startDependencies['Web'], ['DB'])
+		self.assertEqual(startDependencies['Batch'], ['DB'])
+		self.assertTrue(loader.isRequiredSequencing())
+		self.assertTrue(loader.isAcyclicDependencies())
+
+	def test_depends_on_takes_precedence(self):
+		loader = makeLoader([makeTier('Web', 2, 0, startDependsOn=['DB']), makeTier('App', 1, 1), makeTier('DB', 0, 2)])
+		self.assertEqual(loader.buildTierDependencies(Loader.TIER_START)['Web'], ['DB'])
+
+
+class TestIsAcyclicDependencies(unittest.TestCase):
+
+	def test_acyclic(self):
+		loader = makeLoader([makeTier('Web', 2, 0), makeTier('App', 1, 1), makeTier('DB', 0, 2)])
+		self.assertTrue(loader.isAcyclicDependencies())
+
+	def test_cycle(self):
+		loader = makeLoader([makeTier('Web', 1, 0, startDependsOn=['App']), makeTier('App', 0, 1, startDependsOn=['Web'])])
+		self.assertFalse(loader.isAcyclicDependencies())
+
+	def test_cycle_in_stop(self):
+		loader = makeLoader([
+			makeTier('Web', 0, 0, stopDependsOn=['DB']),
+			makeTier('App', 0, 0, stopDependsOn=['Web']),
+			makeTier('DB', 0, 0, stopDependsOn=['App'])
+		])
+		self.assertFalse(loader.isAcyclicDependencies())
+
+	def test_self_dependency(self):
+		loader = makeLoader([makeTier('Web', 0, 0, startDependsOn=['Web'])])
+		self.assertFalse(loader.isAcyclicDependencies())
+
+	def test_unknown_tier(self):
+		loader = makeLoader([makeTier('Web', 0, 0, startDependsOn=['Cache'])])
+		self.assertFalse(loader.isAcyclicDependencies())
+
+	def test_depends_on_must_be_a_list(self):
+		loader = makeLoader([makeTier('Web', 1, 0, startDependsOn='DB'), makeTier('DB', 0, 1)])
+		self.assertFalse(loader.isAcyclicDependencies())
+
+
+class TestIsRequiredSequencing(unittest.TestCase):
+
+	def test_gap(self):
+		loader = makeLoader([makeTier('Web', 2, 2), makeTier('DB', 0, 0)])
+		self.assertFalse(loader.isRequiredSequencing())
+
+	def test_mismatched_start_and_stop(self):
+		loader = makeLoader([makeTier('Web', 1, 0), makeTier('DB', 0, 0)])
+		self.assertFalse(loader.isRequiredSequencing())
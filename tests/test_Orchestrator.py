@@ -0,0 +1,78 @@
+import threading
+import unittest
+
+from Orchestrator import Orchestrator
+
+
+class StubSns(object):
+
+	def __init__(self):
+		self.messages = []
+
+	def sendSns(self, subject, message):
+		self.messages.append((subject, message))
+
+
+def makeOrchestrator(tierDependencies, maxParallelism=4):
+	# Only what orchestrateTiers() needs, without discovering a workload
+	orchestrator = Orchestrator.__new__(Orchestrator)
+	orchestrator.buildTierDependencies = lambda tierAction: dict(tierDependencies)
+	orchestrator.sequencedTiersList = sorted(tierDependencies.keys())
+	orchestrator.maxParallelism = maxParallelism
+	orchestrator.sns = StubSns()
+	return orchestrator
+
+
+class TierRecorder(object):
+	# The tier function, recording the order tiers start and finish in
+
+	def __init__(self, failingTiers=()):
+		self.failingTiers = set(failingTiers)
+		self.events = []
+		self.lock = threading.Lock()
+
+	def __call__(self, tierName):
+		with self.lock:
+			self.events.append(('start', tierName))
+		with self.lock:
+			self.events.append(('finish', tierName))
+		if tierName in self.failingTiers:
+			raise Exception('%s failed' % tierName)
+
+	def index(self, event, tierName):
+		return self.events.index((event, tierName))
+
+
+class TestOrchestrateTiers(unittest.TestCase):
+
+	# Web depends on App, which depends on both DB and Cache
+	TIER_DEPENDENCIES = {'DB': set(), 'Cache': set(), 'App': set(['DB', 'Cache']), 'Web': set(['App'])}
+
+	def test_dependencies_complete_first(self):
+		orchestrator = makeOrchestrator(TestOrchestrateTiers.TIER_DEPENDENCIES)
+		recorder = TierRecorder()
+		completed = orchestrator.orchestrateTiers(Orchestrator.TIER_START, recorder)
+
+		self.assertEqual(completed, set(['DB', 'Cache', 'App', 'Web']))
+		for tierName, dependsOn in TestOrchestrateTiers.TIER_DEPENDENCIES.items():
+			for dependencyName in dependsOn:
+				self.assertLess(recorder.index('finish', dependencyName), recorder.index('start', tierName))
+		self.assertEqual(orchestrator.sns.messages, [])
+
+	def test_failed_tier_blocks_its_dependents(self):
+		orchestrator = makeOrchestrator(TestOrchestrateTiers.TIER_DEPENDENCIES)
+		recorder = TierRecorder(failingTiers=['App'])
+		completed = orchestrator.orchestrateTiers(Orchestrator.TIER_START, recorder)
+
+		self.assertEqual(completed, set(['DB', 'Cache']))
+		self.assertNotIn(('start', 'Web'), recorder.events)
+		self.assertEqual(len(orchestrator.sns.messages), 1)
+
+	def test_cycle_is_not_actioned(self):
+		orchestrator = makeOrchestrator({'DB': set(), 'App': set(['Web']), 'Web': set(['App'])}, maxParallelism=1)
+		recorder = TierRecorder()
+		completed = orchestrator.orchestrateTiers(Orchestrator.TIER_STOP, recorder)
+
+		self.assertEqual(completed, set(['DB']))
+		self.assertEqual(recorder.events, [('start', 'DB'), ('finish', 'DB')])
+		self.assertEqual(len(orchestrator.sns.messages), 1)
@@ -0,0 +1,177 @@
+import logging
+import time
+import unittest
+from unittest import mock
+
+from botocore.exceptions import ClientError
+from SSMDelegate import SSMDelegate, SSMTierDelegate, SSMDecisionCache
+
+
+logger = logging.getLogger('test_SSMDelegate')
+
+
+class StubClientRegistry(object):
+
+	def __init__(self, **clients):
+		self.clients = clients
+
+	def getClient(self, service, region=None, credentials=None):
+		return self.clients.get(service)
+
+
+class StubSsmClient(object):
+	'''
+	Answers SendCommand like SSM: the whole request fails when any of its instances isn't managed by SSM.
+	Each command's invocations stay InProgress for the first inProgressPolls listings.
+	'''
+
+	def __init__(self, outputs, unmanagedIds=(), inProgressPolls=0):
+		self.outputs = outputs  # { instanceId : script output }
+		self.unmanagedIds = set(unmanagedIds)
+		self.inProgressPolls = inProgressPolls
+		self.commands = {}  # { commandId : [instanceIds] }
+		self.sendRequests = []
+		self.listRequests = []
+
+	def send_command(self, **kwargs):
+		instanceIds = list(kwargs['InstanceIds'])
+		self.sendRequests.append(instanceIds)
+		if self.unmanagedIds.intersection(instanceIds):
+			raise ClientError({'Error': {'Code': 'InvalidInstanceId', 'Message': 'not managed'}}, 'SendCommand')
+		commandId = 'cmd-%i' % len(self.sendRequests)
+		self.commands[commandId] = instanceIds
+		return {'Command': {'CommandId': commandId, 'InstanceIds': instanceIds}}
+
+	def list_command_invocations(self, CommandId, Details):
+		self.listRequests.append(CommandId)
+		inProgress = self.listRequests.count(CommandId) <= self.inProgressPolls
+		invocations = []
+		for instanceId in self.commands[CommandId]:
+			invocations.append({
+				'InstanceId': instanceId,
+				'Status': 'InProgress' if inProgress else 'Success',
+				'CommandPlugins': [] if inProgress else [{'Output': self.outputs[instanceId]}]
+			})
+		return {'CommandInvocations': invocations}
+
+
+def makeTierDelegate(ssmClient, instanceIds):
+	with mock.patch('SSMDelegate.Utils.clientRegistry', StubClientRegistry(ssm=ssmClient)):
+		return SSMTierDelegate(instanceIds, '', '', '/tmp/StopOverride', SSMDelegate.OS_TYPE_LINUX, 'us-west-2', logger)
+
+
+@mock.patch('SSMDelegate.time.sleep')
+class TestSSMTierDelegate(unittest.TestCase):
+
+	def test_decisions_from_invocation_output(self, sleep):
+		ssmClient = StubSsmClient({'i-1': 'Stop\n', 'i-2': 'Bypass\n'})
+		decisions = makeTierDelegate(ssmClient, ['i-1', 'i-2']).retrieveOverrideDecisions()
+		self.assertEqual(decisions, {'i-1': SSMDelegate.DECISION_STOP_INSTANCE, 'i-2': SSMDelegate.DECISION_NO_ACTION})
+		self.assertEqual(ssmClient.sendRequests, [['i-1', 'i-2']])
+		sleep.assert_not_called()
+
+	def test_partial_send_failure(self, sleep):
+		instanceIds = ['i-%03i' % idx for idx in range(120)]
+		ssmClient = StubSsmClient(dict([(instanceId, 'Stop') for instanceId in instanceIds]), unmanagedIds=['i-075'])
+		decisions = makeTierDelegate(ssmClient, instanceIds).retrieveOverrideDecisions()
+
+		self.assertEqual([len(chunk) for chunk in ssmClient.sendRequests], [50, 50, 20])
+		# The rejected chunk is left out, for its instances to be checked individually
+		rejectedIds = instanceIds[50:100]
+		self.assertEqual(sorted(decisions.keys()), sorted(instanceIds[:50] + instanceIds[100:]))
+		self.assertFalse(set(rejectedIds) & set(decisions.keys()))
+		self.assertEqual(set(decisions.values()), set([SSMDelegate.DECISION_STOP_INSTANCE]))
+		self.assertEqual(sorted(ssmClient.listRequests), ['cmd-1', 'cmd-3'])
+
+	def test_every_chunk_rejected(self, sleep):
+		ssmClient = StubSsmClient({'i-1': 'Stop'}, unmanagedIds=['i-1'])
+		self.assertEqual(makeTierDelegate(ssmClient, ['i-1']).retrieveOverrideDecisions(), {})
+		self.assertEqual(ssmClient.listRequests, [])
+
+	def test_commands_are_polled_together(self, sleep):
+		instanceIds = ['i-%03i' % idx for idx in range(60)]
+		ssmClient = StubSsmClient(dict([(instanceId, 'Bypass') for instanceId in instanceIds]), inProgressPolls=1)
+		decisions = makeTierDelegate(ssmClient, instanceIds).retrieveOverrideDecisions()
+
+		self.assertEqual(set(decisions.values()), set([SSMDelegate.DECISION_NO_ACTION]))
+		self.assertEqual(ssmClient.listRequests, ['cmd-1', 'cmd-2', 'cmd-1', 'cmd-2'])
+		self.assertEqual(sleep.call_count, 1)
+
+
+class StubDynamoDBClient(object):
+
+	def __init__(self, items=()):
+		self.items = dict([((currItem['InstanceId']['S'], currItem['OverrideFilename']['S']), currItem) for currItem in items])
+		self.getRequests = []
+
+	def batch_get_item(self, RequestItems):
+		self.getRequests.append(RequestItems)
+		responses = []
+		for currKey in RequestItems[SSMDecisionCache.TABLE_NAME]['Keys']:
+			currItem = self.items.get((currKey['InstanceId']['S'], currKey['OverrideFilename']['S']))
+			if currItem:
+				responses.append(currItem)
+		return {'Responses': {SSMDecisionCache.TABLE_NAME: responses}, 'UnprocessedKeys': {}}
+
+	def batch_write_item(self, RequestItems):
+		for currRequest in RequestItems[SSMDecisionCache.TABLE_NAME]:
+			currItem = currRequest['PutRequest']['Item']
+			self.items[(currItem['InstanceId']['S'], currItem['OverrideFilename']['S'])] = currItem
+		return {'UnprocessedItems': {}}
+
+
+def makeDecisionCache(dynamodbClient, ttlSeconds=600):
+	with mock.patch('SSMDelegate.Utils.clientRegistry', StubClientRegistry(dynamodb=dynamodbClient)):
+		return SSMDecisionCache('us-west-2', ttlSeconds, logger)
+
+
+def makeCachedItem(instanceId, decision, expiresAt, fileURI='/tmp/StopOverride'):
+	return {
+		'InstanceId': {'S': instanceId},
+		'OverrideFilename': {'S': fileURI},
+		'Decision': {'S': decision},
+		'DecisionTime': {'N': str(int(expiresAt) - 600)},
+		'ExpiresAt': {'N': str(int(expiresAt))}
+	}
+
+
+class TestSSMDecisionCache(unittest.TestCase):
+
+	def test_hit(self):
+		dynamodbClient = StubDynamoDBClient([makeCachedItem('i-1', SSMDelegate.DECISION_NO_ACTION, time.time() + 300)])
+		decisions = makeDecisionCache(dynamodbClient).lookupDecisions(['i-1'], '/tmp/StopOverride')
+		self.assertEqual(decisions, {'i-1': SSMDelegate.DECISION_NO_ACTION})
+		self.assertTrue(dynamodbClient.getRequests[0][SSMDecisionCache.TABLE_NAME]['ConsistentRead'])
+
+	def test_miss(self):
+		dynamodbClient = StubDynamoDBClient([makeCachedItem('i-1', SSMDelegate.DECISION_STOP_INSTANCE, time.time() + 300)])
+		decisionCache = makeDecisionCache(dynamodbClient)
+		self.assertEqual(decisionCache.lookupDecisions(['i-2'], '/tmp/StopOverride'), {})
+		# Decisions are per override file
+		self.assertEqual(decisionCache.lookupDecisions(['i-1'], '/tmp/OtherOverride'), {})
+
+	def test_expired(self):
+		dynamodbClient = StubDynamoDBClient([
+			makeCachedItem('i-1', SSMDelegate.DECISION_STOP_INSTANCE, time.time() - 1),
+			makeCachedItem('i-2', SSMDelegate.DECISION_STOP_INSTANCE, time.time() + 300)
+		])
+		decisions = makeDecisionCache(dynamodbClient).lookupDecisions(['i-1', 'i-2'], '/tmp/StopOverride')
+		self.assertEqual(decisions, {'i-2': SSMDelegate.DECISION_STOP_INSTANCE})
+
+	def test_only_definitive_decisions_are_stored(self):
+		dynamodbClient = StubDynamoDBClient()
+		decisionCache = makeDecisionCache(dynamodbClient, ttlSeconds=600)
+		decisionCache.storeDecisions({
+			'i-1': SSMDelegate.DECISION_STOP_INSTANCE,
+			'i-2': SSMDelegate.DECISION_NO_ACTION,
+			'i-3': SSMDelegate.DECISION_RETRIES_EXCEEDED,
+			'i-4': SSMDelegate.DECISION_SEND_FAILED
+		}, '/tmp/StopOverride')
+
+		self.assertEqual(sorted([instanceId for instanceId, fileURI in dynamodbClient.items]), ['i-1', 'i-2'])
+		storedItem = dynamodbClient.items[('i-1', '/tmp/StopOverride')]
+		self.assertEqual(int(storedItem['ExpiresAt']['N']) - int(storedItem['DecisionTime']['N']), 600)
+		self.assertEqual(
+			decisionCache.lookupDecisions(['i-1', 'i-2', 'i-3', 'i-4'], '/tmp/StopOverride'),
+			{'i-1': SSMDelegate.DECISION_STOP_INSTANCE, 'i-2': SSMDelegate.DECISION_NO_ACTION}
+		)
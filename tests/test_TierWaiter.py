@@ -0,0 +1,64 @@
+import unittest
+from unittest import mock
+
+from TierWaiter import TierWaiter
+
+
+class FakeClock(object):
+	# time.time() only advances when time.sleep() is called
+
+	def __init__(self):
+		self.now = 1000.0
+		self.sleeps = []
+
+	def time(self):
+		return self.now
+
+	def sleep(self, seconds):
+		self.sleeps.append(seconds)
+		self.now += seconds
+
+
+class StubEc2Client(object):
+	'''
+	Answers DescribeInstances with the instances in their state, each becoming running after startingPolls polls.
+	'''
+
+	def __init__(self, startingPolls):
+		self.startingPolls = startingPolls  # { instanceId : polls before it is running, None for never }
+		self.requests = []
+
+	def describe_instances(self, InstanceIds):
+		self.requests.append(list(InstanceIds))
+		instances = []
+		for instanceId in InstanceIds:
+			startingPolls = self.startingPolls[instanceId]
+			isRunning = startingPolls is not None and len(self.requests) > startingPolls
+			instances.append({'InstanceId': instanceId, 'State': {'Name': 'running' if isRunning else 'pending'}})
+		return {'Reservations': [{'Instances': instances}]}
+
+
+class TestTierWaiter(unittest.TestCase):
+
+	def setUp(self):
+		self.clock = FakeClock()
+		patcher = mock.patch.multiple('TierWaiter.time', time=self.clock.time, sleep=self.clock.sleep)
+		patcher.start()
+		self.addCleanup(patcher.stop)
+
+	def test_all_ready(self):
+		ec2_client = StubEc2Client({'i-1': 0, 'i-2': 1})
+		stragglers = TierWaiter(ec2_client, pollInterval=5, maxWait=30).wait(['i-1', 'i-2'], TierWaiter.CONDITION_RUNNING)
+		self.assertEqual(stragglers, [])
+		# Only the instances still pending are asked about again
+		self.assertEqual(ec2_client.requests, [['i-1', 'i-2'], ['i-2']])
+		self.assertEqual(self.clock.sleeps, [5])
+
+	def test_readiness_timeout(self):
+		ec2_client = StubEc2Client({'i-1': 0, 'i-2': None})
+		stragglers = TierWaiter(ec2_client, pollInterval=5, maxWait=30, maxPollInterval=30).wait(['i-1', 'i-2'], TierWaiter.CONDITION_RUNNING)
+		self.assertEqual(stragglers, ['i-2'])
+		# The interval backs off, and the last sleep is cut short so the wait never exceeds maxWait
+		self.assertEqual(self.clock.sleeps, [5, 10, 15])
+		self.assertEqual(sum(self.clock.sleeps), 30)
+		self.assertEqual(len(ec2_client.requests), 4)
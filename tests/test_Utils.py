@@ -0,0 +1,48 @@
+import decimal
+import os
+import tempfile
+import unittest
+
+from Utils import SpecCache
+
+
+class TestSpecCache(unittest.TestCase):
+
+	def setUp(self):
+		tmpDir = tempfile.TemporaryDirectory()
+		self.addCleanup(tmpDir.cleanup)
+		self.cacheDir = os.path.join(tmpDir.name, 'specCache')
+
+	def test_lookup_at_same_version(self):
+		specCache = SpecCache(self.cacheDir)
+		specCache.store('Workload', 'v1', {'Tiers': {'Web': {'Sequence': decimal.Decimal('2')}}})
+
+		spec = specCache.lookup('Workload', 'v1')
+		self.assertEqual(spec, {'Tiers': {'Web': {'Sequence': 2}}})
+		# Callers get a copy, which they may change
+		spec['Tiers'].clear()
+		self.assertEqual(specCache.lookup('Workload', 'v1'), {'Tiers': {'Web': {'Sequence': 2}}})
+
+	def test_spec_version_change_invalidates(self):
+		specCache = SpecCache(self.cacheDir)
+		specCache.store('Workload', 'v1', {'Tiers': {}})
+		self.assertIsNone(specCache.lookup('Workload', 'v2'))
+		self.assertIsNone(specCache.lookup('OtherWorkload', 'v1'))
+
+	def test_read_from_file_by_another_process(self):
+		SpecCache(self.cacheDir).store('Workload', 'v1', {'Tiers': {}})
+		self.assertEqual(os.stat(self.cacheDir).st_mode & 0o777, SpecCache.CACHE_DIR_MODE)
+
+		self.assertEqual(SpecCache(self.cacheDir).lookup('Workload', 'v1'), {'Tiers': {}})
+		self.assertIsNone(SpecCache(self.cacheDir).lookup('Workload', 'v2'))
+
+	def test_shared_cache_dir_is_ignored(self):
+		SpecCache(self.cacheDir).store('Workload', 'v1', {'Tiers': {}})
+		os.chmod(self.cacheDir, 0o777)
+		self.assertIsNone(SpecCache(self.cacheDir).lookup('Workload', 'v1'))
+
+	def test_without_cache_dir(self):
+		specCache = SpecCache(None)
+		specCache.store('Workload', 'v1', {'Tiers': {}})
+		self.assertEqual(specCache.lookup('Workload', 'v1'), {'Tiers': {}})
+		self.assertIsNone(SpecCache(None).lookup('Workload', 'v1'))
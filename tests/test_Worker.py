@@ -0,0 +1,90 @@
+import unittest
+from unittest import mock
+
+from botocore.exceptions import ClientError
+from Worker import Worker, BatchWorker
+
+
+class StubSns(object):
+
+	def __init__(self):
+		self.messages = []
+
+	def sendSns(self, subject, message):
+		self.messages.append((subject, message))
+
+
+class StubEc2Client(object):
+	'''
+	Answers StartInstances like EC2: the whole request fails when any of its instances can't be started.
+	'''
+
+	def __init__(self, failingIds=(), unacknowledgedIds=(), errorCode='IncorrectInstanceState'):
+		self.failingIds = set(failingIds)
+		self.unacknowledgedIds = set(unacknowledgedIds)
+		self.errorCode = errorCode
+		self.requests = []
+
+	def start_instances(self, InstanceIds):
+		self.requests.append(list(InstanceIds))
+		if self.failingIds.intersection(InstanceIds):
+			raise ClientError({'Error': {'Code': self.errorCode, 'Message': 'request failed'}}, 'StartInstances')
+		acknowledgedIds = [instanceId for instanceId in InstanceIds if instanceId not in self.unacknowledgedIds]
+		self.unacknowledgedIds.clear()
+		return {'StartingInstances': [{'InstanceId': instanceId} for instanceId in acknowledgedIds]}
+
+
+@mock.patch('Worker.time.sleep')
+class TestBatchWorker(unittest.TestCase):
+
+	def test_chunked_requests(self, sleep):
+		instanceIds = ['i-%03d' % idx for idx in range(BatchWorker.BATCH_SIZE + 1)]
+		ec2_client = StubEc2Client()
+		outcomes = BatchWorker(ec2_client, False, StubSns()).startInstances(instanceIds)
+		self.assertEqual([len(request) for request in ec2_client.requests], [BatchWorker.BATCH_SIZE, 1])
+		self.assertEqual(set(outcomes.values()), set([Worker.ACTION_RESULT_STARTED]))
+
+	def test_failing_instance_is_split_out(self, sleep):
+		instanceIds = ['i-1', 'i-2', 'i-3', 'i-4']
+		ec2_client = StubEc2Client(failingIds=['i-3'])
+		snsInit = StubSns()
+		outcomes = BatchWorker(ec2_client, False, snsInit).startInstances(instanceIds)
+		self.assertEqual(outcomes, {'i-1': Worker.ACTION_RESULT_STARTED, 'i-2': Worker.ACTION_RESULT_STARTED, 'i-3': Worker.ACTION_RESULT_FAILED, 'i-4': Worker.ACTION_RESULT_STARTED})
+
+		# The offending instance is split out and fails at once, without being retried
+		self.assertEqual(ec2_client.requests, [['i-1', 'i-2', 'i-3', 'i-4'], ['i-1', 'i-2'], ['i-3', 'i-4'], ['i-3'], ['i-4']])
+		self.assertEqual(len(snsInit.messages), 1)
+		sleep.assert_not_called()
+
+	def test_non_throttling_error_is_not_retried(self, sleep):
+		instanceIds = ['i-%03d' % idx for idx in range(BatchWorker.BATCH_SIZE)]
+		ec2_client = StubEc2Client(failingIds=instanceIds, errorCode='UnauthorizedOperation')
+		outcomes = BatchWorker(ec2_client, False, StubSns()).startInstances(instanceIds)
+		self.assertEqual(set(outcomes.values()), set([Worker.ACTION_RESULT_FAILED]))
+
+		# Each instance is requested once on its own, after the splits, and nothing sleeps
+		self.assertEqual(len([request for request in ec2_client.requests if len(request) == 1]), len(instanceIds))
+		self.assertEqual(len(ec2_client.requests), 2 * len(instanceIds) - 1)
+		sleep.assert_not_called()
+
+	def test_throttling_is_retried_with_backoff(self, sleep):
+		ec2_client = StubEc2Client(failingIds=['i-1'], errorCode='RequestLimitExceeded')
+		outcomes = BatchWorker(ec2_client, False, StubSns()).startInstances(['i-1', 'i-2'])
+		self.assertEqual(outcomes, {'i-1': Worker.ACTION_RESULT_FAILED, 'i-2': Worker.ACTION_RESULT_FAILED})
+
+		# The throttled request isn't split, and there is no sleep after the last attempt
+		self.assertEqual(ec2_client.requests, [['i-1', 'i-2']] * BatchWorker.BATCH_ATTEMPTS)
+		self.assertEqual(sleep.call_count, BatchWorker.BATCH_ATTEMPTS - 1)
+		self.assertEqual(sum([call[0][0] for call in sleep.call_args_list]), sum([min(2 ** attempt, 30) for attempt in range(1, BatchWorker.BATCH_ATTEMPTS)]))
+
+	def test_unacknowledged_instances_are_retried(self, sleep):
+		ec2_client = StubEc2Client(unacknowledgedIds=['i-2'])
+		outcomes = BatchWorker(ec2_client, False, StubSns()).startInstances(['i-1', 'i-2'])
+		self.assertEqual(ec2_client.requests, [['i-1', 'i-2'], ['i-2']])
+		self.assertEqual(set(outcomes.values()), set([Worker.ACTION_RESULT_STARTED]))
+
+	def test_dry_run(self, sleep):
+		ec2_client = StubEc2Client()
+		outcomes = BatchWorker(ec2_client, True, StubSns()).startInstances(['i-1'])
+		self.assertEqual(outcomes, {'i-1': Worker.ACTION_RESULT_DRYRUN})
+		self.assertEqual(ec2_client.requests, [])
@@ -0,0 +1,67 @@
+import json
+import unittest
+
+from WorkloadPlan import WorkloadPlan, TierSpec, TierActionSpec, ScalingProfileSpec
+
+
+def makeWorkloadPlan():
+	webTier = TierSpec(
+		'Web',
+		TierActionSpec(sequence=2, dependsOn=['App'], delay=15.0, readinessCondition='StatusChecksOk', readinessPollInterval=5.0, readinessMaxWait=300.0),
+		TierActionSpec(sequence=0, synchronized=True, overrideFilename='/tmp/StopOverride', osType='Linux', overrideCacheTTL=600),
+		{'DevMode': ScalingProfileSpec('t2.nano', fleetSubsetCount=1), 'ProdMode': ScalingProfileSpec('t3.medium', fleetSubsetPercent=100.0)}
+	)
+	dbTier = TierSpec('DB', TierActionSpec(sequence=0), TierActionSpec(sequence=1, ignoreStop=True))
+	return WorkloadPlan({'Web': webTier, 'DB': dbTier})
+
+
+class TestWorkloadPlan(unittest.TestCase):
+
+	def assertTierSpecEqual(self, tierSpec, otherTierSpec):
+		self.assertEqual(tierSpec.tierName, otherTierSpec.tierName)
+		for slotName in TierActionSpec.__slots__:
+			self.assertEqual(getattr(tierSpec.start, slotName), getattr(otherTierSpec.start, slotName), slotName)
+			self.assertEqual(getattr(tierSpec.stop, slotName), getattr(otherTierSpec.stop, slotName), slotName)
+		if tierSpec.scalingProfiles is None:
+			self.assertIsNone(otherTierSpec.scalingProfiles)
+			return
+		self.assertEqual(sorted(tierSpec.scalingProfiles.keys()), sorted(otherTierSpec.scalingProfiles.keys()))
+		for profileName, profile in tierSpec.scalingProfiles.items():
+			self.assertEqual(profile.toDict(), otherTierSpec.scalingProfiles[profileName].toDict())
+
+	def test_round_trip(self):
+		workloadPlan = makeWorkloadPlan()
+		restoredPlan = WorkloadPlan.fromDict(workloadPlan.toDict())
+		self.assertEqual(sorted(restoredPlan.getTierNames()), ['DB', 'Web'])
+		for tierName in workloadPlan.getTierNames():
+			self.assertTierSpecEqual(workloadPlan.getTier(tierName), restoredPlan.getTier(tierName))
+
+	def test_round_trip_through_json(self):
+		# The spec cache keeps the plan as JSON
+		workloadPlan = makeWorkloadPlan()
+		restoredPlan = WorkloadPlan.fromDict(json.loads(json.dumps(workloadPlan.toDict())))
+		self.assertEqual(restoredPlan.toDict(), workloadPlan.toDict())
+		self.assertIsNone(restoredPlan.getTier('DB').scalingProfiles)
+		self.assertEqual(restoredPlan.getTier('Web').start.dependsOn, ['App'])
+
+	def test_other_format_version_is_rejected(self):
+		planDict = makeWorkloadPlan().toDict()
+		planDict['FormatVersion'] = '0'
+		self.assertRaises(ValueError, WorkloadPlan.fromDict, planDict)
+
+	def test_missing_settings_are_defaulted(self):
+		actionSpec = TierActionSpec.fromDict({'sequence': 3})
+		self.assertEqual(actionSpec.sequence, 3)
+		self.assertIsNone(actionSpec.dependsOn)
+		self.assertFalse(actionSpec.ignoreStop)
+
+	def test_slots(self):
+		self.assertRaises(AttributeError, setattr, TierActionSpec(), 'tierName', 'Web')
+
+
+class TestScalingProfileSpec(unittest.TestCase):
+
+	def test_count_instances(self):
+		self.assertEqual(ScalingProfileSpec('t3.medium', fleetSubsetPercent=40.0).countInstances(5), 2)
+		self.assertEqual(ScalingProfileSpec('t3.medium', fleetSubsetCount=2).countInstances(5), 2)
+		self.assertEqual(ScalingProfileSpec('t3.medium').countInstances(5), 5)